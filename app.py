@@ -1,16 +1,23 @@
+import time
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from supabase import create_client
-from datetime import date, timedelta
-import matplotlib.pyplot as plt
-from io import BytesIO
-
-from utils import get_fiscal_period
-from custom_cards import card_html
-from shifts import prepare_shift_dataframe
-from pdf import create_pdf_report, create_one_page_type_report, create_one_page_a3_report
+from datetime import date, datetime, timedelta
+
+from utils import get_fiscal_period, format_date
+from custom_cards import CARDS_CSS, cards_grid_html, tag_header_html
+from panel_model import build_panel_model
+from filters import get_filter_index
+from shifts import prepare_shift_dataframe, fill_missing_goals
+from charts import grouped_bar_figure, daily_line_figure, cycle_trend_figure, stacked_bar_figure, pareto_figure
+from ciclo import get_calendar
+from rollups import load_history, cycle_summary, recent_cycles
+from ledger import get_ledger, maint_starts
+from intervals import get_impact_index
+from cache import shared_file_cache, local_cache
+from data import load_dashboard_bundle, start_change_feed, change_feed_connected, data_ttl, load_day_notes, with_impact_texts
+from export_data import WRITERS, FORMAT_MIME, export_to_file, export_file_name
+from archive import archived_bundle, archived_day, is_closed
+from kiosk import start_kiosk_renderer, KIOSK_URL
 
 # ==============================================================================
 # 1. CONFIGURAÇÃO E ESTILOS
@@ -40,101 +47,32 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# CSS dos cards KPI (Aba 1) e do cabeçalho dos equipamentos (Aba 2)
+st.markdown(CARDS_CSS, unsafe_allow_html=True)
+
 # ==============================================================================
-# 2. CONEXÃO E DADOS
+# 2. CONEXÃO E DADOS (ver data.py)
 # ==============================================================================
-@st.cache_resource
-def init_connection():
-    try:
-        url = st.secrets["supabase"]["url"]
-        key = st.secrets["supabase"]["role"]
-        return create_client(url, key)
-    except Exception:
-        st.error("Configure os segredos do Supabase no .streamlit/secrets.toml")
-        st.stop()
-
-supabase = init_connection()
-
-@st.cache_data(ttl=60)
-def load_data(start_date, end_date):
-    response = supabase.table("view_dashboard")\
-        .select("*")\
-        .gte("date", start_date.isoformat())\
-        .lte("date", end_date.isoformat())\
-        .execute()
-    
-    df = pd.DataFrame(response.data)
-    if not df.empty:
-        df['date'] = pd.to_datetime(df['date']).dt.date
-        df['quantity'] = pd.to_numeric(df['quantity']).fillna(0)
-        df['meta_turno'] = pd.to_numeric(df['meta_turno']).fillna(0)
-        
-        # --- NOVO: Tratamento da coluna total_tubos ---
-        if 'total_tubos' in df.columns:
-            df['total_tubos'] = pd.to_numeric(df['total_tubos']).fillna(0)
-        else:
-            df['total_tubos'] = 0
-            
-        df['shift_name'] = df['shift_name'].astype(str)
-        df['equipment_tag'] = df['equipment_tag'].fillna('N/A')
-
-        df['maint_start_date'] = pd.to_datetime(df['maint_start_date'], errors='coerce').dt.strftime('%d/%m/%Y').fillna('-')
-        df['maint_due_date'] = pd.to_datetime(df['maint_due_date'], errors='coerce').dt.strftime('%d/%m/%Y').fillna('-')
-        df['maint_real_due_date'] = pd.to_datetime(df['maint_real_due_date'], errors='coerce').dt.strftime('%d/%m/%Y').fillna('-')
-        df['maint_status'] = df['maint_status'].fillna('Nao Definido').astype(str)
-        
-        if 'notes' not in df.columns: df['notes'] = ""
-            
-    return df
-
-@st.cache_data(ttl=60)
-def load_impacts_data():
-    """Busca TODO o histórico de impactos com TAGs e calcula as horas."""
-    # Query que faz o join com as manutenções e equipamentos para pegar a TAG e o Tipo
-    response = supabase.table("maintenance_impacts")\
-        .select("*, maintenances(type, equipments(tag))")\
-        .execute()
-    
-    df_imp = pd.DataFrame(response.data)
-    
-    if not df_imp.empty:
-        # Extrai a Tag e o Tipo do JSON retornado pelo Supabase
-        df_imp['equipment_tag'] = df_imp['maintenances'].apply(lambda x: x['equipments']['tag'] if x and x.get('equipments') else 'N/A')
-        df_imp['Tipo'] = df_imp['maintenances'].apply(lambda x: x['type'] if x else 'N/A')
-        
-        # Converte datas
-        df_imp['start_time'] = pd.to_datetime(df_imp['start_time'])
-        # Se não tiver end_time, assume o tempo atual (ou 0, ajuste conforme sua regra)
-        df_imp['end_time'] = pd.to_datetime(df_imp['end_time']).fillna(pd.Timestamp.now(tz='UTC'))
-        
-        # Calcula as HORAS de impacto
-        df_imp['horas'] = (df_imp['end_time'] - df_imp['start_time']).dt.total_seconds() / 3600.0
-        df_imp['date'] = df_imp['start_time'].dt.date
-        
-        # Separa a Categoria da Descrição
-        split_desc = df_imp['description'].str.split(' - ', n=1, expand=True)
-        df_imp['Categoria'] = split_desc[0].str.strip()
-        df_imp['Detalhe'] = split_desc[1].str.strip() if split_desc.shape[1] > 1 else df_imp['description']
-        df_imp['Categoria'] = df_imp.apply(lambda x: 'OUTROS' if pd.isna(x['Detalhe']) else x['Categoria'], axis=1)
-        
-    return df_imp
-
-@st.cache_data(ttl=60)
-def get_kpi_totals(start_date, end_date):
-    """
-    Busca os totais Macro:
-    1. Garantia Mínima (Tabela goals)
-    2. Liberado/Mapeado (Tabela maintenances)
-    """
-    # 1. Busca Garantia Mínima (Soma do valor das metas ativas no período)
-    # Ajuste o filtro 'type' conforme sua regra (ex: 'Contratual' ou 'Faturamento Mínimo')
-    resp_metrics = supabase.table("view_consolidado_manutencao")\
-        .select("*")\
-        .execute()
-    
-    df_metrics = pd.DataFrame(resp_metrics.data)
-        
-    return df_metrics
+# Listener de mudanças (Realtime / LISTEN-NOTIFY) para invalidar o cache por evento
+start_change_feed()
+# Modo TV: um renderizador por processo publica a Gestão à Vista como páginas estáticas (kiosk.py)
+kiosk_renderer = start_kiosk_renderer()
+
+def lazy_report(builder_name):
+    """Builder de pdf.py importado só na geração (fpdf + matplotlib ficam fora da partida do app)."""
+    def build(*args, sink=None):
+        import pdf
+        return getattr(pdf, builder_name)(*args, sink=sink)
+    return build
+
+# Relatórios compartilhados entre réplicas (chave: data + conteúdo dos DataFrames), escritos
+# direto no arquivo do cache. Todos os formatos desenham o mesmo modelo (report_model.py).
+REPORT_FORMATS = {
+    "A3 Operacional": ("a3", shared_file_cache("report_a3", ttl=300)(lazy_report("create_one_page_a3_report"))),
+    "A3 Executivo": ("executivo", shared_file_cache("report_executivo", ttl=300)(lazy_report("create_one_page_type_report"))),
+    "Relatório Diário": ("diario", shared_file_cache("report_diario", ttl=300)(lazy_report("create_pdf_report"))),
+    "Apresentação": ("apresentacao", shared_file_cache("report_apresentacao", ttl=300)(lazy_report("create_landscape_presentation"))),
+}
 
 # ==============================================================================
 # 3. SIDEBAR (FILTROS GLOBAIS)
@@ -148,10 +86,34 @@ with st.sidebar:
         )
     
     start_fiscal, end_fiscal, label_mes = get_fiscal_period(selected_date)
+
+    # Calendário contratual do ciclo (metas e quantitativo liberado previsto)
+    try:
+        feriados = list(st.secrets.get("ciclo", {}).get("feriados", []))
+    except Exception:
+        feriados = []
+    calendar = get_calendar(selected_date, holidays=feriados)
     st.info(f"📅 **Medição Vigente:**\n{label_mes}\n\n({start_fiscal.strftime('%d/%m')} até {end_fiscal.strftime('%d/%m')})")
 
-    df_cycle = load_data(start_fiscal, end_fiscal)
-    df_metrics = get_kpi_totals(start_fiscal, end_fiscal)
+    # Ciclo fechado: direto do arquivo noturno (archive.py), sem consultar o banco.
+    # Senão, ciclo, metas consolidadas e impactos buscados em paralelo
+    dashboard_data = archived_bundle(start_fiscal) if is_closed(end_fiscal) else None
+    from_archive = dashboard_data is not None
+    if not from_archive:
+        dashboard_data = load_dashboard_bundle(start_fiscal, end_fiscal)
+    df_cycle = dashboard_data.cycle
+    df_metrics = dashboard_data.metrics
+
+    # Indicador de atualidade (os dados podem estar sendo atualizados em segundo plano)
+    data_age = time.time() - dashboard_data.fetched_at
+    if from_archive:
+        st.caption(f"🗄️ Ciclo fechado · arquivado em {datetime.fromtimestamp(dashboard_data.fetched_at).strftime('%d/%m %H:%M')}")
+    elif dashboard_data.refreshing or data_age > data_ttl():
+        st.caption(f"🟡 Dados de {data_age:.0f}s atrás · atualizando em segundo plano")
+    elif change_feed_connected():
+        st.caption(f"🟢 Atualização por eventos · snapshot de {data_age:.0f}s")
+    else:
+        st.caption(f"🟢 Dados atualizados há {data_age:.0f}s")
 
     if not df_metrics.empty:
         all_areas = sorted(df_metrics['area'].dropna().unique())
@@ -163,11 +125,40 @@ with st.sidebar:
         all_tags = sorted(df_cycle['equipment_tag'].dropna().unique())
         selected_tags = st.multiselect("Filtrar Equipamentos", all_tags, default=all_tags)
 
-        df_filtered = df_cycle[df_cycle['equipment_tag'].isin(selected_tags) & df_cycle['equipment_area'].isin(selected_areas)]
+        # Seleções avaliadas no índice do ciclo (códigos + posições, visões memoizadas)
+        cycle_filter = get_filter_index(df_cycle)
+        selection = dict(equipment_tag=selected_tags, equipment_area=selected_areas)
+        df_filtered = cycle_filter.view(**selection)
+
+        # Apontamentos e impactos brutos para auditoria, lidos e escritos em páginas
+        with st.expander("📥 Exportar dados"):
+            n_export = st.number_input("Ciclos até a medição vigente", min_value=1, max_value=24, value=1)
+            export_fmt = st.selectbox("Formato do arquivo", list(WRITERS), format_func=str.upper)
+            export_start = recent_cycles(selected_date, n_export)[0][0]
+            export_areas = None if set(selected_areas) == set(all_areas) else list(selected_areas)
+            export_tags = None if set(selected_tags) == set(all_tags) else list(selected_tags)
+
+            def export_file(fmt=export_fmt, start=export_start, end=end_fiscal, areas=export_areas, tags=export_tags):
+                # Executado só no clique; o Streamlit lê o arquivo e o handle fecha ao sair do escopo
+                return export_to_file(fmt, start, end, areas, tags)
+
+            st.download_button(
+                label="Baixar dados",
+                data=export_file,
+                file_name=export_file_name(export_fmt, export_start, end_fiscal),
+                mime=FORMAT_MIME[export_fmt],
+            )
 
     else:
         df_filtered = pd.DataFrame()
 
+    # Uso do cache local (orçamento de memória do processo)
+    cache_stats = local_cache.stats()
+    st.caption(
+        f"🧠 Cache: {cache_stats['bytes'] / 1024**2:.1f} de {cache_stats['max_bytes'] / 1024**2:.0f} MB "
+        f"· {cache_stats['entries']} entradas"
+    )
+
 st.title("")
 
 if df_filtered.empty:
@@ -178,132 +169,30 @@ tab1, tab2, tab3 = st.tabs(["🖥️ Gestão à Vista", "📅 Relatório Diário
 
 with tab1:
     st.markdown("### 🚀 Painel de Acompanhamento Contratual")
-    
-    # ---------------------------------------------------------
-    # ESTILIZAÇÃO E HTML DOS CARDS
-    # ---------------------------------------------------------
-    st.markdown("""
-    <style>
-        .kpi-card {
-            background-color: #2b2b36;
-            padding: 15px;
-            border-radius: 8px;
-            border-left: 5px solid #2542e6;
-            box-shadow: 0 4px 6px rgba(0,0,0,0.2);
-            height: 140px;
-            display: flex;
-            flex-direction: column;
-            justify-content: space-between;
-        }
-        .kpi-title { font-size: 13px; color: #a0a0a0; text-transform: uppercase; font-weight: 600; }
-        .kpi-value { font-size: 26px; font-weight: bold; color: #ffffff; margin: 5px 0; }
-        .kpi-footer { border-top: 1px solid #444; padding-top: 8px; margin-top: auto; }
-        .kpi-meta { font-size: 12px; color: #ccc; display: flex; justify-content: space-between; }
-        .kpi-badge { 
-            font-size: 11px; 
-            padding: 2px 6px; 
-            border-radius: 4px; 
-            font-weight: bold;
-        }
-        .badge-green { background-color: rgba(46, 204, 113, 0.2); color: #2ecc71; }
-        .badge-red { background-color: rgba(231, 76, 60, 0.2); color: #e74c3c; }
-        .badge-yellow { background-color: rgba(241, 196, 15, 0.2); color: #f1c40f; }
-    </style>
-    """, unsafe_allow_html=True)
+    if kiosk_renderer is not None:
+        st.caption(f"🖥️ Modo TV (páginas estáticas, sem filtros): [{KIOSK_URL}index.html]({KIOSK_URL}index.html)")
     
     # Verifica se existem dados nas métricas
     if df_filtered_metrics.empty:
         st.info("Nenhuma meta contratual encontrada para os filtros selecionados.")
     else:
-        # Identifica os Tipos de Manutenção únicos na view de consolidação
-        unique_types = sorted(df_filtered_metrics['maintenance_type'].unique())
-        
-        # LOOP 1: Para cada Tipo de Manutenção (Agrupador Principal)
-        for m_type in unique_types:
-            
+        # LOOP 1: Para cada Tipo de Manutenção (Agrupador Principal) -- mesmo modelo do modo TV (kiosk.py)
+        ops_by_type = cycle_filter.split('maintenance_type', **selection)
+        for panel in build_panel_model(df_filtered_metrics, df_filtered, calendar, selected_date, ops_by_type):
+            m_type = panel.name
+
             st.markdown(f"## 🛠️ {m_type}")
+            if panel.released:
+                released, cycle_total, business_days = panel.released
+                st.caption(
+                    f"Liberado previsto (contrato) até {selected_date.strftime('%d/%m')}: "
+                    f"**{released:,.0f}** de {cycle_total:,.0f} no ciclo "
+                    f"· {business_days} dias úteis"
+                )
             st.markdown("---")
-            
-            # Filtra os DFs para este Tipo de Manutenção
-            df_metrics_type = df_filtered_metrics[df_filtered_metrics['maintenance_type'] == m_type]
-            df_op_type = df_filtered[df_filtered['maintenance_type'] == m_type]
-            
-            # LOOP 2: Para cada Área dentro deste Tipo
-            for index, row in df_metrics_type.iterrows():
-                area_nome = row['area']
-                
-                # Subtítulo da Área
-                st.markdown(f"#### 📍 Área: {area_nome}")
 
-                # Variáveis Macro
-                garantia_minima = row['goal']
-                liberado_total = row['released']
-                executado_total = row['done']
-
-                # Meta Operacional do período filtrado
-                meta_operacional_periodo = df_op_type[df_op_type['equipment_area'] == area_nome]['meta_turno'].sum()
-
-                # Cálculos
-                perc_liberado = (liberado_total / garantia_minima * 100) if garantia_minima > 0 else 0
-                perc_produtividade = (executado_total / meta_operacional_periodo * 100) if meta_operacional_periodo > 0 else 0
-
-                pendente_execucao = liberado_total - executado_total
-                perc_pendente_exec = (pendente_execucao / liberado_total * 100) if liberado_total > 0 else 0
-
-                pendente_liberar = garantia_minima - liberado_total
-                perc_pendente_lib = (pendente_liberar / garantia_minima * 100) if garantia_minima > 0 else 0
-
-                # Renderização dos 5 Cards
-                c1, c2, c3, c4, c5 = st.columns(5)
-
-                with c1:
-                    st.markdown(card_html(
-                        "Garantia Mínima", 
-                        f"{garantia_minima:,.0f}", 
-                        "Contrato", 
-                        100.0, 
-                        "#3498db"
-                    ), unsafe_allow_html=True)
-                
-                with c2:
-                    st.markdown(card_html(
-                        "Liberado (Eng.)", 
-                        f"{liberado_total:,.0f}", 
-                        f"{garantia_minima:,.0f}", 
-                        perc_liberado, 
-                        "#9b59b6"
-                    ), unsafe_allow_html=True)
-                    
-                with c3:
-                    st.markdown(card_html(
-                        "Executado (Campo)", 
-                        f"{executado_total:,.0f}", 
-                        f"{meta_operacional_periodo:,.0f}", 
-                        perc_produtividade, 
-                        "#2ecc71"
-                    ), unsafe_allow_html=True)
-                    
-                with c4:
-                    st.markdown(card_html(
-                        "Pendente Execução", 
-                        f"{pendente_execucao:,.0f}", 
-                        f"{liberado_total:,.0f}", 
-                        perc_pendente_exec, 
-                        "#f1c40f",
-                        invert_logic=True 
-                    ), unsafe_allow_html=True)
-                    
-                with c5:
-                    st.markdown(card_html(
-                        "Pendente Liberar", 
-                        f"{pendente_liberar:,.0f}", 
-                        f"{garantia_minima:,.0f}", 
-                        perc_pendente_lib, 
-                        "#e74c3c",
-                        invert_logic=True
-                    ), unsafe_allow_html=True)
-                
-                st.markdown("<br>", unsafe_allow_html=True) # Espaço entre as áreas
+            # Cards de todas as Áreas do tipo em um único bloco
+            st.markdown(cards_grid_html(panel.sections), unsafe_allow_html=True)
 
             # ---------------------------------------------------------
             # GRÁFICOS DO TIPO DE MANUTENÇÃO (Exibidos após os cards das áreas)
@@ -314,50 +203,17 @@ with tab1:
 
             with c_chart1:
                 st.subheader("Produção por Turno")
-                df_shift = df_op_type.groupby('shift_name')[['quantity', 'meta_turno']].sum().reset_index()
-
-                fig_bar = go.Figure()
-                fig_bar.add_trace(go.Bar(
-                    x=df_shift['shift_name'], y=df_shift['quantity'], name='Executado', marker_color='#00CC96'
-                ))
-                fig_bar.add_trace(go.Bar(
-                    x=df_shift['shift_name'], y=df_shift['meta_turno'], name='Meta', marker_color='#FF4B4B'
-                ))
-
-                fig_bar.update_layout(barmode='group', height=400)
                 # Adiciona o m_type na KEY para evitar o erro "Duplicate Widget ID"
-                st.plotly_chart(fig_bar, use_container_width=True, key=f"bar_turno_tab1_{m_type}")
+                st.plotly_chart(grouped_bar_figure(panel.by_shift, 'shift_name'), use_container_width=True, key=f"bar_turno_tab1_{m_type}")
             
             with c_chart2:
                 st.subheader("Produção por Equipamento")
-                df_equip = df_op_type.groupby('equipment_tag')[['quantity', 'meta_turno']].sum().reset_index()
-
-                fig_bar2 = go.Figure()
-                fig_bar2.add_trace(go.Bar(
-                    x=df_equip['equipment_tag'], y=df_equip['quantity'], name='Executado', marker_color='#00CC96'
-                ))
-                fig_bar2.add_trace(go.Bar(
-                    x=df_equip['equipment_tag'], y=df_equip['meta_turno'], name='Meta', marker_color='#FF4B4B'
-                ))
-
-                fig_bar2.update_layout(barmode='group', height=400)
-                st.plotly_chart(fig_bar2, use_container_width=True, key=f"bar_equip_tab1_{m_type}")
+                st.plotly_chart(grouped_bar_figure(panel.by_equipment, 'equipment_tag'), use_container_width=True, key=f"bar_equip_tab1_{m_type}")
             
             st.divider()
 
-            df_daily = df_op_type.groupby('date')[['quantity', 'meta_turno']].sum().reset_index()
-
-            if not df_daily.empty:
-                fig_line = px.line(
-                    df_daily,
-                    x='date',
-                    y=['quantity', 'meta_turno'],
-                    labels={'date': 'Data', 'value': 'Quantidade', 'variable': 'Tipo'},
-                    title=f'Curva de Produção Diária - {m_type}',
-                    color_discrete_map={'quantity': '#00CC96', 'meta_turno': '#FF4B4B'}
-                )
-
-                fig_line.update_layout(height=400)
+            if not panel.daily.empty:
+                fig_line = daily_line_figure(panel.daily, f'Curva de Produção Diária - {m_type}')
                 st.plotly_chart(fig_line, use_container_width=True, key=f"line_tab1_{m_type}")
             
             # Dá um respiro grande antes de começar o próximo TIPO DE MANUTENÇÃO
@@ -371,120 +227,109 @@ with tab2:
     with col_header:
         st.markdown("### 📅 Acompanhamento Diário Detalhado")
     
-    # 1. Gera o DataFrame consolidado do DIA
-    df_daily_shifts = prepare_shift_dataframe(df_filtered, selected_date)
-    # No seu app.py, antes do botão do PDF:
-    df_impacts_all = load_impacts_data()
+    # Histórico de impactos (já carregado junto com o ciclo)
+    df_impacts_all = dashboard_data.impacts
+    impact_index = get_impact_index(df_impacts_all)
+
+    # Dia fechado: frame do dia, impactos, avanço e PDFs materializados pelo job noturno (archive.py)
+    day_archive = archived_day(selected_date)
+    if day_archive is not None:
+        df_archived_shifts = day_archive.shifts
+        visible_tags = set(df_filtered['equipment_tag'].astype(str))
+        df_daily_shifts = df_archived_shifts[df_archived_shifts['Tag'].astype(str).isin(visible_tags)]
+        df_impacts_today = day_archive.impacts
+        progress_ledger = day_archive.progress
+    else:
+        # 1. Gera o DataFrame consolidado do DIA
+        # (as anotações do dia vêm à parte: o ciclo é carregado sem o texto livre)
+        df_day_rows = cycle_filter.view(date=[selected_date], **selection)
+        df_daily_shifts = prepare_shift_dataframe(df_day_rows, selected_date, notes=load_day_notes(selected_date))
+
+        # Horas de impacto que caíram no dia selecionado (eventos recortados por dia/turno)
+        df_impacts_today = with_impact_texts(impact_index.day(selected_date))
+
+        # Avanço acumulado por manutenção, inclusive o realizado em ciclos anteriores
+        progress_ledger = get_ledger(selected_date)
 
-    # Filtra apenas os do dia selecionado para o resumo final
-    df_impacts_today = df_impacts_all[df_impacts_all['date'] == selected_date] if not df_impacts_all.empty else pd.DataFrame()
+    # Turnos sem meta no apontamento: meta contratual do tipo no cartão, na tabela e no PDF
+    df_daily_shifts = fill_missing_goals(df_daily_shifts, calendar)
 
     with col_btn:
         if not df_daily_shifts.empty:
-            # Gera o PDF em memória
-            # Passa para a função
-            pdf_bytes = create_one_page_a3_report(
+            report_format = st.selectbox("Formato", list(REPORT_FORMATS), label_visibility="collapsed")
+            format_slug, build_report = REPORT_FORMATS[report_format]
+            report_args = (
                 df_daily_shifts,    
                 df_filtered,        
                 selected_date.strftime('%d/%m/%Y'),
                 df_impacts_all,    # O histórico (Para os graficos dos equipamentos)
-                df_impacts_today   # O do dia (Para o resumo no final do arquivo)
+                df_impacts_today,  # O do dia (Para o resumo no final do arquivo)
+                progress_ledger.progress_frame(sorted(df_daily_shifts['Tag'].unique()), selected_date,
+                                               maint_starts(df_daily_shifts)),
+                tuple(feriados),
             )
-            
+
+            # Sem filtros, o PDF de um dia fechado já está no arquivo
+            archived_pdf = None
+            if day_archive is not None and len(df_daily_shifts) == len(df_archived_shifts):
+                archived_pdf = day_archive.report_path(format_slug)
+
+            def report_data(build_report=build_report, report_args=report_args, archived_pdf=archived_pdf):
+                # Gerado só no clique. Devolve o arquivo aberto (do cache compartilhado ou do arquivo
+                # noturno): o Streamlit lê direto dele, sem uma cópia em bytes aqui
+                if archived_pdf:
+                    return open(archived_pdf, 'rb')
+                return build_report(*report_args)
+
             st.download_button(
                 label="📄 Baixar PDF",
-                data=pdf_bytes,
-                file_name=f"Relatorio_{selected_date}.pdf",
+                data=report_data,
+                file_name=f"Relatorio_{format_slug}_{selected_date}.pdf",
                 mime="application/pdf"
             )
     
     if df_daily_shifts.empty:
         st.info(f"Sem apontamentos para a data {selected_date.strftime('%d/%m/%Y')}.")
     else:
-        # 2. Identifica os TIPOS únicos presentes no dia
-        unique_types = sorted(df_daily_shifts['Tipo'].unique())
-        
-        # LOOP 1: Para cada Tipo de Manutenção (Seção)
-        for m_type in unique_types:
+        # LOOP 1: Para cada Tipo de Manutenção (Seção), em uma passada pelo frame do dia
+        for m_type, df_type_subset in df_daily_shifts.groupby('Tipo', sort=True, observed=True):
             
             # Cabeçalho da Seção (Ex: DIGESTÃO, PRECIPITAÇÃO)
             st.markdown(f"## 🛠️ {m_type}")
             st.markdown("---") # Linha divisória para separar seções
             
-            # Filtra equipamentos deste tipo
-            df_type_subset = df_daily_shifts[df_daily_shifts['Tipo'] == m_type]
-            unique_tags = sorted(df_type_subset['Tag'].unique())
-            
             # LOOP 2: Para cada Equipamento deste Tipo
-            for tag in unique_tags:
+            for tag, df_tag_day in df_type_subset.groupby('Tag', sort=True, observed=True):
                 
                 # --- PREPARAÇÃO DOS DADOS ---
                 
                 # A. Dados do DIA (para a tabela deste equipamento)
-                df_tag_day = df_type_subset[df_type_subset['Tag'] == tag].copy()
+                df_tag_day = df_tag_day.copy()
                 
-                # B. Dados do CICLO/HISTÓRICO (para os acumulados - KPIs)
-                df_tag_history = df_filtered[
-                    (df_filtered['equipment_tag'] == tag) & 
-                    (df_filtered['date'] <= selected_date)
-                ]
-                
-                # C. Cálculos dos KPIs
-                total_tubos = df_tag_history['total_tubos'].max() if 'total_tubos' in df_tag_history.columns else 0
+                # B/C. Acumulados da manutenção (livro de avanço, atravessa ciclos)
+                maint_start = df_tag_day['maint_start_date'].iloc[0] if 'maint_start_date' in df_tag_day.columns else None
+                total_tubos, acumulado_exec, pendente, perc_concluido = progress_ledger.progress(
+                    tag, selected_date, maint_start
+                )
                 total_mapeado = total_tubos
-                acumulado_exec = df_tag_history['quantity'].sum()
-                pendente = total_mapeado - acumulado_exec
-                perc_concluido = (acumulado_exec / total_mapeado * 100) if total_mapeado > 0 else 0
                 meta_turno_val = df_tag_day['Meta'].max()
 
                 # D. Captura Datas e Status (Tenta pegar da primeira linha)
-                dt_inicio = df_tag_day['maint_start_date'].iloc[0] if 'maint_start_date' in df_tag_day.columns else '-'
-                dt_previsto = df_tag_day['maint_due_date'].iloc[0] if 'maint_due_date' in df_tag_day.columns else '-'
-                dt_real = df_tag_day['maint_real_due_date'].iloc[0] if 'maint_real_due_date' in df_tag_day.columns else '-'
+                dt_inicio = format_date(df_tag_day['maint_start_date'].iloc[0]) if 'maint_start_date' in df_tag_day.columns else '-'
+                dt_previsto = format_date(df_tag_day['maint_due_date'].iloc[0]) if 'maint_due_date' in df_tag_day.columns else '-'
+                dt_real = format_date(df_tag_day['maint_real_due_date'].iloc[0]) if 'maint_real_due_date' in df_tag_day.columns else '-'
                 st_maint = df_tag_day['maint_status'].iloc[0] if 'maint_status' in df_tag_day.columns else '-'
 
                 # --- VISUALIZAÇÃO DO CARTÃO (LARGURA TOTAL) ---
                 
                 with st.container(border=True):
                     
-                    # 1. HEADER INTEGRADO
-                    st.markdown(f"""
-                        <div style="background-color: #2542e6; color: white; padding: 10px; border-radius: 5px; display: flex; justify-content: space-between; align-items: center; margin-bottom: 10px;">
-                            <div style="font-size: 1.2em; font-weight: bold; padding-left: 10px;">
-                                🏭 {tag}
-                            </div>
-                            <div style="padding-right: 10px; font-size: 0.9em; opacity: 0.9;">
-                                META DO TURNO: <strong>{meta_turno_val:.0f}</strong>
-                            </div>
-                        </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # 1.5. BARRA DE STATUS E DATAS (NOVO)
-                    st.markdown(f"""
-                        <div style="background-color: #2b2b36; border-left: 3px solid #f1c40f; padding: 8px 12px; border-radius: 4px; margin-bottom: 15px; font-size: 13px; color: #e0e0e0; display: flex; justify-content: space-between;">
-                            <div><strong>STATUS:</strong> <span style="color: #f1c40f;">{str(st_maint).upper()}</span></div>
-                            <div><strong>INÍCIO:</strong> {dt_inicio}</div>
-                            <div><strong>TÉRMINO PREVISTO:</strong> {dt_previsto}</div>
-                            <div><strong>TÉRMINO REAL:</strong> {dt_real}</div>
-                        </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # 2. KPIs SUPERIORES (4 Colunas)
-                    c_kpi1, c_kpi2, c_kpi3, c_kpi4 = st.columns(4)
-                    
-                    lbl_style = "font-size: 11px; color: #aaa; text-transform: uppercase; letter-spacing: 0.5px;"
-                    val_style = "font-size: 20px; font-weight: bold; color: #fff;"
+                    # 1. HEADER, BARRA DE STATUS E KPIs SUPERIORES (Bloco único)
+                    st.markdown(tag_header_html(
+                        tag, meta_turno_val, st_maint, dt_inicio, dt_previsto, dt_real,
+                        total_tubos, total_mapeado, acumulado_exec, pendente
+                    ), unsafe_allow_html=True)
                     
-                    with c_kpi1:
-                        st.markdown(f"<div><div style='{lbl_style}'>Total de Tubos</div><div style='{val_style}'>{total_tubos:.0f}</div></div>", unsafe_allow_html=True)
-                    with c_kpi2:
-                        st.markdown(f"<div><div style='{lbl_style}'>Mapeado</div><div style='{val_style}'>{total_mapeado:.0f}</div></div>", unsafe_allow_html=True)
-                    with c_kpi3:
-                        st.markdown(f"<div><div style='{lbl_style}'>Acumulado Realizado</div><div style='color: #2ecc71; font-size:20px; font-weight:bold'>{acumulado_exec:.0f}</div></div>", unsafe_allow_html=True)
-                    with c_kpi4:
-                        color_pend = "#e74c3c" if pendente > 0 else "#2ecc71"
-                        st.markdown(f"<div><div style='{lbl_style}'>Pendente</div><div style='color: {color_pend}; font-size:20px; font-weight:bold'>{pendente:.0f}</div></div>", unsafe_allow_html=True)
-
                     # Barra de progresso logo abaixo dos KPIs
                     st.progress(min(perc_concluido/100, 1.0))
                     st.caption(f"Progresso da Manutenção: {perc_concluido:.1f}% concluído")
@@ -509,6 +354,95 @@ with tab2:
             st.markdown("<br>", unsafe_allow_html=True)
 
 with tab3:
-    st.write("Em desenvolvimento")
+    st.markdown("### 📊 Tendências entre Ciclos")
+
+    n_cycles = st.slider("Ciclos no histórico", min_value=3, max_value=24, value=12)
+    df_hist, df_imp_hist = load_history(selected_date, n_cycles)
+
+    # Mesmo filtro de áreas do painel (o filtro de equipamentos vale só para o ciclo vigente)
+    df_hist = df_hist[df_hist['equipment_area'].isin(selected_areas)]
+
+    if df_hist.empty:
+        st.info("Sem histórico de produção para os ciclos selecionados.")
+    else:
+        # Comparativo geral: Executado x Meta e aderência por ciclo e tipo
+        df_by_type = cycle_summary(df_hist, 'maintenance_type')
+        df_by_type['Aderência (%)'] = (
+            df_by_type['quantity'] / df_by_type['meta_turno'].where(df_by_type['meta_turno'] > 0) * 100
+        ).round(1)
+
+        st.plotly_chart(
+            cycle_trend_figure(df_by_type, 'ciclo_label', 'maintenance_type', 'Aderência (%)',
+                               'Aderência à Meta por Tipo', y_title='%'),
+            use_container_width=True, key="trend_aderencia_tab3"
+        )
+
+        for m_type in sorted(df_hist['maintenance_type'].dropna().unique()):
+            st.markdown(f"#### 🛠️ {m_type}")
+            df_type = df_hist[df_hist['maintenance_type'] == m_type]
+
+            c_chart1, c_chart2 = st.columns(2)
+            with c_chart1:
+                df_cycles = cycle_summary(df_type)
+                st.plotly_chart(grouped_bar_figure(df_cycles, 'ciclo_label'),
+                                use_container_width=True, key=f"bar_ciclo_tab3_{m_type}")
+            with c_chart2:
+                df_areas = cycle_summary(df_type, 'equipment_area')
+                st.plotly_chart(
+                    cycle_trend_figure(df_areas, 'ciclo_label', 'equipment_area', 'quantity',
+                                       f'Executado por Área - {m_type}'),
+                    use_container_width=True, key=f"trend_area_tab3_{m_type}"
+                )
+
+        # Tabela comparativa (ciclos nas colunas)
+        st.markdown("#### 📋 Comparativo por Ciclo")
+        df_pivot = df_by_type.pivot_table(
+            index='maintenance_type', columns='ciclo', values='Aderência (%)', observed=True
+        )
+        labels = dict(zip(df_by_type['ciclo'], df_by_type['ciclo_label']))
+        df_pivot.columns = [labels[c] for c in df_pivot.columns]
+        st.dataframe(df_pivot, use_container_width=True)
+
+    # Pareto de impactos em qualquer janela (índice de somas acumuladas: cada
+    # movimento do slider é uma subtração por célula, sem reagrupar os eventos)
+    impact_prefix = get_impact_index(dashboard_data.impacts).prefix_index()
+    if impact_prefix.tags:
+        st.markdown("#### 📉 Pareto de Impactos")
+        hist_start = max(recent_cycles(selected_date, n_cycles)[0][0], impact_prefix.first_day.date())
+        c_win, c_type = st.columns([3, 1])
+        with c_win:
+            if hist_start < selected_date:
+                win_start, win_end = st.slider(
+                    "Janela", min_value=hist_start, max_value=selected_date,
+                    value=(max(hist_start, start_fiscal), selected_date), format="DD/MM/YYYY"
+                )
+            else:
+                win_start, win_end = selected_date, selected_date
+        with c_type:
+            tags_by_type = impact_index.tags_by_type()
+            pareto_type = st.selectbox("Tipo", ["Todos"] + sorted(tags_by_type))
+        pareto_tags = None if pareto_type == "Todos" else tags_by_type[pareto_type]
+
+        c_pareto1, c_pareto2 = st.columns(2)
+        with c_pareto1:
+            df_pareto_cat = impact_prefix.pareto(win_start, win_end, by='Categoria', tags=pareto_tags)
+            if df_pareto_cat.empty:
+                st.info("Sem impactos na janela selecionada.")
+            else:
+                st.plotly_chart(pareto_figure(df_pareto_cat, 'Categoria', 'Pareto por Categoria'),
+                                use_container_width=True, key="pareto_cat_tab3")
+        with c_pareto2:
+            df_pareto_tag = impact_prefix.pareto(win_start, win_end, by='equipment_tag', tags=pareto_tags).head(15)
+            if not df_pareto_tag.empty:
+                st.plotly_chart(pareto_figure(df_pareto_tag, 'equipment_tag', 'Ranking de Equipamentos (Top 15)'),
+                                use_container_width=True, key="pareto_tag_tab3")
+
+    if not df_imp_hist.empty:
+        st.markdown("#### ⏱️ Horas de Impacto por Categoria")
+        df_imp_cycles = cycle_summary(df_imp_hist, 'Categoria', value_cols=('horas',))
+        st.plotly_chart(
+            stacked_bar_figure(df_imp_cycles, 'ciclo_label', 'Categoria', 'horas', 'Impactos por Ciclo'),
+            use_container_width=True, key="bar_impactos_tab3"
+        )
 
 
@@ -0,0 +1,421 @@
+"""
+Arquivo dos dias e ciclos fechados.
+
+Um dia fechado não muda mais: o job noturno materializa, por data e versão
+dos dados, tudo o que a aba de acompanhamento e os relatórios usam. Ao abrir
+uma data passada, o dashboard lê do arquivo (Parquet local) em vez de
+recarregar o ciclo, juntar anotações, recortar impactos e desenhar os PDFs.
+
+    archive/
+      days/2026-09-10/CURRENT              -> versão publicada
+      days/2026-09-10/<versão>/manifest.json, shifts.parquet, impacts.parquet,
+                               progress.parquet, kpis.parquet, Relatorio_<formato>_<data>.pdf
+      cycles/2026-08-16/CURRENT
+      cycles/2026-08-16/<versão>/manifest.json, cycle.parquet, metrics.parquet, impacts.parquet
+      touched/2026-08-20                   -> dia fechado corrigido depois de arquivado
+
+A versão é o hash do conteúdo: rodar o job de novo sobre um dia sem mudança
+não grava nada; uma correção tardia gera outra versão e troca o CURRENT do
+dia e o do seu ciclo (a anterior fica no disco para auditoria). Diretório em
+DASHBOARD_ARCHIVE_DIR.
+
+Correções fora da janela do job: com o change feed ligado (changefeed.py),
+cada evento com data de negócio marca o dia em touched/. Um dia arquivado
+antes de uma marca em si ou em um dia anterior do mesmo ciclo (curvas e
+avanço usam o ciclo até o dia), e um ciclo com qualquer dia marcado depois
+do arquivamento, deixam de ser lidos do arquivo: o dashboard volta à carga
+ao vivo até a próxima execução, que refaz esses dias e ciclos e limpa as marcas.
+
+Uso (cron, depois da virada do dia):
+    30 2 * * *  cd /app && python archive.py --days 3
+    python archive.py --start 2026-08-16 --end 2026-09-15     # reprocessa um intervalo
+"""
+import os
+import json
+import time
+import shutil
+import argparse
+import functools
+from datetime import date, timedelta
+
+import pandas as pd
+import streamlit as st
+
+from utils import get_fiscal_period
+from cache import make_key
+from intervals import PLANT_TZ
+from data import load_data, load_impacts_data, get_kpi_totals, DashboardData
+
+ARCHIVE_DIR = os.environ.get("DASHBOARD_ARCHIVE_DIR", "archive")
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+TOUCHED_DIR = "touched"
+
+# Dias fechados reprocessados a cada execução (pega correções de apontamentos atrasados)
+DEFAULT_DAYS = 3
+
+
+def _day_dir(day):
+    return os.path.join(ARCHIVE_DIR, "days", day.isoformat())
+
+
+def _cycle_dir(cycle_start):
+    return os.path.join(ARCHIVE_DIR, "cycles", cycle_start.isoformat())
+
+
+def report_file_name(layout_name, day):
+    return f"Relatorio_{layout_name}_{day.isoformat()}.pdf"
+
+
+def is_closed(day):
+    return day < date.today()
+
+
+def content_version(*frames):
+    return make_key("archive", frames, {}).split("-", 1)[1][:16]
+
+
+def current_version(entry_dir):
+    try:
+        with open(os.path.join(entry_dir, CURRENT_FILE), encoding="utf-8") as fh:
+            return fh.read().strip() or None
+    except OSError:
+        return None
+
+
+def _publish(entry_dir, version, write):
+    """
+    Grava a versão em um diretório temporário, move para <entry_dir>/<versão> e
+    só então troca o CURRENT: quem lê nunca vê uma versão pela metade.
+    """
+    final = os.path.join(entry_dir, version)
+    if not os.path.isdir(final):
+        tmp = f"{final}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        try:
+            write(tmp)
+            os.replace(tmp, final)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+    pointer = os.path.join(entry_dir, f"{CURRENT_FILE}.{os.getpid()}.tmp")
+    with open(pointer, "w", encoding="utf-8") as fh:
+        fh.write(version)
+    os.replace(pointer, os.path.join(entry_dir, CURRENT_FILE))
+
+
+def _write_manifest(path, **fields):
+    with open(os.path.join(path, MANIFEST_FILE), "w", encoding="utf-8") as fh:
+        json.dump(dict(fields, created_at=time.time()), fh, ensure_ascii=False, indent=1)
+
+
+# ==============================================================================
+# Dias corrigidos depois do arquivamento (marcas do change feed)
+# ==============================================================================
+def _touched_path(day):
+    return os.path.join(ARCHIVE_DIR, TOUCHED_DIR, day.isoformat())
+
+
+def mark_touched(event):
+    """Handler do change feed: marca (mtime = agora) os dias fechados tocados pelo evento."""
+    from changefeed import event_days
+
+    for day in event_days(event):
+        if not is_closed(day):
+            continue
+        path = _touched_path(day)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "a"):
+                pass
+            os.utime(path)
+        except OSError:
+            # Arquivo só leitura neste processo: a janela do job noturno ainda cobre os dias recentes
+            pass
+
+
+def touched_days():
+    """{dia: momento da última marca} dos dias fechados corrigidos ainda não rearquivados."""
+    directory = os.path.join(ARCHIVE_DIR, TOUCHED_DIR)
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return {}
+    touched = {}
+    for name in names:
+        try:
+            touched[date.fromisoformat(name)] = os.path.getmtime(os.path.join(directory, name))
+        except (ValueError, OSError):
+            continue
+    return touched
+
+
+def _touched_since(first, last, created_at):
+    """Algum dia de first a last foi marcado depois de created_at?"""
+    return any(first <= day <= last and mtime > created_at for day, mtime in touched_days().items())
+
+
+def _clear_touched(days, started):
+    """Remove as marcas já rearquivadas (as regravadas durante a execução ficam)."""
+    for day in days:
+        path = _touched_path(day)
+        try:
+            if os.path.getmtime(path) <= started:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+# ==============================================================================
+# Materialização (job noturno)
+# ==============================================================================
+def archive_day(day, formats=None, holidays=()):
+    """Materializa um dia fechado. Retorna a versão publicada (None se não há apontamentos)."""
+    # Importados aqui: o dashboard só lê o arquivo e não precisa da pilha dos PDFs
+    from export_reports import report_inputs
+    from report_model import build_report_model
+    from pdf import LAYOUTS, render_report
+
+    args = report_inputs(day, holidays)
+    if args is None:
+        return None
+    df_day, df_cycle, date_str, df_impacts, df_today, df_progress, _ = args
+    c_start, c_end, _ = get_fiscal_period(day)
+    df_kpis = get_kpi_totals(c_start, c_end)
+
+    # Tudo o que entra nos arquivos da versão: os PDFs também usam o ciclo (curvas),
+    # o histórico de impactos e os formatos pedidos
+    formats = list(formats or LAYOUTS)
+    entry_dir = _day_dir(day)
+    version = content_version(df_day, df_cycle, df_today, df_impacts, df_progress, df_kpis,
+                              sorted(formats), tuple(holidays))
+    if version == current_version(entry_dir):
+        return version
+
+    def write(path):
+        df_day.to_parquet(os.path.join(path, "shifts.parquet"), index=False)
+        df_today.to_parquet(os.path.join(path, "impacts.parquet"), index=False)
+        df_progress.to_parquet(os.path.join(path, "progress.parquet"), index=False)
+        df_kpis.to_parquet(os.path.join(path, "kpis.parquet"), index=False)
+        model = build_report_model(*args)
+        for layout_name in formats:
+            with open(os.path.join(path, report_file_name(layout_name, day)), "wb") as sink:
+                render_report(model, layout_name, sink)
+        _write_manifest(path, date=day.isoformat(), version=version, reports=formats)
+
+    os.makedirs(entry_dir, exist_ok=True)
+    _publish(entry_dir, version, write)
+    return version
+
+
+def archive_cycle(cycle_start):
+    """Materializa um ciclo fechado (apontamentos, metas e impactos até o fim do ciclo)."""
+    c_start, c_end, label = get_fiscal_period(cycle_start)
+    if not is_closed(c_end):
+        return None
+    df_cycle = load_data(c_start, c_end)
+    df_metrics = get_kpi_totals(c_start, c_end)
+    df_impacts = load_impacts_data()
+    if not df_impacts.empty:
+        # Impactos como estavam no fechamento do ciclo (virada do dia no horário da planta)
+        cycle_end_ts = pd.Timestamp(c_end + timedelta(days=1)).tz_localize(PLANT_TZ)
+        df_impacts = df_impacts[df_impacts['start_time'] < cycle_end_ts]
+
+    entry_dir = _cycle_dir(c_start)
+    version = content_version(df_cycle, df_metrics, df_impacts)
+    if version == current_version(entry_dir):
+        return version
+
+    def write(path):
+        df_cycle.to_parquet(os.path.join(path, "cycle.parquet"))
+        df_metrics.to_parquet(os.path.join(path, "metrics.parquet"), index=False)
+        df_impacts.to_parquet(os.path.join(path, "impacts.parquet"))
+        _write_manifest(path, cycle_start=c_start.isoformat(), cycle_end=c_end.isoformat(),
+                        label=label, version=version)
+
+    os.makedirs(entry_dir, exist_ok=True)
+    _publish(entry_dir, version, write)
+    return version
+
+
+def run_archive(start, end, formats=None, holidays=()):
+    """
+    Arquiva os dias fechados de start a end e rearquiva os ciclos fechados que
+    contêm algum desses dias: o dashboard lê um ciclo fechado só do arquivo,
+    então uma correção tardia em um dia precisa chegar também ao ciclo
+    (sem mudança, a versão é a mesma e nada é regravado).
+
+    Os dias marcados pelo change feed (touched_days) entram também, mesmo fora
+    da janela, com os dias seguintes do mesmo ciclo, e as marcas são limpas
+    no fim. Retorna {data: versão}.
+    """
+    started = time.time()
+    end = min(end, date.today() - timedelta(days=1))
+    days = set()
+    day = start
+    while day <= end:
+        days.add(day)
+        day += timedelta(days=1)
+
+    touched = [d for d in touched_days() if d <= end]
+    for first in touched:
+        _, c_end, _ = get_fiscal_period(first)
+        day = first
+        while day <= min(c_end, end):
+            days.add(day)
+            day += timedelta(days=1)
+
+    published = {}
+    cycles = set()
+    for day in sorted(days):
+        published[day] = archive_day(day, formats, holidays)
+        c_start, _, _ = get_fiscal_period(day)
+        cycles.add(c_start)
+    for c_start in sorted(cycles):
+        archive_cycle(c_start)
+    _clear_touched(touched, started)
+    return published
+
+
+# ==============================================================================
+# Leitura (dashboard)
+# ------------------------------------------------------------------------------
+# Os arquivos de uma versão nunca mudam: a leitura é memoizada pelo caminho
+# (que contém a versão) e os frames devolvidos são compartilhados, só leitura.
+# ==============================================================================
+@functools.lru_cache(maxsize=64)
+def _read_frame(path):
+    return pd.read_parquet(path)
+
+
+@functools.lru_cache(maxsize=64)
+def _read_manifest(path):
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+class ArchivedProgress:
+    """Avanço arquivado com a interface usada pela aba 2 (ledger.ProgressLedger)."""
+
+    def __init__(self, frame):
+        self.frame = frame
+        self._by_tag = {}
+        for r in frame.itertuples(index=False):
+            start = getattr(r, 'maint_start_date', None)
+            self._by_tag[str(r.equipment_tag)] = (start, (r.total_tubos, r.acumulado, r.pendentes, r.perc))
+
+    def progress(self, tag, day, maint_start=None):
+        """Avanço arquivado da tag; outra manutenção que não a arquivada no dia não tem avanço aqui."""
+        start, values = self._by_tag.get(str(tag), (None, (0, 0, 0, 0)))
+        if maint_start is not None and pd.notna(maint_start) and pd.notna(start) \
+                and pd.Timestamp(start) != pd.Timestamp(maint_start):
+            return (0, 0, 0, 0)
+        return values
+
+    def progress_frame(self, tags, day, maint_starts=None):
+        # Arquivado com as manutenções do próprio dia (ledger.maint_starts)
+        tags = [str(t) for t in tags]
+        df = self.frame[self.frame['equipment_tag'].astype(str).isin(tags)]
+        return df.reset_index(drop=True)
+
+
+class ArchivedDay:
+    """Um dia publicado no arquivo."""
+
+    def __init__(self, day, path):
+        self.day = day
+        self.path = path
+        self.manifest = _read_manifest(os.path.join(path, MANIFEST_FILE))
+        self.version = self.manifest["version"]
+        self.created_at = self.manifest["created_at"]
+
+    @property
+    def shifts(self):
+        return _read_frame(os.path.join(self.path, "shifts.parquet"))
+
+    @property
+    def impacts(self):
+        return _read_frame(os.path.join(self.path, "impacts.parquet"))
+
+    @property
+    def kpis(self):
+        return _read_frame(os.path.join(self.path, "kpis.parquet"))
+
+    @property
+    def progress(self):
+        return ArchivedProgress(_read_frame(os.path.join(self.path, "progress.parquet")))
+
+    def report_path(self, layout_name):
+        """Caminho do PDF arquivado (sem filtros) ou None se o formato não foi gerado."""
+        path = os.path.join(self.path, report_file_name(layout_name, self.day))
+        return path if os.path.exists(path) else None
+
+
+def archived_day(day):
+    """ArchivedDay da versão publicada de um dia fechado, ou None."""
+    if not is_closed(day):
+        return None
+    entry_dir = _day_dir(day)
+    version = current_version(entry_dir)
+    if version is None or not os.path.isdir(os.path.join(entry_dir, version)):
+        return None
+    archived = ArchivedDay(day, os.path.join(entry_dir, version))
+    c_start, _, _ = get_fiscal_period(day)
+    if _touched_since(c_start, day, archived.created_at):
+        return None  # Corrigido depois do arquivamento: carga ao vivo até o próximo job
+    return archived
+
+
+def archived_bundle(cycle_start):
+    """DashboardData de um ciclo fechado direto do arquivo, ou None."""
+    entry_dir = _cycle_dir(cycle_start)
+    version = current_version(entry_dir)
+    if version is None:
+        return None
+    path = os.path.join(entry_dir, version)
+    try:
+        manifest = _read_manifest(os.path.join(path, MANIFEST_FILE))
+    except OSError:
+        return None
+    _, c_end, _ = get_fiscal_period(cycle_start)
+    if _touched_since(cycle_start, c_end, manifest["created_at"]):
+        return None  # Corrigido depois do arquivamento: carga ao vivo até o próximo job
+    return DashboardData(
+        _read_frame(os.path.join(path, "cycle.parquet")),
+        _read_frame(os.path.join(path, "metrics.parquet")),
+        _read_frame(os.path.join(path, "impacts.parquet")),
+        manifest["created_at"],
+        False,
+    )
+
+
+def main(argv=None):
+    from pdf import LAYOUTS
+
+    parser = argparse.ArgumentParser(description="Arquivo noturno dos dias e ciclos fechados")
+    parser.add_argument("--start", type=date.fromisoformat, help="Primeiro dia (AAAA-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Último dia (padrão: ontem)")
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS,
+                        help="Sem --start: quantos dias fechados até ontem reprocessar")
+    parser.add_argument("--formats", help=f"Formatos de PDF separados por vírgula (padrão: todos: {', '.join(LAYOUTS)})")
+    args = parser.parse_args(argv)
+
+    end = args.end or date.today() - timedelta(days=1)
+    start = args.start or end - timedelta(days=args.days - 1)
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()] if args.formats else None
+    unknown = [f for f in formats or [] if f not in LAYOUTS]
+    if unknown:
+        parser.error(f"formato(s) desconhecido(s): {', '.join(unknown)}")
+
+    try:
+        holidays = tuple(st.secrets.get("ciclo", {}).get("feriados", []))
+    except Exception:
+        holidays = ()
+
+    published = run_archive(start, end, formats, holidays)
+    done = {d: v for d, v in published.items() if v}
+    print(f"{len(done)} dia(s) arquivado(s) em {ARCHIVE_DIR} ({start.isoformat()} a {end.isoformat()})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Benchmark dos relatórios com dados sintéticos (sem Supabase).
+
+Gera um dia com N equipamentos (3 turnos cada) e impactos aleatórios, monta o
+A3 e mostra o tempo e o número de páginas. Com --all, agrega o modelo de
+relatório uma vez e desenha os quatro formatos a partir dele. Com --batch N,
+simula uma exportação de N dias e mostra o pico de memória (RSS) quando cada
+relatório é escrito direto em um arquivo (sink) e quando todos ficam em bytes.
+Com --imports, mede em um processo novo (-X importtime) os imports de nível de
+módulo do app.py, o que toda réplica nova paga antes do primeiro render, e o
+que fica para o primeiro relatório.
+
+Uso:
+    python benchmark.py --tags 300 --repeat 3
+    python benchmark.py --tags 300 --all
+    python benchmark.py --tags 300 --batch 30
+    python benchmark.py --imports
+"""
+import os
+import re
+import sys
+import ast
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from shifts import prepare_shift_dataframe
+from utils import get_fiscal_period
+
+TYPES = ["DESOBSTRUÇÃO", "EXTRAÇÃO", "RETUBAGEM"]
+AREAS = ["DIGESTÃO", "PRECIPITAÇÃO", "CALCINAÇÃO"]
+SHIFTS = ["Turno A", "Turno B", "Turno C"]
+CATEGORIES = ["CHUVA", "FALTA DE LIBERAÇÃO", "FALTA DE MATERIAL", "SEGURANÇA", "OUTROS"]
+
+
+def synthetic_cycle(n_tags, ref_date, seed=0):
+    """Apontamentos do ciclo de ref_date até ref_date (formato do load_data)."""
+    rng = np.random.default_rng(seed)
+    c_start, _, _ = get_fiscal_period(ref_date)
+    days = pd.date_range(c_start, ref_date, freq="D")
+    tags = [f"TC-{i:04d}" for i in range(n_tags)]
+
+    n = len(days) * n_tags * len(SHIFTS)
+    tag_idx = np.tile(np.repeat(np.arange(n_tags), len(SHIFTS)), len(days))
+    df = pd.DataFrame({
+        "date": np.repeat(days, n_tags * len(SHIFTS)),
+        "shift_name": np.tile(SHIFTS, len(days) * n_tags),
+        "equipment_tag": np.array(tags)[tag_idx],
+        "maintenance_type": np.array(TYPES)[tag_idx % len(TYPES)],
+        "equipment_area": np.array(AREAS)[tag_idx % len(AREAS)],
+        "quantity": rng.integers(0, 60, n).astype("int32"),
+        "meta_turno": np.full(n, 26, dtype="int32"),
+        "total_tubos": np.full(n, 2000, dtype="int32"),
+        "maint_start_date": pd.Timestamp(c_start),
+        "maint_due_date": pd.Timestamp(c_start) + pd.Timedelta(days=45),
+        "maint_real_due_date": pd.NaT,
+        "maint_status": "Em andamento",
+        "notes": rng.choice(["", "Falta de ar comprimido", "Aguardando liberação da área"], n),
+    })
+    for col in ["shift_name", "equipment_tag", "maintenance_type", "equipment_area", "maint_status"]:
+        df[col] = df[col].astype("category")
+    return df
+
+
+def synthetic_impacts(n_tags, ref_date, per_tag=2, seed=0):
+    """Impactos do dia (formato do df_impacts_today, com início/fim para o índice de intervalos)."""
+    rng = np.random.default_rng(seed)
+    n = n_tags * per_tag
+    tag_idx = rng.integers(0, n_tags, n)
+    start = pd.Timestamp(ref_date) + pd.to_timedelta(rng.integers(0, 16 * 60, n), unit="min")
+    horas = rng.uniform(0.5, 8, n).round(2)
+    return pd.DataFrame({
+        "equipment_tag": [f"TC-{i:04d}" for i in tag_idx],
+        "Tipo": np.array(TYPES)[tag_idx % len(TYPES)],
+        "Categoria": rng.choice(CATEGORIES, n),
+        "horas": horas,
+        "description": "",
+        "date": ref_date,
+        "start_time": start,
+        "end_time": start + pd.to_timedelta(horas, unit="h"),
+    })
+
+
+def timed(func, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def synthetic_day(n_tags):
+    ref_date = date.today() - timedelta(days=1)
+    df_cycle = synthetic_cycle(n_tags, ref_date)
+    df_day = prepare_shift_dataframe(df_cycle, ref_date)
+    df_imp = synthetic_impacts(n_tags, ref_date)
+    return ref_date, df_cycle, df_day, df_imp
+
+
+def page_count(pdf_bytes):
+    return len(re.findall(rb"/Type\s*/Page\b", pdf_bytes))
+
+
+def bench_a3(n_tags, repeat):
+    from pdf import create_one_page_a3_report
+
+    ref_date, df_cycle, df_day, df_imp = synthetic_day(n_tags)
+    seconds, pdf_bytes = timed(
+        lambda: create_one_page_a3_report(df_day, df_cycle, ref_date.strftime("%d/%m/%Y"), df_imp, df_imp),
+        repeat,
+    )
+    print(f"A3: {n_tags} tags | {seconds:.2f}s | {page_count(pdf_bytes)} páginas | {len(pdf_bytes) / 1024:.0f} KB")
+
+
+def bench_all(n_tags, repeat):
+    """Uma agregação do modelo e o desenho de cada layout a partir dela."""
+    from report_model import build_report_model
+    from pdf import LAYOUTS, render_report
+
+    ref_date, df_cycle, df_day, df_imp = synthetic_day(n_tags)
+    seconds, model = timed(
+        lambda: build_report_model(df_day, df_cycle, ref_date.strftime("%d/%m/%Y"), df_imp, df_imp),
+        repeat,
+    )
+    print(f"Modelo: {n_tags} tags | {seconds:.2f}s")
+    for name in LAYOUTS:
+        seconds, pdf_bytes = timed(lambda: render_report(model, name), repeat)
+        print(f"{name}: {seconds:.2f}s | {page_count(pdf_bytes)} páginas | {len(pdf_bytes) / 1024:.0f} KB")
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench_batch(n_tags, days, in_memory=False):
+    """Exportação de `days` relatórios A3: escritos um a um em arquivos ou acumulados em bytes."""
+    from report_model import build_report_model
+    from pdf import render_report
+
+    ref_date, df_cycle, df_day, df_imp = synthetic_day(n_tags)
+    model = build_report_model(df_day, df_cycle, ref_date.strftime("%d/%m/%Y"), df_imp, df_imp)
+    before = peak_rss_mb()
+    t0 = time.perf_counter()
+    total, kept = 0, []
+    with tempfile.TemporaryDirectory() as out_dir:
+        for i in range(days):
+            if in_memory:
+                kept.append(render_report(model, "a3"))
+                total += len(kept[-1])
+            else:
+                with open(f"{out_dir}/a3_{i}.pdf", "wb") as sink:
+                    render_report(model, "a3", sink)
+                    total += sink.tell()
+    mode = "bytes" if in_memory else "arquivo"
+    print(f"Lote ({mode}): {days} x A3 {n_tags} tags | {time.perf_counter() - t0:.2f}s | "
+          f"{total / 1024 / 1024:.1f} MB gerados | pico RSS {before:.0f} -> {peak_rss_mb():.0f} MB")
+
+
+# Pacotes que não deveriam carregar antes do primeiro render
+HEAVY_PACKAGES = ["matplotlib", "fpdf", "PIL", "supabase", "openpyxl", "plotly.express"]
+IMPORT_MARKER = "-- depois do app --"
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)")
+
+
+def app_imports(entry="app.py"):
+    """Imports de nível de módulo do script (executados antes do primeiro render)."""
+    with open(entry, encoding="utf-8") as fh:
+        tree = ast.parse(fh.read())
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def import_profile(statements, after=()):
+    """
+    Executa os imports em um processo novo. Retorna (segundos, {pacote raiz: ms},
+    módulos carregados); com `after`, só conta o que esses imports extras carregam.
+    """
+    if after:
+        statements = list(statements) + [f"import sys; sys.stderr.write({IMPORT_MARKER!r} + '\\n')"] + list(after)
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "\n".join(statements)],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    seconds = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    lines = proc.stderr.splitlines()
+    if after:
+        lines = lines[lines.index(IMPORT_MARKER) + 1:]
+    by_package, loaded = {}, set()
+    for line in lines:
+        m = IMPORTTIME_LINE.match(line)
+        if not m:
+            continue
+        name = m.group(4)
+        loaded.add(name)
+        if len(m.group(3)) == 1:
+            # Nível 0: o cumulativo já inclui tudo o que o módulo puxou
+            root = name.split(".")[0]
+            by_package[root] = by_package.get(root, 0) + int(m.group(2)) / 1000
+    return seconds, by_package, loaded
+
+
+def bench_imports(repeat):
+    """Custo de import do app.py (melhor de `repeat` processos novos) e do primeiro relatório."""
+    statements = app_imports()
+    runs = [import_profile(statements) for _ in range(repeat)]
+    seconds, by_package, loaded = min(runs, key=lambda r: r[0])
+    print(f"Imports do app.py: {seconds:.2f}s (processo novo, melhor de {repeat}) | "
+          f"{sum(by_package.values()):.0f} ms em imports")
+    for name, ms in sorted(by_package.items(), key=lambda kv: -kv[1])[:12]:
+        print(f"  {name:<28} {ms:8.0f} ms")
+    heavy = [p for p in HEAVY_PACKAGES if p in loaded]
+    print(f"Pacotes pesados antes do primeiro render: {', '.join(heavy) or 'nenhum'}")
+
+    # O que o primeiro relatório ainda carrega depois do app
+    _, on_demand, _ = import_profile(statements, after=["import pdf"])
+    print(f"Primeiro relatório (import pdf): +{sum(on_demand.values()):.0f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dos relatórios com dados sintéticos")
+    parser.add_argument("--tags", type=int, default=300, help="Número de equipamentos no dia")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições (vale o melhor tempo)")
+    parser.add_argument("--all", action="store_true", help="Todos os formatos a partir de um único modelo")
+    parser.add_argument("--batch", type=int, help="Exportação de N relatórios A3 (pico de memória)")
+    parser.add_argument("--in-memory", action="store_true", help="Com --batch: acumula os PDFs em bytes")
+    parser.add_argument("--imports", action="store_true", help="Tempo de import do app.py (partida a frio)")
+    args = parser.parse_args()
+
+    if args.imports:
+        bench_imports(args.repeat)
+    elif args.batch:
+        bench_batch(args.tags, args.batch, args.in_memory)
+    elif args.all:
+        bench_all(args.tags, args.repeat)
+    else:
+        bench_a3(args.tags, args.repeat)
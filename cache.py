@@ -0,0 +1,646 @@
+import os
+import io
+import time
+import json
+import pickle
+import hashlib
+import functools
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos
+    fcntl = None
+
+# ==============================================================================
+# Cache compartilhado entre réplicas
+# ------------------------------------------------------------------------------
+# O st.cache_data vive na memória de cada processo do Streamlit. Este módulo
+# adiciona uma camada compartilhada (ex.: volume em disco comum às réplicas)
+# para os loaders e para os relatórios em PDF (servidos direto do arquivo).
+#
+# Configuração por variáveis de ambiente:
+#   DASHBOARD_CACHE_BACKEND  = disk (padrão) | memory (substituto local, sem compartilhamento)
+#   DASHBOARD_CACHE_DIR      = diretório compartilhado (padrão: .cache/dashboard)
+#   DASHBOARD_CACHE_MAX_MB   = limite de tamanho do diretório (padrão: 512)
+#   DASHBOARD_LOCAL_CACHE_MB = orçamento de memória do cache local do processo (padrão: 256)
+# ==============================================================================
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "dashboard")
+DEFAULT_MAX_MB = 512
+DEFAULT_LOCAL_MB = 256
+
+
+def fingerprint(obj):
+    """Gera uma representação estável e barata de um argumento para compor a chave do cache."""
+    if isinstance(obj, pd.DataFrame):
+        try:
+            h = pd.util.hash_pandas_object(obj, index=True).to_numpy()
+            digest = hashlib.sha1(h.tobytes()).hexdigest()
+        except TypeError:  # Colunas com dict/list (ex.: JSON aninhado do Supabase)
+            digest = hashlib.sha1(pickle.dumps(obj)).hexdigest()
+        return f"df:{obj.shape}:{list(obj.columns)}:{digest}"
+    if isinstance(obj, (date, datetime)):
+        return obj.isoformat()
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        items = sorted(obj, key=str) if isinstance(obj, (set, frozenset)) else obj
+        return "[" + ",".join(fingerprint(o) for o in items) + "]"
+    return repr(obj)
+
+
+def resolve_ttl(ttl):
+    """O TTL pode ser um número ou uma função (ex.: maior quando o change feed está ativo)."""
+    return ttl() if callable(ttl) else ttl
+
+
+def make_key(namespace, args, kwargs):
+    raw = "|".join([fingerprint(a) for a in args] + [f"{k}={fingerprint(v)}" for k, v in sorted(kwargs.items())])
+    return f"{namespace}-{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+
+# ------------------------------------------------------------------------------
+# Serialização: Parquet (Arrow) para DataFrames, bytes crus para PDFs, pickle p/ o resto
+# ------------------------------------------------------------------------------
+def serialize(value):
+    if isinstance(value, pd.DataFrame):
+        try:
+            buf = io.BytesIO()
+            value.to_parquet(buf, index=True)
+            return "parquet", buf.getvalue()
+        except Exception:
+            # pyarrow ausente ou colunas não suportadas pelo Arrow
+            pass
+    if isinstance(value, (bytes, bytearray)):
+        return "bytes", bytes(value)
+    return "pickle", pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def deserialize(fmt, payload):
+    if fmt == "parquet":
+        return pd.read_parquet(io.BytesIO(payload))
+    if fmt == "bytes":
+        return payload
+    return pickle.loads(payload)
+
+
+# ------------------------------------------------------------------------------
+# Backends
+# ------------------------------------------------------------------------------
+class MemoryBackend:
+    """Substituto local (um processo só). Útil em desenvolvimento e testes."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+        # Um lock por chave enquanto alguém o usa (some sozinho depois)
+        self._key_locks = weakref.WeakValueDictionary()
+
+    def get(self, key, allow_expired=False):
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if not allow_expired and expires_at is not None and expires_at < time.time():
+            return None
+        return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+
+    def open(self, key, allow_expired=False):
+        value = self.get(key, allow_expired)
+        return io.BytesIO(value) if isinstance(value, (bytes, bytearray)) else None
+
+    def write_stream(self, key, writer, ttl=None):
+        buf = io.BytesIO()
+        writer(buf)
+        self.set(key, buf.getvalue(), ttl)
+        buf.seek(0)
+        return buf
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def lock(self, key):
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+        return lock
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class _FileLock:
+    """Lock exclusivo entre processos (flock) em um arquivo .lock."""
+
+    def __init__(self, path):
+        self.path = path
+        self._fh = None
+
+    def __enter__(self):
+        self._fh = open(self.path, "a+")
+        if fcntl is not None:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+        self._fh.close()
+
+
+class DiskBackend:
+    """
+    Cache em disco compartilhado entre réplicas (volume comum).
+    Cada entrada é um arquivo de dados + um .meta (formato e expiração).
+    Escritas são atômicas (os.replace) e o tamanho total é limitado a max_bytes,
+    removendo primeiro as entradas acessadas há mais tempo.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key, ext):
+        return os.path.join(self.directory, f"{key}.{ext}")
+
+    def get(self, key, allow_expired=False):
+        meta_path = self._path(key, "meta")
+        try:
+            with open(meta_path, "r") as fh:
+                meta = json.load(fh)
+            if not allow_expired and meta["expires_at"] is not None and meta["expires_at"] < time.time():
+                return None
+            with open(self._path(key, "data"), "rb") as fh:
+                payload = fh.read()
+            os.utime(meta_path)  # Marca o acesso para o LRU
+            return deserialize(meta["fmt"], payload)
+        except Exception:
+            # Entrada ausente, corrompida ou sendo regravada: trata como miss
+            return None
+
+    def set(self, key, value, ttl=None):
+        fmt, payload = serialize(value)
+        self._write_entry(key, fmt, lambda fh: fh.write(payload), ttl)
+
+    def open(self, key, allow_expired=False):
+        """Arquivo aberto (binário) de uma entrada de bytes, sem carregá-la na memória."""
+        meta_path = self._path(key, "meta")
+        try:
+            with open(meta_path, "r") as fh:
+                meta = json.load(fh)
+            if meta["fmt"] != "bytes":
+                return None
+            if not allow_expired and meta["expires_at"] is not None and meta["expires_at"] < time.time():
+                return None
+            data = open(self._path(key, "data"), "rb")
+            os.utime(meta_path)
+            return data
+        except Exception:
+            return None
+
+    def write_stream(self, key, writer, ttl=None):
+        """
+        Grava uma entrada de bytes chamando writer(arquivo) direto no arquivo de
+        dados. Devolve o arquivo gravado aberto para leitura: o handle continua
+        válido mesmo que o limite de tamanho remova a entrada logo em seguida.
+        """
+        return self._write_entry(key, "bytes", writer, ttl, reopen=True)
+
+    def _write_entry(self, key, fmt, writer, ttl, reopen=False):
+        final = self._path(key, "data")
+        tmp = f"{final}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as fh:
+                writer(fh)
+        except BaseException:
+            os.remove(tmp)
+            raise
+        meta = {"fmt": fmt, "expires_at": time.time() + ttl if ttl else None, "size": os.path.getsize(tmp)}
+        os.replace(tmp, final)
+
+        final = self._path(key, "meta")
+        tmp = f"{final}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as fh:
+            fh.write(json.dumps(meta))
+        os.replace(tmp, final)
+        # Aberto antes do limite de tamanho: uma entrada maior que o limite sai do disco, não do handle
+        written = open(self._path(key, "data"), "rb") if reopen else None
+        self._enforce_size()
+        return written
+
+    def delete(self, key):
+        for ext in ("meta", "data"):
+            try:
+                os.remove(self._path(key, ext))
+            except OSError:
+                pass
+
+    def lock(self, key):
+        return _FileLock(self._path(key, "lock"))
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def _enforce_size(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".meta"):
+                continue
+            meta_path = os.path.join(self.directory, name)
+            data_path = meta_path[:-5] + ".data"
+            try:
+                size = os.path.getsize(data_path)
+                entries.append((os.path.getmtime(meta_path), size, name[:-5]))
+                total += size
+            except OSError:
+                continue
+
+        # LRU: remove as entradas menos acessadas até caber no limite
+        for _, size, key in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self.delete(key)
+            total -= size
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            kind = os.environ.get("DASHBOARD_CACHE_BACKEND", "disk").lower()
+            if kind == "memory":
+                _backend = MemoryBackend()
+            else:
+                _backend = DiskBackend(
+                    os.environ.get("DASHBOARD_CACHE_DIR", DEFAULT_CACHE_DIR),
+                    int(os.environ.get("DASHBOARD_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024,
+                )
+        return _backend
+
+
+def set_backend(backend):
+    """Troca o backend (ex.: MemoryBackend em testes)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def shared_cache(namespace, ttl=60):
+    """
+    Decorator: consulta o backend compartilhado antes de executar a função.
+    Apenas uma réplica calcula a entrada por vez (lock por chave); as demais
+    esperam e leem o resultado já gravado. Se a função falhar (ex.: Supabase
+    fora do ar), devolve o último snapshot gravado, mesmo vencido.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            backend = get_backend()
+            key = make_key(namespace, args, kwargs)
+
+            value = backend.get(key)
+            if value is not None:
+                return value
+
+            with backend.lock(key):
+                # Outra réplica pode ter preenchido enquanto esperávamos o lock
+                value = backend.get(key)
+                if value is not None:
+                    return value
+                try:
+                    value = func(*args, **kwargs)
+                except Exception:
+                    stale = backend.get(key, allow_expired=True)
+                    if stale is None:
+                        raise
+                    return stale
+                backend.set(key, value, resolve_ttl(ttl))
+            return value
+
+        wrapper.cache_namespace = namespace
+        return wrapper
+    return decorator
+
+
+def shared_file_cache(namespace, ttl=60):
+    """
+    Como shared_cache, para funções que escrevem o resultado em um arquivo
+    (argumento sink) em vez de devolver bytes, ex.: os relatórios em PDF.
+    A função escreve direto na entrada do backend e o wrapper devolve um
+    arquivo binário aberto para leitura (quem chama fecha). Evita a cópia
+    extra em bytes e o pickle da entrada, mas não limita a memória: quem
+    escreve (ex.: o FPDF) pode montar o documento inteiro antes de gravar, e
+    quem lê o handle de uma vez volta a tê-lo inteiro em memória.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            backend = get_backend()
+            key = make_key(namespace, args, kwargs)
+
+            fh = backend.open(key)
+            if fh is not None:
+                return fh
+
+            with backend.lock(key):
+                fh = backend.open(key)
+                if fh is not None:
+                    return fh
+                try:
+                    return backend.write_stream(key, lambda sink: func(*args, sink=sink, **kwargs), resolve_ttl(ttl))
+                except Exception:
+                    stale = backend.open(key, allow_expired=True)
+                    if stale is None:
+                        raise
+                    return stale
+
+        wrapper.cache_namespace = namespace
+        return wrapper
+    return decorator
+
+
+# ------------------------------------------------------------------------------
+# Cache local do processo com orçamento de memória
+# ------------------------------------------------------------------------------
+def deep_sizeof(value):
+    """Tamanho aproximado em bytes de um valor em cache (inclui o conteúdo das strings)."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True, index=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True, index=True))
+    if isinstance(value, (bytes, bytearray, str)):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(deep_sizeof(k) + deep_sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(deep_sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class LocalCache:
+    """
+    Cache em memória do processo, compartilhado por todas as sessões, com
+    orçamento global em bytes e descarte LRU. Os valores são devolvidos sem
+    cópia (diferente do st.cache_data, que faz pickle a cada acesso), então
+    quem consome não deve alterá-los in-place.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_LOCAL_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, expires_at, size, fetched_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, size, _ = entry
+            if expires_at is not None and expires_at < time.time():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        size = deep_sizeof(value)
+        if size > self.max_bytes:
+            return  # Maior que o orçamento inteiro: não guarda
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at, size, time.time())
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def peek(self, key):
+        """
+        Retorna (valor, fetched_at, expirado) mesmo se a entrada já venceu,
+        sem removê-la. Usado pelo modo stale-while-revalidate.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, _, fetched_at = entry
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value, fetched_at, expires_at is not None and expires_at < time.time()
+
+    def fetched_at(self, key):
+        """Momento (epoch) em que a entrada foi gravada, ou None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[3] if entry is not None else None
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        _, _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self):
+        """Uso atual: total, orçamento e bytes/entradas por namespace."""
+        with self._lock:
+            by_namespace = {}
+            for key, (_, _, size, _) in self._entries.items():
+                ns = key.rsplit("-", 1)[0]
+                n, b = by_namespace.get(ns, (0, 0))
+                by_namespace[ns] = (n + 1, b + size)
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "namespaces": by_namespace,
+            }
+
+
+local_cache = LocalCache(int(os.environ.get("DASHBOARD_LOCAL_CACHE_MB", DEFAULT_LOCAL_MB)) * 1024 * 1024)
+
+
+# Atualizações em segundo plano do modo stale-while-revalidate
+_refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def _refresh_in_background(key, loader, ttl, args, kwargs):
+    """Agenda uma única atualização por chave; o valor novo substitui o antigo de forma atômica."""
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def job():
+        try:
+            local_cache.set(key, loader(*args, **kwargs), resolve_ttl(ttl))
+        except Exception:
+            # Mantém o último snapshot bom; a próxima leitura tenta de novo
+            pass
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+
+    _refresh_executor.submit(job)
+
+
+# ------------------------------------------------------------------------------
+# Partições e invalidação dirigida (change feed)
+# ------------------------------------------------------------------------------
+# Cada entrada pode declarar as partições que cobre, ex.: ("cycle", "2026-08-16"),
+# ("date", "2026-08-20"), ("tag", "TC-001"), ("dataset", "impacts"). Quando o
+# change feed avisa que linhas mudaram, só as entradas dessas partições são
+# descartadas do cache compartilhado e recarregadas em segundo plano.
+_partition_index = {}   # partição -> {chaves}
+_key_loaders = {}       # chave -> (loader, ttl, args, kwargs) para recarregar
+_partition_lock = threading.Lock()
+
+
+def _register_partitions(key, partitions, loader, ttl, args, kwargs):
+    with _partition_lock:
+        _key_loaders[key] = (loader, ttl, args, kwargs)
+        for part in partitions:
+            _partition_index.setdefault(part, set()).add(key)
+
+
+def invalidate(partitions):
+    """
+    Invalida as entradas que cobrem qualquer uma das partições informadas.
+    As que ainda estão em memória são recarregadas em segundo plano (quem está
+    olhando o painel continua vendo o snapshot anterior até o novo chegar).
+    Retorna o número de entradas afetadas.
+    """
+    with _partition_lock:
+        keys = set()
+        for part in partitions:
+            keys |= _partition_index.pop(part, set())
+        loaders = {k: _key_loaders.pop(k, None) for k in keys}
+        for part_keys in _partition_index.values():
+            part_keys -= keys
+
+    backend = get_backend()
+    for key, loader in loaders.items():
+        backend.delete(key)
+        if loader is not None and local_cache.fetched_at(key) is not None:
+            func, ttl, args, kwargs = loader
+            _refresh_in_background(key, func, ttl, args, kwargs)
+        else:
+            local_cache.delete(key)
+    return len(keys)
+
+
+def cached(namespace, ttl=60, stale_while_revalidate=False, partitions=None):
+    """
+    Decorator de duas camadas: cache local com orçamento de memória e, em caso
+    de miss, o cache compartilhado entre réplicas (shared_cache).
+
+    Com stale_while_revalidate=True, uma entrada vencida é devolvida na hora e
+    recarregada em segundo plano; só o primeiro carregamento bloqueia.
+    partitions(*args, **kwargs) devolve as partições cobertas pela entrada
+    (ver invalidate). ttl pode ser uma função.
+    """
+    def decorator(func):
+        shared = shared_cache(namespace, ttl)(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(namespace, args, kwargs)
+            if partitions is not None:
+                _register_partitions(key, partitions(*args, **kwargs), shared, ttl, args, kwargs)
+
+            if stale_while_revalidate:
+                entry = local_cache.peek(key)
+                if entry is not None:
+                    value, _, expired = entry
+                    if expired:
+                        _refresh_in_background(key, shared, ttl, args, kwargs)
+                    return value
+            else:
+                value = local_cache.get(key)
+                if value is not None:
+                    return value
+
+            try:
+                value = shared(*args, **kwargs)
+            except Exception:
+                # Backend indisponível e sem snapshot compartilhado: usa o último local
+                entry = local_cache.peek(key)
+                if entry is None:
+                    raise
+                return entry[0]
+            local_cache.set(key, value, resolve_ttl(ttl))
+            return value
+
+        def snapshot_info(*args, **kwargs):
+            """(fetched_at, atualizando) do snapshot em memória, ou None se não houver."""
+            key = make_key(namespace, args, kwargs)
+            fetched_at = local_cache.fetched_at(key)
+            if fetched_at is None:
+                return None
+            with _refreshing_lock:
+                refreshing = key in _refreshing
+            return fetched_at, refreshing
+
+        def track_partitions(*args, **kwargs):
+            """
+            Registra as partições da entrada sem carregá-la. Para as dependências
+            de outra entrada em cache: lida do cache compartilhado, ela não chama
+            as dependências, e uma correção nelas não chegaria ao disco.
+            """
+            if partitions is not None:
+                key = make_key(namespace, args, kwargs)
+                _register_partitions(key, partitions(*args, **kwargs), shared, ttl, args, kwargs)
+
+        wrapper.cache_namespace = namespace
+        wrapper.snapshot_info = snapshot_info
+        wrapper.track_partitions = track_partitions
+        return wrapper
+    return decorator
@@ -0,0 +1,345 @@
+import json
+import asyncio
+import threading
+
+import pandas as pd
+
+from utils import get_fiscal_period
+import cache
+
+# ==============================================================================
+# Change feed: invalidação do cache dirigida por eventos
+# ------------------------------------------------------------------------------
+# Em vez de depender só do TTL, um listener recebe as mudanças de linhas das
+# tabelas (Supabase Realtime ou Postgres LISTEN/NOTIFY) e invalida apenas as
+# partições afetadas (ciclo, data, tag) via cache.invalidate().
+#
+# Evento normalizado (dict):
+#   {"table": "apontamentos", "type": "INSERT|UPDATE|DELETE",
+#    "record": {...}, "old_record": {...}}
+# ==============================================================================
+
+# Conjunto de dados do dashboard afetado por cada tabela. Tabelas que não estão
+# aqui são tratadas como dados de produção (ciclo/data/tag). Ajuste ao schema.
+# Tabelas de cadastro (manutenções, equipamentos) entram em apontamentos de
+# qualquer data: uma mudança nelas invalida a produção inteira.
+PRODUCTION_TABLE = "apontamentos"
+TABLE_DATASETS = {
+    "maintenance_impacts": ["impacts"],
+    "goals": ["metrics"],
+    "maintenances": ["production", "metrics", "impacts"],
+    "equipments": ["production", "metrics", "impacts"],
+}
+DEFAULT_DATASETS = ["production", "metrics"]
+
+# Só datas de negócio: created_at de um cadastro não diz qual ciclo ele afeta
+DATE_FIELDS = ("date", "start_time")
+TAG_FIELDS = ("equipment_tag", "tag")
+
+
+def _record_date(record):
+    for field in DATE_FIELDS:
+        value = record.get(field)
+        if value:
+            ts = pd.to_datetime(value, errors="coerce")
+            if pd.notna(ts):
+                return ts.date()
+    return None
+
+
+def event_days(event):
+    """Datas de negócio dos registros (novo e antigo) de um evento, de qualquer tabela."""
+    days = set()
+    for record in (event.get("record"), event.get("old_record")):
+        if record:
+            day = _record_date(record)
+            if day is not None:
+                days.add(day)
+    return days
+
+
+def partitions_for_event(event):
+    """Partições do cache tocadas por um evento (considera o registro novo e o antigo)."""
+    table = event.get("table", "")
+    datasets = TABLE_DATASETS.get(table, DEFAULT_DATASETS)
+    parts = set()
+
+    records = [r for r in (event.get("record"), event.get("old_record")) if r]
+    for dataset in datasets:
+        if dataset != "production" or table in TABLE_DATASETS:
+            # Metas consolidadas e impactos são um snapshot único (sem partição por data);
+            # cadastros afetam a produção de todos os ciclos
+            parts.add(("dataset", dataset))
+            continue
+
+        dated = False
+        for record in records:
+            day = _record_date(record)
+            if day is not None:
+                dated = True
+                cycle_start, _, _ = get_fiscal_period(day)
+                parts.add(("cycle", cycle_start.isoformat()))
+                parts.add(("date", day.isoformat()))
+            for field in TAG_FIELDS:
+                if record.get(field):
+                    parts.add(("tag", str(record[field])))
+        if not dated:
+            # Sem data no registro (ex.: DELETE só com a PK): invalida todo o conjunto
+            parts.add(("dataset", dataset))
+    return parts
+
+
+def handle_change(event):
+    """Callback padrão: invalida as partições do evento. Retorna o nº de entradas afetadas."""
+    return cache.invalidate(partitions_for_event(event))
+
+
+def normalize_realtime_payload(payload):
+    """Converte o payload do Supabase Realtime (postgres_changes) para o evento normalizado."""
+    data = payload.get("data", payload) if isinstance(payload, dict) else {}
+    return {
+        "table": data.get("table", ""),
+        "type": str(data.get("type", data.get("eventType", ""))).upper(),
+        "record": data.get("record") or data.get("new") or {},
+        "old_record": data.get("old_record") or data.get("old") or {},
+    }
+
+
+# ------------------------------------------------------------------------------
+# Listeners
+# ------------------------------------------------------------------------------
+# Reconexão com backoff exponencial (s), zerado a cada conexão bem-sucedida
+RECONNECT_MIN = 1.0
+RECONNECT_MAX = 60.0
+
+# Tudo o que o feed mantém atualizado
+FEED_PARTITIONS = {("dataset", "production"), ("dataset", "metrics"), ("dataset", "impacts")}
+
+
+def set_connected(listener, connected):
+    """
+    Atualiza listener.connected. Ao cair, os snapshots carregados com o TTL
+    longo (data.data_ttl) deixariam de receber eventos; ao voltar, os eventos
+    do intervalo se perderam. Nos dois casos o que o feed cobre é invalidado:
+    recarregado agora, fica com o TTL correspondente ao novo estado.
+    A primeira conexão não invalida nada (os snapshots já tinham o TTL curto).
+    """
+    was_connected = listener.connected
+    listener.connected = connected
+    if connected == was_connected:
+        return
+    if connected and not getattr(listener, "_ever_connected", False):
+        listener._ever_connected = True
+        return
+    cache.invalidate(FEED_PARTITIONS)
+
+
+def next_backoff(delay):
+    return min(RECONNECT_MAX, max(RECONNECT_MIN, delay * 2))
+
+
+class LocalEmitter:
+    """Emissor em processo: substituto dos listeners reais em testes e desenvolvimento."""
+
+    def __init__(self):
+        self.handlers = []
+        self.connected = True
+
+    def subscribe(self, handler):
+        self.handlers.append(handler)
+
+    def emit(self, event):
+        for handler in self.handlers:
+            handler(event)
+
+    def start(self):
+        return self
+
+    def stop(self):
+        self.connected = False
+
+
+class PostgresListener:
+    """
+    LISTEN/NOTIFY direto no Postgres (requer psycopg2). Espera payloads JSON no
+    formato do evento normalizado, por exemplo com o trigger:
+
+        CREATE OR REPLACE FUNCTION notify_dashboard() RETURNS trigger AS $$
+        BEGIN
+          PERFORM pg_notify('dashboard_changes', json_build_object(
+            'table', TG_TABLE_NAME, 'type', TG_OP,
+            'record', CASE WHEN TG_OP <> 'DELETE' THEN row_to_json(NEW) END,
+            'old_record', CASE WHEN TG_OP <> 'INSERT' THEN row_to_json(OLD) END)::text);
+          RETURN NULL;
+        END $$ LANGUAGE plpgsql;
+    """
+
+    def __init__(self, dsn, channel="dashboard_changes", poll_timeout=5.0):
+        self.dsn = dsn
+        self.channel = channel
+        self.poll_timeout = poll_timeout
+        self.handlers = []
+        self.connected = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, handler):
+        self.handlers.append(handler)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="changefeed-postgres", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        import select
+        import psycopg2
+
+        delay = 0
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(self.dsn)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {self.channel};")
+                set_connected(self, True)
+                delay = 0
+
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], self.poll_timeout) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        self._dispatch(notify.payload)
+            except Exception:
+                pass
+            finally:
+                # Conexão caiu (ou parada): fecha antes de reconectar e o TTL curto volta a valer
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+                set_connected(self, False)
+            delay = next_backoff(delay)
+            self._stop.wait(delay)
+
+    def _dispatch(self, payload):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            return
+        for handler in self.handlers:
+            handler(event)
+
+
+class SupabaseRealtimeListener:
+    """Assina postgres_changes do Supabase Realtime para as tabelas informadas (thread própria com asyncio)."""
+
+    def __init__(self, url, key, tables, schema="public"):
+        self.url = url
+        self.key = key
+        self.tables = tables
+        self.schema = schema
+        self.handlers = []
+        self.connected = False
+        self._loop = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lost = None   # asyncio.Event da assinatura atual
+        self._subscribed = False
+
+    def subscribe(self, handler):
+        self.handlers.append(handler)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="changefeed-realtime", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        lost = self._lost
+        if self._loop is not None and lost is not None:
+            self._loop.call_soon_threadsafe(lost.set)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        delay = 0
+        while not self._stop.is_set():
+            self._subscribed = False
+            try:
+                self._loop.run_until_complete(self._listen())
+            except Exception:
+                pass
+            set_connected(self, False)
+            # Assinatura que chegou a funcionar: backoff recomeça; senão, espera cada vez mais
+            delay = next_backoff(0 if self._subscribed else delay)
+            self._stop.wait(delay)
+        self._loop.close()
+
+    async def _listen(self):
+        """Uma assinatura: retorna quando o canal cai (CHANNEL_ERROR, TIMED_OUT, CLOSED) ou na parada."""
+        from supabase import acreate_client
+
+        self._lost = lost = asyncio.Event()
+        if self._stop.is_set():
+            return
+        client = await acreate_client(self.url, self.key)
+        channel = client.channel("dashboard-changes")
+        for table in self.tables:
+            channel.on_postgres_changes("*", schema=self.schema, table=table, callback=self._on_change)
+
+        def on_status(status, err=None):
+            if str(status).upper().endswith("SUBSCRIBED"):
+                self._subscribed = True
+                set_connected(self, True)
+            else:
+                set_connected(self, False)
+                lost.set()
+
+        try:
+            await channel.subscribe(on_status)
+            await lost.wait()
+        finally:
+            try:
+                await client.remove_all_channels()
+            except Exception:
+                pass
+
+    def _on_change(self, payload):
+        event = normalize_realtime_payload(payload)
+        for handler in self.handlers:
+            handler(event)
+
+
+def build_listener(config, supabase_url=None, supabase_key=None, handlers=(handle_change,)):
+    """
+    Cria o listener a partir da seção [changefeed] do secrets.toml:
+        mode = "realtime" | "postgres" | "local"
+        tables = ["apontamentos", "maintenance_impacts", ...]   (realtime; padrão: todas)
+        dsn = "postgresql://..."                                 (postgres)
+        channel = "dashboard_changes"                            (postgres)
+    handlers: callbacks de cada evento (padrão: só a invalidação do cache).
+    Retorna None quando desativado.
+    """
+    mode = str(config.get("mode", "off")).lower()
+    if mode == "realtime":
+        # Sem a lista, assina tudo: com o feed conectado o TTL dos dados sobe (data.data_ttl)
+        tables = list(config.get("tables", [PRODUCTION_TABLE, *TABLE_DATASETS]))
+        listener = SupabaseRealtimeListener(supabase_url, supabase_key, tables)
+    elif mode == "postgres":
+        listener = PostgresListener(config["dsn"], config.get("channel", "dashboard_changes"))
+    elif mode == "local":
+        listener = LocalEmitter()
+    else:
+        return None
+    for handler in handlers:
+        listener.subscribe(handler)
+    return listener.start()
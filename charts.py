@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+import plotly.graph_objects as go
+
+COLOR_EXECUTADO = '#00CC96'
+COLOR_META = '#FF4B4B'
+
+# Um ciclo de medição tem no máximo 31 dias; acima de ~2 ciclos a curva diária é reduzida no servidor
+MAX_DAILY_POINTS = 62
+
+# Template vazio: o tema do Streamlit é aplicado no front-end, então o template padrão
+# do Plotly (~6 KB de JSON por figura) só aumenta o payload
+EMPTY_TEMPLATE = go.layout.Template()
+
+
+def downsample_lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: reduz a série para n_out pontos preservando picos e vales.
+    Retorna os índices dos pontos mantidos.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    idx = np.empty(n_out, dtype='int64')
+    idx[0], idx[-1] = 0, n - 1
+
+    # Bordas dos baldes (o primeiro e o último ponto ficam fora)
+    edges = np.linspace(1, n - 1, n_out - 1).astype('int64')
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Média do próximo balde (ou o último ponto)
+        nxt_lo, nxt_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[nxt_lo:nxt_hi].mean()
+        avg_y = y[nxt_lo:nxt_hi].mean()
+        # Área do triângulo entre o ponto anterior, candidatos e a média seguinte
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        idx[i + 1] = a
+    return idx
+
+
+def _lean_layout(fig, **kwargs):
+    fig.update_layout(
+        template=EMPTY_TEMPLATE,
+        margin=dict(l=10, r=10, t=40, b=10),
+        legend=dict(orientation='h', y=1.1),
+        **kwargs
+    )
+    return fig
+
+
+@st.cache_resource(max_entries=128, show_spinner=False)
+def grouped_bar_figure(df_agg, x_col):
+    """
+    Barras Executado x Meta a partir de um DataFrame já agregado (x_col, quantity, meta_turno).
+    A figura fica em cache pelo hash dos dados agregados: reruns com os mesmos dados
+    reaproveitam o objeto e o Streamlit reenvia um spec idêntico.
+    """
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=df_agg[x_col].astype(str).tolist(), y=df_agg['quantity'].tolist(), name='Executado', marker_color=COLOR_EXECUTADO
+    ))
+    fig.add_trace(go.Bar(
+        x=df_agg[x_col].astype(str).tolist(), y=df_agg['meta_turno'].tolist(), name='Meta', marker_color=COLOR_META
+    ))
+    return _lean_layout(fig, barmode='group', height=400)
+
+
+@st.cache_resource(max_entries=128, show_spinner=False)
+def daily_line_figure(df_daily, title, max_points=MAX_DAILY_POINTS):
+    """Curva diária (WebGL) de Executado x Meta, reduzida com LTTB quando passa de max_points."""
+    df_daily = df_daily.sort_values('date')
+    x = pd.to_datetime(df_daily['date'])
+    x_num = x.astype('int64').to_numpy()
+
+    fig = go.Figure()
+    for col, name, color in [('quantity', 'Executado', COLOR_EXECUTADO), ('meta_turno', 'Meta', COLOR_META)]:
+        y = df_daily[col].to_numpy()
+        keep = downsample_lttb(x_num, y, max_points) if len(y) > max_points else np.arange(len(y))
+        fig.add_trace(go.Scattergl(
+            x=x.iloc[keep].dt.strftime('%Y-%m-%d').tolist(), y=y[keep].tolist(),
+            mode='lines', name=name, line=dict(color=color)
+        ))
+
+    return _lean_layout(
+        fig, height=400, title=title,
+        xaxis_title='Data', yaxis_title='Quantidade', legend_title_text='Tipo'
+    )
+
+
+# Paleta para séries categóricas (áreas, categorias de impacto)
+SERIES_COLORS = ['#636EFA', '#00CC96', '#FF4B4B', '#AB63FA', '#FFA15A', '#19D3F3', '#FF6692', '#B6E880']
+
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def cycle_trend_figure(df_agg, x_col, series_col, value_col, title, y_title='Quantidade'):
+    """Uma linha por valor de series_col ao longo dos ciclos (x_col já na ordem cronológica)."""
+    x_order = list(dict.fromkeys(df_agg[x_col].astype(str)))
+    fig = go.Figure()
+    for i, (name, grp) in enumerate(df_agg.groupby(series_col, observed=True, sort=True)):
+        values = grp.set_index(grp[x_col].astype(str))[value_col].reindex(x_order)
+        fig.add_trace(go.Scatter(
+            x=x_order, y=values.tolist(), mode='lines+markers', name=str(name),
+            line=dict(color=SERIES_COLORS[i % len(SERIES_COLORS)])
+        ))
+    return _lean_layout(fig, height=400, title=title, yaxis_title=y_title)
+
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def stacked_bar_figure(df_agg, x_col, stack_col, value_col, title, y_title='Horas'):
+    """Barras empilhadas de value_col por stack_col ao longo de x_col (já na ordem cronológica)."""
+    x_order = list(dict.fromkeys(df_agg[x_col].astype(str)))
+    fig = go.Figure()
+    for i, (name, grp) in enumerate(df_agg.groupby(stack_col, observed=True, sort=True)):
+        values = grp.groupby(grp[x_col].astype(str))[value_col].sum().reindex(x_order, fill_value=0)
+        fig.add_trace(go.Bar(
+            x=x_order, y=values.tolist(), name=str(name),
+            marker_color=SERIES_COLORS[i % len(SERIES_COLORS)]
+        ))
+    return _lean_layout(fig, barmode='stack', height=400, title=title, yaxis_title=y_title)
+
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def pareto_figure(df_pareto, label_col, title):
+    """Pareto: barras de horas em ordem decrescente e linha do % acumulado (eixo secundário)."""
+    labels = df_pareto[label_col].astype(str).tolist()
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=labels, y=df_pareto['horas'].round(1).tolist(), name='Horas', marker_color=COLOR_META))
+    fig.add_trace(go.Scatter(
+        x=labels, y=df_pareto['perc_acum'].round(1).tolist(), name='% Acumulado', yaxis='y2',
+        mode='lines+markers', line=dict(color='#636EFA')
+    ))
+    return _lean_layout(
+        fig, height=400, title=title, yaxis_title='Horas',
+        yaxis2=dict(overlaying='y', side='right', range=[0, 105], ticksuffix='%', showgrid=False)
+    )
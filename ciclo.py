@@ -1,3 +1,10 @@
+import functools
+
+import numpy as np
+import pandas as pd
+
+from utils import get_fiscal_period, iter_fiscal_cycles
+
 # Ciclo de Medição sempre dia 16 a 15 do mês seguinte. Ex. 16/01/2026 a 15/02/2026
 # Quantitativo liberado deve ser calculado considerando
 #   - Meta por turno considerando 3 turnos
@@ -5,4 +12,142 @@
 #   - Extração 50 tubos por turno 150 tubos por dia
 #   - Retubagem 250 tubos por turno 750 tubos por dia
 #   - Madrilhamento 250 tubos por turno 750 tubos por dia
-#   - Dias úteis segunda a sexta
\ No newline at end of file
+#   - Dias úteis segunda a sexta
+
+SHIFTS_PER_DAY = 3
+
+# Meta contratual por turno (tubos)
+GOALS_PER_SHIFT = {
+    "DESOBSTRUÇÃO": 26,
+    "EXTRAÇÃO": 50,
+    "RETUBAGEM": 250,
+    "MANDRILHAMENTO": 250,
+    # Metas específicas por área usadas no A3
+    "DESOBSTRUÇÃO - PRECIPITAÇÃO": 54,
+    "DESOBSTRUÇÃO - AQUECEDOR DE POLPA": 8,
+}
+
+# Grafias alternativas encontradas nos cadastros
+TYPE_ALIASES = {
+    "MADRILHAMENTO": "MANDRILHAMENTO",
+    "DESOBSTRUCAO": "DESOBSTRUÇÃO",
+    "EXTRACAO": "EXTRAÇÃO",
+}
+
+# Feriados (datas ISO) que não contam como dia útil; complementados pelo secrets.toml
+FERIADOS = []
+
+WEEKMASK = "1111100"  # segunda a sexta
+
+
+def normalize_type(m_type):
+    key = str(m_type).strip().upper()
+    return TYPE_ALIASES.get(key, key)
+
+
+class CycleCalendar:
+    """
+    Calendário vetorizado do "quantitativo liberado" para um intervalo de ciclos.
+
+    Tudo é calculado uma vez na construção, em arrays (dias x tipos):
+      - expected_day[d, t]: liberado previsto no dia d para o tipo t (0 em fins de semana/feriados)
+      - expected_cum[d, t]: acumulado dentro do ciclo fiscal do dia d
+    As consultas depois são apenas leituras de array.
+    """
+
+    def __init__(self, start_date, end_date, holidays=None, goals=None):
+        self.goals = {normalize_type(k): v for k, v in (goals or GOALS_PER_SHIFT).items()}
+        self.types = list(self.goals)
+        self._type_idx = {t: i for i, t in enumerate(self.types)}
+        self.holidays = np.array(sorted(set(holidays or [])), dtype="datetime64[D]")
+
+        cycles = list(iter_fiscal_cycles(start_date, end_date))
+        self.cycle_starts = np.array([c[0] for c in cycles], dtype="datetime64[D]")
+        self.cycle_ends = np.array([c[1] for c in cycles], dtype="datetime64[D]")
+        self.cycle_labels = [c[2] for c in cycles]
+
+        self.start = self.cycle_starts[0]
+        self.days = np.arange(self.start, self.cycle_ends[-1] + 1, dtype="datetime64[D]")
+        self.is_business = np.is_busday(self.days, weekmask=WEEKMASK, holidays=self.holidays)
+        self.business_days_per_cycle = np.busday_count(
+            self.cycle_starts, self.cycle_ends + 1, weekmask=WEEKMASK, holidays=self.holidays
+        )
+
+        # Ciclo de cada dia e meta diária por tipo
+        self.day_cycle = np.searchsorted(self.cycle_starts, self.days, side="right") - 1
+        self.goal_per_shift_arr = np.array([self.goals[t] for t in self.types], dtype="int64")
+        daily_goal = self.goal_per_shift_arr * SHIFTS_PER_DAY
+
+        self.expected_day = self.is_business[:, None].astype("int64") * daily_goal[None, :]
+
+        # Acumulado reiniciando a cada ciclo: cumsum global menos o total até o início do ciclo
+        total_cum = np.cumsum(self.expected_day, axis=0)
+        cycle_first_day = (self.cycle_starts - self.start).astype("int64")
+        offset = np.vstack([np.zeros((1, len(self.types)), dtype="int64"), total_cum])[cycle_first_day]
+        self.expected_cum = total_cum - offset[self.day_cycle]
+
+    # --------------------------------------------------------------------------
+    # Consultas (leituras de array)
+    # --------------------------------------------------------------------------
+    def _day_index(self, day):
+        idx = int((np.datetime64(pd.Timestamp(day).date(), "D") - self.start).astype("int64"))
+        if idx < 0 or idx >= len(self.days):
+            raise KeyError(f"{day} fora do calendário ({self.days[0]} a {self.days[-1]})")
+        return idx
+
+    def goal_per_shift(self, m_type, default=0):
+        idx = self._type_idx.get(normalize_type(m_type))
+        return int(self.goal_per_shift_arr[idx]) if idx is not None else default
+
+    def expected_on(self, day, m_type):
+        idx = self._type_idx.get(normalize_type(m_type))
+        return int(self.expected_day[self._day_index(day), idx]) if idx is not None else 0
+
+    def released_to_date(self, day, m_type):
+        """Quantitativo liberado previsto do início do ciclo até `day` (inclusive)."""
+        idx = self._type_idx.get(normalize_type(m_type))
+        return int(self.expected_cum[self._day_index(day), idx]) if idx is not None else 0
+
+    def business_days_to_date(self, day):
+        d = self._day_index(day)
+        cycle_start = self.cycle_starts[self.day_cycle[d]]
+        return int(np.busday_count(cycle_start, self.days[d] + 1, weekmask=WEEKMASK, holidays=self.holidays))
+
+    def cycle_total(self, day, m_type):
+        """Quantitativo liberado previsto para o ciclo inteiro que contém `day`."""
+        idx = self._type_idx.get(normalize_type(m_type))
+        if idx is None:
+            return 0
+        c = self.day_cycle[self._day_index(day)]
+        return int(self.business_days_per_cycle[c] * self.goal_per_shift_arr[idx] * SHIFTS_PER_DAY)
+
+    def to_frame(self):
+        """Formato longo: date, ciclo, tipo, dia_util, previsto_dia, previsto_acumulado."""
+        n_days, n_types = self.expected_day.shape
+        return pd.DataFrame({
+            "date": np.repeat(self.days, n_types).astype("datetime64[ns]"),
+            "ciclo": np.repeat(np.array(self.cycle_labels, dtype=object)[self.day_cycle], n_types),
+            "tipo": np.tile(np.array(self.types, dtype=object), n_days),
+            "dia_util": np.repeat(self.is_business, n_types),
+            "previsto_dia": self.expected_day.ravel(),
+            "previsto_acumulado": self.expected_cum.ravel(),
+        })
+
+
+@functools.lru_cache(maxsize=32)
+def _calendar_cached(start_date, end_date, holidays):
+    return CycleCalendar(start_date, end_date, holidays=list(holidays))
+
+
+def get_calendar(start_date, end_date=None, holidays=None):
+    """Calendário (memoizado) que cobre os ciclos de start_date até end_date."""
+    end_date = end_date or start_date
+    c_start, _, _ = get_fiscal_period(start_date)
+    _, c_end, _ = get_fiscal_period(end_date)
+    all_holidays = tuple(sorted(set(FERIADOS) | set(str(h) for h in (holidays or []))))
+    return _calendar_cached(c_start, c_end, all_holidays)
+
+
+def quantitativo_liberado(start_date, end_date, holidays=None):
+    """Previsto por tipo, por dia e acumulado no ciclo para todos os ciclos do intervalo."""
+    return get_calendar(start_date, end_date, holidays).to_frame()
@@ -0,0 +1,137 @@
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# ==============================================================================
+# Cliente Supabase resiliente
+# ------------------------------------------------------------------------------
+# Envolve o cliente do supabase-py com:
+#   - timeout por consulta (além do timeout HTTP do PostgREST)
+#   - novas tentativas limitadas com backoff exponencial e jitter
+#   - leituras "hedged": se uma leitura idempotente passa de hedge_after
+#     segundos, uma requisição duplicada é disparada e vence a primeira resposta
+# O cliente é criado uma vez por processo (st.cache_resource em data.py), então
+# a conexão HTTP (keep-alive) é reaproveitada entre sessões e reruns.
+# ==============================================================================
+
+DEFAULT_TIMEOUT = 15.0
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_MAX_BACKOFF = 5.0
+
+
+# Erros de conexão do PostgREST com o banco (HTTP 503): o banco está fora ou sem
+# conexões livres no pool, então a mesma consulta pode passar em seguida
+RETRYABLE_POSTGREST_CODES = {"PGRST000", "PGRST001", "PGRST002", "PGRST003"}
+
+
+class QueryTimeout(TimeoutError):
+    """A consulta não respondeu dentro do timeout configurado."""
+
+
+def is_retryable(exc):
+    """Falhas de rede, timeouts, erros 5xx e 503 do PostgREST valem nova tentativa; erros de consulta (4xx/SQL) não."""
+    if isinstance(exc, (TimeoutError, ConnectionError, OSError)):
+        return True
+
+    name = type(exc).__name__
+    # httpx: TransportError e subclasses (ConnectError, ReadTimeout, RemoteProtocolError...)
+    if any(cls.__name__ == "TransportError" for cls in type(exc).__mro__):
+        return True
+    if name == "HTTPStatusError":
+        return getattr(exc.response, "status_code", 500) >= 500
+    if name == "APIError":
+        # PostgREST devolve códigos próprios (PGRST...) ou SQLSTATE para erros de consulta
+        code = str(getattr(exc, "code", "") or "")
+        return code == "" or code.startswith("5") or code in RETRYABLE_POSTGREST_CODES
+    return False
+
+
+class ResilientClient:
+    """
+    Uso:
+        client.run(lambda c: c.table("view_dashboard").select("*").gte("date", ini))
+
+    A função recebe o cliente bruto e devolve o query builder; ela é chamada
+    de novo a cada tentativa (builders do postgrest não são reutilizáveis).
+    """
+
+    def __init__(self, client, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES,
+                 backoff=DEFAULT_BACKOFF, max_backoff=DEFAULT_MAX_BACKOFF, hedge_after=None,
+                 max_workers=8):
+        self.client = client
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge_after = hedge_after
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="supabase-query")
+        self._stats_lock = threading.Lock()
+        self.stats = {"queries": 0, "retries": 0, "hedges": 0, "failures": 0}
+
+    def table(self, name):
+        """Acesso direto ao builder (sem timeout/retry), para compatibilidade."""
+        return self.client.table(name)
+
+    def run(self, build_query, idempotent=True):
+        """Executa a consulta com timeout, retries e (se idempotente) hedging. Retorna a resposta."""
+        self._count("queries")
+        attempts = self.retries + 1 if idempotent else 1
+        last_exc = None
+
+        for attempt in range(attempts):
+            try:
+                return self._attempt(build_query, hedge=idempotent and self.hedge_after is not None)
+            except Exception as exc:
+                last_exc = exc
+                if attempt == attempts - 1 or not is_retryable(exc):
+                    break
+                self._count("retries")
+                # Backoff exponencial com jitter ("full jitter" parcial: 50% a 150%)
+                delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+                time.sleep(delay * random.uniform(0.5, 1.5))
+
+        self._count("failures")
+        raise last_exc
+
+    def _attempt(self, build_query, hedge):
+        futures = [self._executor.submit(self._execute, build_query)]
+        deadline = time.monotonic() + self.timeout
+
+        if hedge:
+            done, _ = wait(futures, timeout=min(self.hedge_after, self.timeout))
+            if not done:
+                # A primeira está lenta: dispara a duplicata e fica com quem responder antes
+                self._count("hedges")
+                futures.append(self._executor.submit(self._execute, build_query))
+
+        pending = set(futures)
+        last_exc = None
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for fut in done:
+                exc = fut.exception()
+                if exc is None:
+                    for other in pending:
+                        other.cancel()
+                    return fut.result()
+                last_exc = exc
+
+        if last_exc is not None and not pending:
+            raise last_exc
+        raise QueryTimeout(f"Consulta excedeu {self.timeout:.1f}s")
+
+    def _execute(self, build_query):
+        query = build_query(self.client)
+        # Versões recentes do postgrest-py têm retry próprio em 503/520; a política fica aqui
+        if hasattr(query, "retry"):
+            query = query.retry(False)
+        return query.execute()
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
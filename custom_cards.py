@@ -20,3 +20,110 @@ def card_html(title, value, meta_val, perc_val, border_color="#2542e6", invert_l
         </div>
     </div>
     """
+
+
+# CSS dos cards (injetado uma única vez por página)
+CARDS_CSS = """
+<style>
+    .kpi-card {
+        background-color: #2b2b36;
+        padding: 15px;
+        border-radius: 8px;
+        border-left: 5px solid #2542e6;
+        box-shadow: 0 4px 6px rgba(0,0,0,0.2);
+        height: 140px;
+        display: flex;
+        flex-direction: column;
+        justify-content: space-between;
+    }
+    .kpi-title { font-size: 13px; color: #a0a0a0; text-transform: uppercase; font-weight: 600; }
+    .kpi-value { font-size: 26px; font-weight: bold; color: #ffffff; margin: 5px 0; }
+    .kpi-footer { border-top: 1px solid #444; padding-top: 8px; margin-top: auto; }
+    .kpi-meta { font-size: 12px; color: #ccc; display: flex; justify-content: space-between; }
+    .kpi-badge { 
+        font-size: 11px; 
+        padding: 2px 6px; 
+        border-radius: 4px; 
+        font-weight: bold;
+    }
+    .badge-green { background-color: rgba(46, 204, 113, 0.2); color: #2ecc71; }
+    .badge-red { background-color: rgba(231, 76, 60, 0.2); color: #e74c3c; }
+    .badge-yellow { background-color: rgba(241, 196, 15, 0.2); color: #f1c40f; }
+
+    .kpi-section { display: flex; flex-direction: column; gap: 8px; }
+    .kpi-area-title { font-size: 1.25rem; font-weight: 600; margin: 12px 0 4px 0; }
+    .kpi-grid {
+        display: grid;
+        grid-template-columns: repeat(5, minmax(0, 1fr));
+        gap: 1rem;
+        margin-bottom: 1.5rem;
+    }
+    @media (max-width: 900px) { .kpi-grid { grid-template-columns: repeat(2, minmax(0, 1fr)); } }
+
+    .tag-kpis { display: grid; grid-template-columns: repeat(4, minmax(0, 1fr)); gap: 1rem; margin-bottom: 10px; }
+    .tag-kpi-label { font-size: 11px; color: #aaa; text-transform: uppercase; letter-spacing: 0.5px; }
+    .tag-kpi-value { font-size: 20px; font-weight: bold; color: #fff; }
+</style>
+"""
+
+
+def area_kpis(garantia_minima, liberado_total, executado_total, meta_operacional_periodo):
+    """Calcula os 5 cards (título, valor, meta, %, cor, invertido) de uma área."""
+    perc_liberado = (liberado_total / garantia_minima * 100) if garantia_minima > 0 else 0
+    perc_produtividade = (executado_total / meta_operacional_periodo * 100) if meta_operacional_periodo > 0 else 0
+
+    pendente_execucao = liberado_total - executado_total
+    perc_pendente_exec = (pendente_execucao / liberado_total * 100) if liberado_total > 0 else 0
+
+    pendente_liberar = garantia_minima - liberado_total
+    perc_pendente_lib = (pendente_liberar / garantia_minima * 100) if garantia_minima > 0 else 0
+
+    return [
+        ("Garantia Mínima", f"{garantia_minima:,.0f}", "Contrato", 100.0, "#3498db", False),
+        ("Liberado (Eng.)", f"{liberado_total:,.0f}", f"{garantia_minima:,.0f}", perc_liberado, "#9b59b6", False),
+        ("Executado (Campo)", f"{executado_total:,.0f}", f"{meta_operacional_periodo:,.0f}", perc_produtividade, "#2ecc71", False),
+        ("Pendente Execução", f"{pendente_execucao:,.0f}", f"{liberado_total:,.0f}", perc_pendente_exec, "#f1c40f", True),
+        ("Pendente Liberar", f"{pendente_liberar:,.0f}", f"{garantia_minima:,.0f}", perc_pendente_lib, "#e74c3c", True),
+    ]
+
+
+def cards_grid_html(sections):
+    """
+    Monta um único bloco HTML com todas as áreas de uma seção.
+    sections: lista de (nome_area, lista_de_cards) onde cada card é a tupla de area_kpis().
+    """
+    parts = ['<div class="kpi-section">']
+    for area_nome, cards in sections:
+        parts.append(f'<div class="kpi-area-title">📍 Área: {area_nome}</div>')
+        parts.append('<div class="kpi-grid">')
+        for title, value, meta_val, perc_val, color, invert in cards:
+            parts.append(card_html(title, value, meta_val, perc_val, color, invert_logic=invert))
+        parts.append('</div>')
+    parts.append('</div>')
+    # Sem indentação/linhas em branco para o Markdown não tratar como bloco de código
+    return "".join(line.strip() for line in "".join(parts).splitlines())
+
+
+def tag_header_html(tag, meta_turno_val, st_maint, dt_inicio, dt_previsto, dt_real,
+                    total_tubos, total_mapeado, acumulado_exec, pendente):
+    """Cabeçalho, barra de status e KPIs de um equipamento (Aba 2) em um único bloco."""
+    color_pend = "#e74c3c" if pendente > 0 else "#2ecc71"
+    html = f"""
+        <div style="background-color: #2542e6; color: white; padding: 10px; border-radius: 5px; display: flex; justify-content: space-between; align-items: center; margin-bottom: 10px;">
+            <div style="font-size: 1.2em; font-weight: bold; padding-left: 10px;">🏭 {tag}</div>
+            <div style="padding-right: 10px; font-size: 0.9em; opacity: 0.9;">META DO TURNO: <strong>{meta_turno_val:.0f}</strong></div>
+        </div>
+        <div style="background-color: #2b2b36; border-left: 3px solid #f1c40f; padding: 8px 12px; border-radius: 4px; margin-bottom: 15px; font-size: 13px; color: #e0e0e0; display: flex; justify-content: space-between;">
+            <div><strong>STATUS:</strong> <span style="color: #f1c40f;">{str(st_maint).upper()}</span></div>
+            <div><strong>INÍCIO:</strong> {dt_inicio}</div>
+            <div><strong>TÉRMINO PREVISTO:</strong> {dt_previsto}</div>
+            <div><strong>TÉRMINO REAL:</strong> {dt_real}</div>
+        </div>
+        <div class="tag-kpis">
+            <div><div class="tag-kpi-label">Total de Tubos</div><div class="tag-kpi-value">{total_tubos:.0f}</div></div>
+            <div><div class="tag-kpi-label">Mapeado</div><div class="tag-kpi-value">{total_mapeado:.0f}</div></div>
+            <div><div class="tag-kpi-label">Acumulado Realizado</div><div class="tag-kpi-value" style="color: #2ecc71;">{acumulado_exec:.0f}</div></div>
+            <div><div class="tag-kpi-label">Pendente</div><div class="tag-kpi-value" style="color: {color_pend};">{pendente:.0f}</div></div>
+        </div>
+    """
+    return "".join(line.strip() for line in html.splitlines())
@@ -0,0 +1,419 @@
+import time
+import streamlit as st
+import pandas as pd
+from datetime import timedelta
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import to_date_column, compact_numeric, iter_fiscal_cycles
+from cache import cached
+from changefeed import build_listener, handle_change
+from client import ResilientClient, DEFAULT_TIMEOUT, DEFAULT_RETRIES
+
+# ==============================================================================
+# CAMADA DE DADOS: conexão, loaders e busca paralela
+# ==============================================================================
+
+def supabase_settings():
+    """Seção [supabase] do secrets.toml; interrompe a página com um aviso se faltar url/role."""
+    message = "Configure os segredos do Supabase no .streamlit/secrets.toml"
+    try:
+        cfg = st.secrets["supabase"]
+        cfg["url"], cfg["role"]
+    except Exception:
+        st.error(message)
+        st.stop()
+        # Fora de uma página (CLIs, threads de fundo) st.stop não interrompe nada
+        raise RuntimeError(message)
+    return cfg
+
+
+@st.cache_resource
+def init_connection():
+    """
+    Um cliente por processo, reaproveitado por todas as sessões (keep-alive).
+    Parâmetros opcionais em [supabase] no secrets.toml: timeout, retries, hedge_after.
+    """
+    cfg = supabase_settings()
+    url = cfg["url"]
+    key = cfg["role"]
+
+    # Importado só na primeira consulta: ciclos vindos do arquivo e do cache em disco não precisam
+    from supabase import create_client, ClientOptions
+
+    timeout = float(cfg.get("timeout", DEFAULT_TIMEOUT))
+    hedge_after = cfg.get("hedge_after")
+    return ResilientClient(
+        create_client(url, key, options=ClientOptions(postgrest_client_timeout=timeout)),
+        timeout=timeout,
+        retries=int(cfg.get("retries", DEFAULT_RETRIES)),
+        hedge_after=float(hedge_after) if hedge_after is not None else None,
+    )
+
+# Validade (s) dos snapshots. Vencido, o snapshot continua sendo servido
+# enquanto uma thread busca a versão nova (stale-while-revalidate).
+# Com o change feed conectado, as mudanças invalidam o cache por evento e o
+# TTL vira só uma rede de segurança.
+DATA_TTL = 60
+DATA_TTL_WITH_FEED = 900
+
+_listener = None
+
+
+@st.cache_resource
+def start_change_feed():
+    """Liga o listener configurado em [changefeed] (uma vez por processo)."""
+    global _listener
+    try:
+        config = dict(st.secrets.get("changefeed", {}))
+        sb = st.secrets.get("supabase", {})
+    except Exception:
+        return None
+    # Além do cache, o feed marca os dias fechados corrigidos: o arquivo noturno desses
+    # dias (e do ciclo) deixa de ser usado até ser refeito (archive.mark_touched).
+    # Importado aqui: archive.py importa este módulo
+    from archive import mark_touched
+    _listener = build_listener(config, sb.get("url"), sb.get("role"), handlers=(handle_change, mark_touched))
+    return _listener
+
+
+def change_feed_connected():
+    return _listener is not None and _listener.connected
+
+
+def data_ttl():
+    return DATA_TTL_WITH_FEED if change_feed_connected() else DATA_TTL
+
+
+def cycle_partitions(start_date, end_date):
+    """Partições de produção cobertas por um intervalo (um ciclo fiscal por partição)."""
+    parts = {("dataset", "production")}
+    parts.update(("cycle", c_start.isoformat()) for c_start, _, _ in iter_fiscal_cycles(start_date, end_date))
+    return parts
+
+# Colunas de baixa cardinalidade mantidas como categorias (códigos inteiros)
+CATEGORICAL_COLUMNS = ['shift_name', 'equipment_tag', 'maint_status', 'maintenance_type', 'equipment_area']
+
+# Colunas buscadas para o ciclo inteiro. O texto livre (notes) é a coluna mais
+# larga e só aparece no dia selecionado: vem à parte, por dia (load_day_notes).
+PRODUCTION_COLUMNS = [
+    'date', 'quantity', 'meta_turno', 'total_tubos', 'shift_name', 'equipment_tag',
+    'maint_start_date', 'maint_due_date', 'maint_real_due_date', 'maint_status',
+    'maintenance_type', 'equipment_area',
+]
+
+def _prepare_production_frame(df):
+    """Frame canônico compacto a partir das linhas da view_dashboard."""
+    if not df.empty:
+        # Frame canônico compacto: datas em datetime64, textos repetitivos como
+        # categorias e números no menor tipo seguro. A formatação ('%d/%m/%Y')
+        # só acontece na renderização (utils.format_date).
+        df['date'] = to_date_column(df['date'])
+        df['quantity'] = compact_numeric(df['quantity'])
+        df['meta_turno'] = compact_numeric(df['meta_turno'])
+        
+        # --- NOVO: Tratamento da coluna total_tubos ---
+        if 'total_tubos' in df.columns:
+            df['total_tubos'] = compact_numeric(df['total_tubos'])
+        else:
+            df['total_tubos'] = 0
+            
+        df['shift_name'] = df['shift_name'].astype(str)
+        df['equipment_tag'] = df['equipment_tag'].fillna('N/A')
+
+        df['maint_start_date'] = to_date_column(df['maint_start_date'])
+        df['maint_due_date'] = to_date_column(df['maint_due_date'])
+        df['maint_real_due_date'] = to_date_column(df['maint_real_due_date'])
+        df['maint_status'] = df['maint_status'].fillna('Nao Definido').astype(str)
+
+        for col in CATEGORICAL_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+            
+    return df
+
+
+# ------------------------------------------------------------------------------
+# Store particionado por ciclo fiscal
+# ------------------------------------------------------------------------------
+# Cada ciclo (16 a 15) é uma entrada própria do cache. Qualquer intervalo é
+# montado a partir dos ciclos que o cobrem: só os ciclos que não estão em cache
+# vão ao banco, e o recorte para o intervalo pedido é feito em memória.
+
+@cached("production_cycle", ttl=data_ttl, stale_while_revalidate=True, partitions=cycle_partitions)
+def load_cycle_partition(cycle_start, cycle_end):
+    """Todas as linhas de produção de um ciclo fiscal completo (sem o texto das anotações)."""
+    response = init_connection().run(lambda c: c.table("view_dashboard")\
+        .select(",".join(PRODUCTION_COLUMNS))\
+        .gte("date", cycle_start.isoformat())\
+        .lte("date", cycle_end.isoformat()))
+    
+    return _prepare_production_frame(pd.DataFrame(response.data))
+
+# Pool próprio: load_data roda dentro do _executor do bundle e não pode esperar nele mesmo
+_partition_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="dashboard-partition")
+
+
+def _concat_partitions(frames):
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+    df = pd.concat(frames, ignore_index=True)
+    # Categorias diferentes entre ciclos viram object no concat: reaplica
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and df[col].dtype != 'category':
+            df[col] = df[col].astype('category')
+    return df
+
+
+def load_data(start_date, end_date):
+    """
+    Produção de start_date a end_date (inclusive), montada pelos ciclos em cache.
+    Intervalos que diferem por poucos dias reaproveitam as mesmas partições.
+    """
+    cycles = [(c_start, c_end) for c_start, c_end, _ in iter_fiscal_cycles(start_date, end_date)]
+    if len(cycles) == 1:
+        frames = [load_cycle_partition(*cycles[0])]
+    else:
+        frames = list(_partition_executor.map(lambda c: load_cycle_partition(*c), cycles))
+
+    df = _concat_partitions(frames)
+    if df.empty:
+        return df
+
+    first, last = cycles[0][0], cycles[-1][1]
+    if start_date == first and end_date == last:
+        # Ciclos completos (caso do dashboard): devolve a partição sem copiar
+        return df
+    mask = (df['date'] >= pd.Timestamp(start_date)) & (df['date'] <= pd.Timestamp(end_date))
+    return df.loc[mask].reset_index(drop=True)
+
+
+def load_data_snapshot_info(start_date, end_date):
+    """(fetched_at mais antigo, alguma partição atualizando) dos ciclos do intervalo."""
+    infos = [load_cycle_partition.snapshot_info(c_start, c_end)
+             for c_start, c_end, _ in iter_fiscal_cycles(start_date, end_date)]
+    if any(i is None for i in infos):
+        return None
+    return min(i[0] for i in infos), any(i[1] for i in infos)
+
+IMPACT_COLUMNS = "id, maintenance_id, start_time, end_time, description, maintenances(type, equipments(tag))"
+IMPACT_TEXT_COLUMNS = ['description', 'Detalhe']
+
+
+@cached("load_impacts_data", ttl=data_ttl, stale_while_revalidate=True,
+        partitions=lambda: {("dataset", "impacts")})
+def load_impacts_data():
+    """Busca TODO o histórico de impactos com TAGs e calcula as horas."""
+    # Query que faz o join com as manutenções e equipamentos para pegar a TAG e o Tipo
+    response = init_connection().run(lambda c: c.table("maintenance_impacts")\
+        .select(IMPACT_COLUMNS))
+
+    # A categoria vem do prefixo da descrição, então o texto ainda é baixado;
+    # o frame em cache guarda só a categoria (ver load_impact_texts)
+    df_imp = _prepare_impacts_frame(pd.DataFrame(response.data))
+    return df_imp.drop(columns=[c for c in IMPACT_TEXT_COLUMNS + ['maintenances'] if c in df_imp.columns])
+
+
+def _prepare_impacts_frame(df_imp):
+    """Tag, tipo, horas, data e categoria dos impactos a partir das linhas do Supabase."""
+    if not df_imp.empty:
+        # Extrai a Tag e o Tipo do JSON retornado pelo Supabase
+        df_imp['equipment_tag'] = df_imp['maintenances'].apply(lambda x: x['equipments']['tag'] if x and x.get('equipments') else 'N/A')
+        df_imp['Tipo'] = df_imp['maintenances'].apply(lambda x: x['type'] if x else 'N/A')
+        
+        # Converte datas
+        df_imp['start_time'] = pd.to_datetime(df_imp['start_time'])
+        # Se não tiver end_time, assume o tempo atual (ou 0, ajuste conforme sua regra)
+        df_imp['end_time'] = pd.to_datetime(df_imp['end_time']).fillna(pd.Timestamp.now(tz='UTC'))
+        
+        # Calcula as HORAS de impacto
+        df_imp['horas'] = (df_imp['end_time'] - df_imp['start_time']).dt.total_seconds() / 3600.0
+        df_imp['date'] = df_imp['start_time'].dt.date
+        
+        # Separa a Categoria da Descrição
+        split_desc = df_imp['description'].str.split(' - ', n=1, expand=True)
+        df_imp['Categoria'] = split_desc[0].str.strip()
+        df_imp['Detalhe'] = split_desc[1].str.strip() if split_desc.shape[1] > 1 else df_imp['description']
+        df_imp['Categoria'] = df_imp.apply(lambda x: 'OUTROS' if pd.isna(x['Detalhe']) else x['Categoria'], axis=1)
+        
+    return df_imp
+
+
+# ------------------------------------------------------------------------------
+# Textos sob demanda (anotações e descrições)
+# ------------------------------------------------------------------------------
+# Os loaders do ciclo trazem só números e chaves. O texto livre é buscado para
+# as linhas exibidas/relatadas (o dia selecionado), com cache próprio e
+# invalidado junto com o ciclo/dataset de origem.
+
+@cached("production_notes", ttl=data_ttl, stale_while_revalidate=True,
+        partitions=lambda day: cycle_partitions(day, day))
+def load_day_notes(day):
+    """Anotações não vazias do dia: equipment_tag, shift_name, notes."""
+    response = init_connection().run(lambda c: c.table("view_dashboard")\
+        .select("equipment_tag,shift_name,notes")\
+        .eq("date", day.isoformat()))
+
+    df = pd.DataFrame(response.data, columns=['equipment_tag', 'shift_name', 'notes'])
+    df = df[df['notes'].fillna('').astype(str).str.strip() != '']
+    df['equipment_tag'] = df['equipment_tag'].fillna('N/A').astype(str)
+    df['shift_name'] = df['shift_name'].astype(str)
+    return df.reset_index(drop=True)
+
+
+@cached("impact_texts", ttl=data_ttl, stale_while_revalidate=True,
+        partitions=lambda ids: {("dataset", "impacts")})
+def load_impact_texts(ids):
+    """description e Detalhe dos impactos pedidos (por id)."""
+    if not ids:
+        return pd.DataFrame(columns=['id'] + IMPACT_TEXT_COLUMNS)
+    response = init_connection().run(lambda c: c.table("maintenance_impacts")\
+        .select("id,description")\
+        .in_("id", list(ids)))
+
+    df = pd.DataFrame(response.data, columns=['id', 'description'])
+    split_desc = df['description'].str.split(' - ', n=1, expand=True)
+    df['Detalhe'] = split_desc[1].str.strip() if split_desc.shape[1] > 1 else df['description']
+    return df
+
+
+def with_impact_texts(df_events):
+    """Eventos (ex.: impactos do dia) com description e Detalhe buscados sob demanda."""
+    if df_events.empty or 'id' not in df_events.columns:
+        return df_events
+    texts = load_impact_texts(tuple(sorted(int(i) for i in df_events['id'].dropna().unique())))
+    out = df_events.drop(columns=[c for c in IMPACT_TEXT_COLUMNS if c in df_events.columns])
+    return out.merge(texts, on='id', how='left')
+
+
+# ------------------------------------------------------------------------------
+# Leitura paginada (exportações)
+# ------------------------------------------------------------------------------
+# Exportações de meses ou anos não passam pelo cache: as linhas são lidas
+# página a página (order + range) e entregues em DataFrames pequenos, para
+# que quem escreve o arquivo comece na primeira página com memória constante.
+# O offset avança pelo número de linhas recebidas, então um limite de linhas
+# por resposta menor que a página (max-rows do PostgREST) não perde dados.
+EXPORT_PAGE_SIZE = 1000
+# O id fecha a ordenação: com empates (mesmo dia/tag/turno) a ordem entre
+# requisições não é garantida e o offset pularia ou repetiria linhas
+PRODUCTION_ORDER = ['date', 'equipment_tag', 'shift_name', 'id']
+
+
+def _iter_pages(build_query, page_size):
+    offset = 0
+    while True:
+        rows = init_connection().run(lambda c: build_query(c).range(offset, offset + page_size - 1)).data
+        if not rows:
+            return
+        yield rows
+        offset += len(rows)
+
+
+def iter_production_pages(start_date, end_date, areas=None, tags=None, page_size=EXPORT_PAGE_SIZE):
+    """Linhas da view_dashboard de start_date a end_date (filtros opcionais), uma página por DataFrame."""
+    def build_query(c):
+        q = c.table("view_dashboard").select("*")\
+            .gte("date", start_date.isoformat())\
+            .lte("date", end_date.isoformat())
+        if areas is not None:
+            q = q.in_("equipment_area", list(areas))
+        if tags is not None:
+            q = q.in_("equipment_tag", list(tags))
+        for col in PRODUCTION_ORDER:
+            q = q.order(col)
+        return q
+
+    for rows in _iter_pages(build_query, page_size):
+        yield _prepare_production_frame(pd.DataFrame(rows))
+
+
+def tags_in_areas(start_date, end_date, areas, page_size=EXPORT_PAGE_SIZE):
+    """
+    Tags com apontamentos nas áreas de start_date a end_date. Os impactos não
+    têm a área: o filtro por área chega a eles por estas tags.
+    """
+    def build_query(c):
+        q = c.table("view_dashboard").select("equipment_tag")\
+            .gte("date", start_date.isoformat())\
+            .lte("date", end_date.isoformat())\
+            .in_("equipment_area", list(areas))
+        for col in PRODUCTION_ORDER:
+            q = q.order(col)
+        return q
+
+    tags = set()
+    for rows in _iter_pages(build_query, page_size):
+        tags.update(str(r["equipment_tag"]) for r in rows if r.get("equipment_tag"))
+    return tags
+
+
+def iter_impact_pages(start_date, end_date, page_size=EXPORT_PAGE_SIZE):
+    """Impactos iniciados de start_date a end_date (inclusive), uma página por DataFrame."""
+    def build_query(c):
+        return c.table("maintenance_impacts")\
+            .select("*, maintenances(type, equipments(tag))")\
+            .gte("start_time", start_date.isoformat())\
+            .lt("start_time", (end_date + timedelta(days=1)).isoformat())\
+            .order("start_time").order("id")
+
+    for rows in _iter_pages(build_query, page_size):
+        yield _prepare_impacts_frame(pd.DataFrame(rows))
+
+@cached("get_kpi_totals", ttl=data_ttl, stale_while_revalidate=True,
+        partitions=lambda start_date, end_date: {("dataset", "metrics")})
+def get_kpi_totals(start_date, end_date):
+    """
+    Busca os totais Macro:
+    1. Garantia Mínima (Tabela goals)
+    2. Liberado/Mapeado (Tabela maintenances)
+    """
+    # 1. Busca Garantia Mínima (Soma do valor das metas ativas no período)
+    # Ajuste o filtro 'type' conforme sua regra (ex: 'Contratual' ou 'Faturamento Mínimo')
+    resp_metrics = init_connection().run(lambda c: c.table("view_consolidado_manutencao")\
+        .select("*"))
+    
+    df_metrics = pd.DataFrame(resp_metrics.data)
+        
+    return df_metrics
+
+
+# ------------------------------------------------------------------------------
+# Busca paralela dos três conjuntos do dashboard
+# ------------------------------------------------------------------------------
+DashboardData = namedtuple("DashboardData", ["cycle", "metrics", "impacts", "fetched_at", "refreshing"])
+
+# Pool compartilhado pelo processo: as consultas são I/O (HTTP), então threads bastam
+_executor = ThreadPoolExecutor(max_workers=6, thread_name_prefix="dashboard-data")
+
+
+def load_dashboard_bundle(start_date, end_date):
+    """
+    Dispara as consultas independentes (ciclo, metas consolidadas e impactos)
+    ao mesmo tempo. Com o cache frio, o tempo total fica próximo da consulta
+    mais lenta em vez da soma das três.
+    """
+    # Valida os segredos na thread do script (st.error / st.stop dependem do contexto).
+    # O cliente (e o import do supabase) só é criado no primeiro miss de cache, pelo loader.
+    supabase_settings()
+
+    fut_cycle = _executor.submit(load_data, start_date, end_date)
+    fut_metrics = _executor.submit(get_kpi_totals, start_date, end_date)
+    fut_impacts = _executor.submit(load_impacts_data)
+
+    cycle, metrics, impacts = fut_cycle.result(), fut_metrics.result(), fut_impacts.result()
+
+    # Idade do snapshot mais antigo e se alguma atualização está em andamento
+    infos = [
+        load_data_snapshot_info(start_date, end_date),
+        get_kpi_totals.snapshot_info(start_date, end_date),
+        load_impacts_data.snapshot_info(),
+    ]
+    infos = [i for i in infos if i is not None]
+    fetched_at = min((i[0] for i in infos), default=time.time())
+    refreshing = any(i[1] for i in infos)
+
+    return DashboardData(cycle, metrics, impacts, fetched_at, refreshing)
@@ -0,0 +1,216 @@
+"""
+Exportação dos dados brutos da medição (auditoria): apontamentos da
+view_dashboard e impactos de um intervalo de ciclos, em CSV, XLSX ou Parquet.
+
+As linhas são lidas página a página (data.iter_production_pages /
+iter_impact_pages) e escritas à medida que chegam: exportar um ano usa a
+mesma memória que exportar um dia, e o arquivo começa a ser escrito na
+primeira página.
+
+Saída:
+    csv / parquet -> .zip com producao.<ext> e impactos.<ext>
+    xlsx          -> uma planilha com as abas producao e impactos
+
+Uso:
+    python export_data.py --start 2025-10-16 --end 2026-10-15 --format parquet --out auditoria.zip
+    python export_data.py --start 2026-09-16 --end 2026-10-15 --format xlsx --out medicao.xlsx --areas DIGESTÃO
+"""
+import io
+import os
+import argparse
+import tempfile
+import zipfile
+from datetime import date
+
+import pandas as pd
+
+from data import iter_production_pages, iter_impact_pages, tags_in_areas
+from intervals import PLANT_TZ
+
+FORMAT_EXTENSIONS = {"csv": "zip", "parquet": "zip", "xlsx": "xlsx"}
+FORMAT_MIME = {
+    "csv": "application/zip",
+    "parquet": "application/zip",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# CSV no padrão das planilhas em pt-BR (Excel abre direto)
+CSV_OPTIONS = {"sep": ";", "decimal": ",", "index": False}
+CSV_ENCODING = "utf-8-sig"
+
+# Colunas de valor: o loader escolhe int32 ou float32 por página, a exportação fixa float64
+VALUE_COLUMNS = ['quantity', 'meta_turno', 'total_tubos', 'horas']
+
+# JSON aninhado do join (a tag e o tipo já viram colunas próprias)
+NESTED_COLUMNS = ['maintenances']
+
+XLSX_MAX_ROWS = 1_048_575   # limite do Excel, sem o cabeçalho
+
+
+def tabular(df):
+    """Página pronta para escrita: tipos estáveis entre páginas e textos como string."""
+    df = df.drop(columns=[c for c in NESTED_COLUMNS if c in df.columns])
+    for col in df.columns:
+        s = df[col]
+        if col in VALUE_COLUMNS:
+            df[col] = pd.to_numeric(s, errors='coerce').astype('float64')
+        elif isinstance(s.dtype, pd.CategoricalDtype) or s.dtype == object:
+            df[col] = s.astype('string')
+    return df
+
+
+def iter_datasets(start_date, end_date, areas=None, tags=None, page_size=None):
+    """[(nome, gerador de páginas)] na ordem em que são escritos."""
+    kwargs = {} if page_size is None else {"page_size": page_size}
+
+    def production():
+        for df in iter_production_pages(start_date, end_date, areas=areas, tags=tags, **kwargs):
+            yield tabular(df)
+
+    def impacts():
+        # Mesmo filtro da produção: as áreas viram as tags delas (impactos não têm a área)
+        impact_tags = None if tags is None else {str(t) for t in tags}
+        if areas is not None:
+            area_tags = tags_in_areas(start_date, end_date, areas, **kwargs)
+            impact_tags = area_tags if impact_tags is None else impact_tags & area_tags
+        for df in iter_impact_pages(start_date, end_date, **kwargs):
+            if impact_tags is not None:
+                df = df[df['equipment_tag'].astype(str).isin(impact_tags)]
+            if not df.empty:
+                yield tabular(df)
+
+    return [("producao", production()), ("impactos", impacts())]
+
+
+# ------------------------------------------------------------------------------
+# Escritores: recebem as páginas e um arquivo binário de destino (sink)
+# ------------------------------------------------------------------------------
+def _aligned(pages):
+    """Páginas com as colunas da primeira (colunas ausentes viram nulas)."""
+    columns = None
+    for df in pages:
+        if columns is None:
+            columns = list(df.columns)
+        yield df.reindex(columns=columns)
+
+
+def write_csv(datasets, sink):
+    counts = {}
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, pages in datasets:
+            counts[name] = 0
+            with zf.open(f"{name}.csv", 'w') as member:
+                text = io.TextIOWrapper(member, encoding=CSV_ENCODING, newline="")
+                for df in _aligned(pages):
+                    df.to_csv(text, header=counts[name] == 0, **CSV_OPTIONS)
+                    counts[name] += len(df)
+                text.flush()
+                text.detach()
+    return counts
+
+
+def write_parquet(datasets, sink):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    counts = {}
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED) as zf:
+        for name, pages in datasets:
+            counts[name] = 0
+            with zf.open(f"{name}.parquet", 'w') as member:
+                writer = None
+                for df in _aligned(pages):
+                    table = pa.Table.from_pandas(df, schema=writer.schema if writer else None, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(member, table.schema, compression="zstd")
+                    writer.write_table(table)
+                    counts[name] += len(df)
+                if writer is not None:
+                    writer.close()
+    return counts
+
+
+def _xlsx_rows(df):
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.DatetimeTZDtype):
+            # Excel não guarda fuso: horário da planta
+            df[col] = df[col].dt.tz_convert(PLANT_TZ).dt.tz_localize(None)
+    values = df.astype(object).where(df.notna(), None)
+    return values.itertuples(index=False, name=None)
+
+
+def write_xlsx(datasets, sink):
+    from openpyxl import Workbook
+
+    # write_only: as linhas vão para o arquivo à medida que são adicionadas
+    wb = Workbook(write_only=True)
+    counts = {}
+    for name, pages in datasets:
+        counts[name] = 0
+        ws, header, sheet_rows, part = None, None, 0, 1
+        for df in _aligned(pages):
+            header = list(df.columns)
+            for row in _xlsx_rows(df):
+                if ws is None or sheet_rows >= XLSX_MAX_ROWS:
+                    # Acima do limite do Excel, continua em producao_2, producao_3...
+                    ws = wb.create_sheet(name if ws is None else f"{name}_{part}")
+                    ws.append(header)
+                    sheet_rows = 0
+                    part += 1
+                ws.append(row)
+                sheet_rows += 1
+            counts[name] += len(df)
+        if ws is None:
+            wb.create_sheet(name)
+    wb.save(sink)
+    return counts
+
+
+WRITERS = {"csv": write_csv, "parquet": write_parquet, "xlsx": write_xlsx}
+
+
+def export_data(sink, fmt, start_date, end_date, areas=None, tags=None, page_size=None):
+    """Escreve produção e impactos de start_date a end_date em sink. Retorna {dataset: linhas}."""
+    return WRITERS[fmt](iter_datasets(start_date, end_date, areas, tags, page_size), sink)
+
+
+def export_to_file(fmt, start_date, end_date, areas=None, tags=None):
+    """
+    export_data em um arquivo temporário, devolvido aberto para leitura
+    (io.BufferedReader, um dos tipos que o download_button aceita). O nome é
+    removido logo após a abertura: o arquivo some do disco quando o handle fecha.
+    """
+    fd, path = tempfile.mkstemp(prefix="medicao_", suffix=f".{FORMAT_EXTENSIONS[fmt]}")
+    try:
+        with os.fdopen(fd, 'wb') as sink:
+            export_data(sink, fmt, start_date, end_date, areas, tags)
+        return open(path, 'rb')
+    finally:
+        os.remove(path)
+
+
+def export_file_name(fmt, start_date, end_date):
+    return f"medicao_{start_date.isoformat()}_{end_date.isoformat()}.{FORMAT_EXTENSIONS[fmt]}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exportação dos apontamentos e impactos (auditoria)")
+    parser.add_argument("--start", type=date.fromisoformat, required=True, help="Primeiro dia (AAAA-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, required=True, help="Último dia (AAAA-MM-DD)")
+    parser.add_argument("--format", choices=list(WRITERS), default="csv")
+    parser.add_argument("--out", help="Arquivo de saída (padrão: medicao_<inicio>_<fim>.<ext>)")
+    parser.add_argument("--areas", help="Áreas separadas por vírgula (padrão: todas)")
+    parser.add_argument("--tags", help="Equipamentos separados por vírgula (padrão: todos)")
+    parser.add_argument("--page-size", type=int, help="Linhas por página lida do banco")
+    args = parser.parse_args(argv)
+
+    split = lambda value: [v.strip() for v in value.split(",") if v.strip()] if value else None
+    out = args.out or export_file_name(args.format, args.start, args.end)
+    with open(out, 'wb') as sink:
+        counts = export_data(sink, args.format, args.start, args.end,
+                             areas=split(args.areas), tags=split(args.tags), page_size=args.page_size)
+    print(f"{out}: " + ", ".join(f"{name} {n} linhas" for name, n in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Exportação em lote dos relatórios em PDF (ex.: fechamento do mês).
+
+Cada relatório é desenhado e escrito no arquivo de destino (ou em um membro
+do .zip), um de cada vez. O FPDF monta cada documento inteiro em memória
+antes de gravar, então o pico é o de um relatório (não o do lote inteiro),
+mas não é constante: cresce com o tamanho do relatório.
+
+Uso:
+    python export_reports.py --start 2026-09-01 --end 2026-09-30 --formats a3,diario --out relatorios/
+    python export_reports.py --start 2026-09-01 --end 2026-09-30 --zip fechamento_set.zip
+"""
+import os
+import argparse
+import zipfile
+from datetime import date, timedelta
+
+import streamlit as st
+
+from utils import get_fiscal_period
+from ciclo import get_calendar
+from shifts import prepare_shift_dataframe, fill_missing_goals
+from data import load_data, load_impacts_data, load_day_notes, with_impact_texts
+from intervals import get_impact_index
+from ledger import get_ledger, maint_starts
+from report_model import build_report_model
+from pdf import LAYOUTS, render_report
+
+
+def report_inputs(day, holidays=()):
+    """Argumentos dos relatórios do dia, como na aba de acompanhamento (sem filtros)."""
+    c_start, c_end, _ = get_fiscal_period(day)
+    df_cycle = load_data(c_start, c_end)
+    df_day = prepare_shift_dataframe(df_cycle, day, notes=load_day_notes(day))
+    if df_day.empty:
+        return None
+    df_day = fill_missing_goals(df_day, get_calendar(day, holidays=list(holidays)))
+    df_impacts = load_impacts_data()
+    df_today = with_impact_texts(get_impact_index(df_impacts).day(day))
+    df_progress = get_ledger(day).progress_frame(sorted(df_day['Tag'].unique()), day, maint_starts(df_day))
+    return df_day, df_cycle, day.strftime('%d/%m/%Y'), df_impacts, df_today, df_progress, tuple(holidays)
+
+
+def export_reports(start, end, formats, out_dir=None, zip_path=None, holidays=()):
+    """Escreve um PDF por dia e formato. Retorna a lista de nomes gerados."""
+    written = []
+    archive = zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_STORED) if zip_path else None
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    try:
+        day = start
+        while day <= end:
+            args = report_inputs(day, holidays)
+            if args is not None:
+                model = build_report_model(*args)
+                for layout_name in formats:
+                    name = f"Relatorio_{layout_name}_{day.isoformat()}.pdf"
+                    if archive is not None:
+                        with archive.open(name, 'w') as sink:
+                            render_report(model, layout_name, sink)
+                    else:
+                        with open(os.path.join(out_dir, name), 'wb') as sink:
+                            render_report(model, layout_name, sink)
+                    written.append(name)
+                del model, args
+            day += timedelta(days=1)
+    finally:
+        if archive is not None:
+            archive.close()
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exportação em lote dos relatórios em PDF")
+    parser.add_argument("--start", type=date.fromisoformat, required=True, help="Primeiro dia (AAAA-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, required=True, help="Último dia (AAAA-MM-DD)")
+    parser.add_argument("--formats", default="a3", help=f"Formatos separados por vírgula: {', '.join(LAYOUTS)}")
+    parser.add_argument("--out", default="relatorios", help="Diretório de saída")
+    parser.add_argument("--zip", dest="zip_path", help="Grava tudo em um único .zip em vez do diretório")
+    args = parser.parse_args(argv)
+
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    unknown = [f for f in formats if f not in LAYOUTS]
+    if unknown:
+        parser.error(f"formato(s) desconhecido(s): {', '.join(unknown)}")
+
+    try:
+        holidays = tuple(st.secrets.get("ciclo", {}).get("feriados", []))
+    except Exception:
+        holidays = ()
+
+    written = export_reports(args.start, args.end, formats,
+                             out_dir=None if args.zip_path else args.out, zip_path=args.zip_path,
+                             holidays=holidays)
+    print(f"{len(written)} relatório(s) gerado(s) em {args.zip_path or args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Servidor PostgREST falso para testar o cliente resiliente (client.py) localmente.
+
+Serve as tabelas de um arquivo JSON ({"view_dashboard": [...], ...}) em
+/rest/v1/<tabela>, entendendo os filtros usados pelo dashboard
+(eq, gte, lte, gt, lt, in) e paginação (offset/limit ou header Range).
+Atrasos e erros podem ser injetados para simular a rede da planta.
+
+Uso:
+    python fake_server.py dados.json --port 54321 --delay 0.2 --jitter 1.5 --error-rate 0.1
+
+E no .streamlit/secrets.toml:
+    [supabase]
+    url = "http://localhost:54321"
+    role = "qualquer-chave"
+    hedge_after = 0.5
+"""
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qsl
+
+OPERATORS = {
+    "eq": lambda a, b: a == b,
+    "gte": lambda a, b: a >= b,
+    "lte": lambda a, b: a <= b,
+    "gt": lambda a, b: a > b,
+    "lt": lambda a, b: a < b,
+}
+
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+def apply_filters(rows, params):
+    for col, expr in params:
+        if col in RESERVED_PARAMS or "." not in expr:
+            continue
+        op, value = expr.split(".", 1)
+        if op == "in":
+            allowed = {v.strip('"') for v in value.strip("()").split(",")}
+            rows = [r for r in rows if str(r.get(col)) in allowed]
+        elif op in OPERATORS:
+            rows = [r for r in rows if r.get(col) is not None and OPERATORS[op](str(r.get(col)), value)]
+    return rows
+
+
+def project(rows, select):
+    """Aplica o select simples (colunas separadas por vírgula). Embeds são mantidos como estão no JSON."""
+    if not select or select.strip() == "*" or "(" in select:
+        return rows
+    cols = [c.strip() for c in select.split(",")]
+    return [{c: r.get(c) for c in cols} for r in rows]
+
+
+class FakeState:
+    def __init__(self, tables, delay=0.0, jitter=0.0, error_rate=0.0, fail_first=0):
+        self.tables = tables
+        self.delay = delay
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.fail_first = fail_first
+        self.requests = 0
+        self.lock = threading.Lock()
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, payload, headers=None):
+            body = json.dumps(payload, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            with state.lock:
+                state.requests += 1
+                n = state.requests
+
+            # Latência: atraso base + cauda longa ocasional
+            delay = state.delay
+            if state.jitter and random.random() < 0.1:
+                delay += random.uniform(0, state.jitter)
+            if delay:
+                time.sleep(delay)
+
+            if n <= state.fail_first or random.random() < state.error_rate:
+                self._send(503, {"message": "Serviço indisponível (injetado)", "code": "503"})
+                return
+
+            url = urlparse(self.path)
+            parts = url.path.strip("/").split("/")
+            if len(parts) != 3 or parts[:2] != ["rest", "v1"] or parts[2] not in state.tables:
+                self._send(404, {"message": f"Tabela não encontrada: {url.path}", "code": "PGRST205"})
+                return
+
+            params = parse_qsl(url.query, keep_blank_values=True)
+            rows = apply_filters(state.tables[parts[2]], params)
+            total = len(rows)
+
+            # Paginação: offset/limit ou Range: a-b
+            qs = dict(params)
+            start = int(qs.get("offset", 0))
+            end = start + int(qs["limit"]) - 1 if "limit" in qs else total - 1
+            if self.headers.get("Range"):
+                a, b = self.headers["Range"].split("-")
+                start, end = int(a), int(b)
+            rows = rows[start:end + 1]
+
+            self._send(200, project(rows, qs.get("select")), {"Content-Range": f"{start}-{start + len(rows) - 1}/{total}"})
+
+    return Handler
+
+
+def serve(tables, port=54321, **kwargs):
+    """Sobe o servidor em uma thread (para uso em testes). Retorna (server, state)."""
+    state = FakeState(tables, **kwargs)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PostgREST falso com atrasos e erros injetáveis")
+    parser.add_argument("fixture", help="JSON com {tabela: [linhas]}")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--delay", type=float, default=0.0, help="Atraso fixo por requisição (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Atraso extra máximo em 10%% das requisições (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fração de respostas 503")
+    parser.add_argument("--fail-first", type=int, default=0, help="Falha as N primeiras requisições")
+    args = parser.parse_args()
+
+    with open(args.fixture, "r", encoding="utf-8") as fh:
+        tables = json.load(fh)
+
+    server, _ = serve(tables, args.port, delay=args.delay, jitter=args.jitter,
+                      error_rate=args.error_rate, fail_first=args.fail_first)
+    print(f"PostgREST falso em http://127.0.0.1:{args.port}/rest/v1 ({', '.join(tables)})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,208 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# ==============================================================================
+# Motor de filtros do dashboard
+# ------------------------------------------------------------------------------
+# Os filtros da sidebar (equipamentos, áreas) e os recortes das abas (tipo,
+# turno, dia) eram máscaras `isin`/`==` sobre o ciclo inteiro a cada rerun.
+# O índice codifica cada dimensão uma única vez por snapshot do ciclo:
+#   - códigos inteiros por linha e, por valor, as posições das linhas
+#     (ordenação estável dos códigos + deslocamentos, como um CSR);
+#   - a máscara de uma seleção liga só as posições dos valores escolhidos
+#     (ou desliga as do complemento, o que for menor) e as dimensões se
+#     combinam por interseção (AND) das máscaras;
+#   - máscaras por dimensão e visões finais ficam memoizadas pela assinatura
+#     da seleção: mexer de novo em um filtro já visto não varre nada.
+# As visões devolvidas são compartilhadas: trate como somente leitura.
+# ==============================================================================
+
+DIMENSIONS = ['equipment_tag', 'equipment_area', 'maintenance_type', 'shift_name', 'date']
+
+# Visões e máscaras guardadas por índice (seleções mais recentes)
+MAX_VIEWS = 16
+MAX_MASKS = 64
+
+
+class _Dimension:
+    """Uma coluna codificada: códigos por linha e posições das linhas de cada valor."""
+
+    def __init__(self, series):
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy()
+            values = series.cat.categories
+        else:
+            codes, values = pd.factorize(series, sort=True)
+        self.is_datetime = pd.api.types.is_datetime64_any_dtype(values)
+        self.lookup = {self._normalize(v): i for i, v in enumerate(values)}
+        self.n_values = len(values)
+
+        self.codes = np.asarray(codes, dtype='int64')
+        # Nulos (-1) ficam fora de qualquer valor selecionado
+        valid = self.codes >= 0
+        self.order = np.flatnonzero(valid)[np.argsort(self.codes[valid], kind='stable')]
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(self.codes[valid], minlength=self.n_values))))
+        self.n_rows = len(self.codes)
+        self.null_rows = np.flatnonzero(~valid)
+
+    def _normalize(self, value):
+        return pd.Timestamp(value) if self.is_datetime else value
+
+    def codes_for(self, values):
+        """Códigos (frozenset) dos valores selecionados que existem no índice."""
+        codes = set()
+        for v in values:
+            code = self.lookup.get(self._normalize(v))
+            if code is not None:
+                codes.add(code)
+        return frozenset(codes)
+
+    def rows(self, code):
+        return self.order[self.offsets[code]:self.offsets[code + 1]]
+
+    def mask(self, codes):
+        """Máscara booleana das linhas com um dos códigos."""
+        selected_rows = sum(int(self.offsets[c + 1] - self.offsets[c]) for c in codes)
+        if selected_rows <= (self.n_rows - len(self.null_rows)) // 2:
+            mask = np.zeros(self.n_rows, dtype=bool)
+            for c in codes:
+                mask[self.rows(c)] = True
+        else:
+            # Seleção maior que a metade: parte de tudo e desliga o complemento
+            mask = np.ones(self.n_rows, dtype=bool)
+            for c in range(self.n_values):
+                if c not in codes:
+                    mask[self.rows(c)] = False
+            mask[self.null_rows] = False
+        return mask
+
+
+class FilterIndex:
+    """Índice de filtros de um DataFrame (um por snapshot do ciclo, ver get_filter_index)."""
+
+    def __init__(self, df, dimensions=DIMENSIONS):
+        self.df = df
+        self.dimensions = {col: _Dimension(df[col]) for col in dimensions if col in df.columns}
+        self._lock = threading.Lock()
+        self._masks = OrderedDict()   # (coluna, códigos) -> máscara
+        self._views = OrderedDict()   # assinatura -> DataFrame
+
+    def signature(self, selections):
+        """
+        Assinatura canônica de uma seleção: {coluna: valores} vira uma tupla
+        ordenada de (coluna, códigos). None ou todos os valores = sem filtro
+        naquela dimensão, então seleções equivalentes compartilham a visão.
+        """
+        parts = []
+        for col, values in selections.items():
+            if values is None:
+                continue
+            dim = self.dimensions[col]
+            if isinstance(values, (str, bytes)) or not hasattr(values, '__iter__'):
+                values = [values]
+            codes = dim.codes_for(values)
+            if len(codes) == dim.n_values and not len(dim.null_rows):
+                continue
+            parts.append((col, codes))
+        return tuple(sorted(parts, key=lambda p: p[0]))
+
+    def _mask(self, col, codes):
+        key = (col, codes)
+        with self._lock:
+            mask = self._masks.get(key)
+            if mask is not None:
+                self._masks.move_to_end(key)
+                return mask
+        mask = self.dimensions[col].mask(codes)
+        with self._lock:
+            self._masks[key] = mask
+            while len(self._masks) > MAX_MASKS:
+                self._masks.popitem(last=False)
+        return mask
+
+    def positions(self, signature):
+        """Posições (iloc) das linhas que atendem à assinatura."""
+        if not signature:
+            return np.arange(len(self.df))
+        # Um valor de uma dimensão: as posições já estão prontas (e ordenadas) no índice
+        col, codes = signature[0]
+        if len(signature) == 1 and len(codes) == 1:
+            return self.dimensions[col].rows(next(iter(codes)))
+        mask = None
+        for col, codes in signature:
+            m = self._mask(col, codes)
+            mask = m.copy() if mask is None else np.logical_and(mask, m, out=mask)
+        return np.flatnonzero(mask)
+
+    def view(self, **selections):
+        """
+        Linhas que atendem a todas as seleções (coluna=valores). Memoizada pela
+        assinatura; sem filtro efetivo devolve o próprio DataFrame.
+        """
+        signature = self.signature(selections)
+        if not signature:
+            return self.df
+        with self._lock:
+            view = self._views.get(signature)
+            if view is not None:
+                self._views.move_to_end(signature)
+                return view
+        return self._remember(signature, lambda: self.df.take(self.positions(signature)))
+
+    def split(self, col, **selections):
+        """
+        {valor de col: visão} dos valores presentes na seleção, em ordem (ex.: o
+        recorte por tipo da aba 1). Uma passada sobre as posições da seleção.
+        """
+        signature = self.signature(selections)
+        key = ("split", col, signature)
+        with self._lock:
+            parts = self._views.get(key)
+            if parts is not None:
+                self._views.move_to_end(key)
+                return parts
+
+        def build():
+            dim = self.dimensions[col]
+            pos = self.positions(signature)
+            codes = dim.codes[pos]
+            order = np.argsort(codes, kind='stable')
+            bounds = np.concatenate(([0], np.cumsum(np.bincount(codes[codes >= 0], minlength=dim.n_values))))
+            start = len(codes) - bounds[-1]   # nulos (-1) vêm primeiro na ordenação
+            values = list(dim.lookup)
+            return {values[c]: self.df.take(pos[order[start + bounds[c]:start + bounds[c + 1]]])
+                    for c in range(dim.n_values) if bounds[c + 1] > bounds[c]}
+
+        return self._remember(key, build)
+
+    def _remember(self, key, build):
+        value = build()
+        with self._lock:
+            self._views[key] = value
+            while len(self._views) > MAX_VIEWS:
+                self._views.popitem(last=False)
+        return value
+
+
+_index_lock = threading.Lock()
+_indexes = OrderedDict()   # id(df) -> (df, índice)
+MAX_INDEXES = 4
+
+
+def get_filter_index(df):
+    """Índice do DataFrame, reaproveitado enquanto o snapshot (o mesmo objeto) não muda."""
+    key = id(df)
+    with _index_lock:
+        entry = _indexes.get(key)
+        if entry is not None and entry[0] is df:
+            _indexes.move_to_end(key)
+            return entry[1]
+    index = FilterIndex(df)
+    with _index_lock:
+        _indexes[key] = (df, index)
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
@@ -0,0 +1,248 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+# ==============================================================================
+# Motor de intervalos dos impactos
+# ------------------------------------------------------------------------------
+# Um impacto das 22:00 às 06:00 pertence a dois dias (e a dois turnos). Cada
+# evento é recortado nas fronteiras de dia e de turno no horário da planta,
+# gerando "pedaços" com no máximo a duração de um segmento da grade diária.
+#
+# Como nenhum pedaço passa de MAX_PIECE, os pedaços que cruzam uma janela
+# [a, b) são os que começam em [a - MAX_PIECE, b): duas buscas binárias no
+# vetor de inícios ordenado, sem varrer o histórico todo.
+# ==============================================================================
+
+# Fuso da planta: os dias e turnos do relatório são no horário local
+PLANT_TZ = "America/Sao_Paulo"
+
+# Início de cada turno (hora local). O turno que começa às 22h atravessa a meia-noite.
+# Ajuste aos horários da planta.
+SHIFT_STARTS = [("Turno 1", 6), ("Turno 2", 14), ("Turno 3", 22)]
+
+# Grade diária: meia-noite + inícios de turno (em horas) e o turno de cada segmento
+_GRID_HOURS = np.array(sorted({0} | {h for _, h in SHIFT_STARTS}), dtype='int64')
+_GRID_NS = _GRID_HOURS * 3600 * 10**9
+_DAY_NS = 24 * 3600 * 10**9
+_GRID_END_NS = np.append(_GRID_NS[1:], _DAY_NS)
+_SEGMENTS_PER_DAY = len(_GRID_HOURS)
+
+
+def _shift_for_hour(hour):
+    starts = sorted(SHIFT_STARTS, key=lambda s: s[1])
+    current = starts[-1][0]  # antes do primeiro início, ainda é o último turno do dia anterior
+    for name, start in starts:
+        if hour >= start:
+            current = name
+    return current
+
+
+_SEGMENT_SHIFT = np.array([_shift_for_hour(h) for h in _GRID_HOURS], dtype=object)
+MAX_PIECE = pd.Timedelta(np.diff(np.append(_GRID_HOURS, 24)).max(), unit='h')
+
+# 'id' permite buscar depois os textos dos eventos exibidos (data.with_impact_texts)
+EVENT_COLUMNS = ['id', 'equipment_tag', 'Tipo', 'Categoria', 'Detalhe', 'description']
+
+
+def to_plant_time(series):
+    """Datetime sem fuso no horário da planta (valores sem fuso já são tratados como locais)."""
+    series = pd.to_datetime(series)
+    if series.dt.tz is not None:
+        series = series.dt.tz_convert(PLANT_TZ).dt.tz_localize(None)
+    return series.astype('datetime64[ns]')
+
+
+def split_intervals(starts, ends):
+    """
+    Recorta os intervalos [starts[i], ends[i]) na grade diária (dia + turnos).
+    Retorna (evento, início, fim, segmento do dia) de cada pedaço, tudo em arrays.
+    """
+    s = np.asarray(starts, dtype='datetime64[ns]').astype('int64')
+    e = np.asarray(ends, dtype='datetime64[ns]').astype('int64')
+    valid = e > s
+    event = np.flatnonzero(valid)
+    s, e = s[valid], e[valid]
+
+    # Segmento global = dia * segmentos_por_dia + posição na grade do dia
+    def segment_of(t):
+        day, offset = np.divmod(t, _DAY_NS)
+        return day * _SEGMENTS_PER_DAY + np.searchsorted(_GRID_NS, offset, side='right') - 1
+
+    first = segment_of(s)
+    last = segment_of(e - 1)
+    counts = last - first + 1
+
+    event = np.repeat(event, counts)
+    step = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    seg = np.repeat(first, counts) + step
+
+    day, pos = np.divmod(seg, _SEGMENTS_PER_DAY)
+    seg_start = day * _DAY_NS + _GRID_NS[pos]
+    seg_end = day * _DAY_NS + _GRID_END_NS[pos]
+
+    piece_start = np.maximum(np.repeat(s, counts), seg_start)
+    piece_end = np.minimum(np.repeat(e, counts), seg_end)
+    return event, piece_start.astype('datetime64[ns]'), piece_end.astype('datetime64[ns]'), pos
+
+
+class ImpactIndex:
+    """
+    Pedaços de impacto por dia/turno, ordenados pelo início e indexados por um
+    IntervalIndex [início, fim). Colunas: event, equipment_tag, Tipo, Categoria,
+    Detalhe, description, date, turno, horas.
+    """
+
+    def __init__(self, df_imp):
+        self._prefix = None
+        if df_imp.empty:
+            self.events = pd.DataFrame(columns=EVENT_COLUMNS)
+            self.pieces = pd.DataFrame(columns=['event'] + EVENT_COLUMNS + ['date', 'turno', 'horas'])
+            self._starts = np.array([], dtype='datetime64[ns]')
+            return
+
+        cols = [c for c in EVENT_COLUMNS if c in df_imp.columns]
+        self.events = df_imp[cols].reset_index(drop=True)
+        start = to_plant_time(df_imp['start_time'])
+        end = to_plant_time(df_imp['end_time'])
+
+        event, p_start, p_end, pos = split_intervals(start.to_numpy(), end.to_numpy())
+        order = np.argsort(p_start, kind='stable')
+        event, p_start, p_end, pos = event[order], p_start[order], p_end[order], pos[order]
+
+        pieces = self.events.iloc[event].reset_index(drop=True)
+        pieces.insert(0, 'event', event)
+        pieces['date'] = pd.DatetimeIndex(p_start).normalize()
+        pieces['turno'] = pd.Categorical(_SEGMENT_SHIFT[pos], categories=[n for n, _ in SHIFT_STARTS])
+        pieces['horas'] = (p_end - p_start).astype('int64') / 3.6e12
+        pieces.index = pd.IntervalIndex.from_arrays(p_start, p_end, closed='left')
+        self.pieces = pieces
+        self._starts = p_start
+
+    def window(self, start, end):
+        """Pedaços que cruzam [start, end), com as horas recortadas à janela."""
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        lo = np.searchsorted(self._starts, np.datetime64(start - MAX_PIECE, 'ns'), side='left')
+        hi = np.searchsorted(self._starts, np.datetime64(end, 'ns'), side='left')
+        out = self.pieces.iloc[lo:hi]
+        if out.empty:
+            return out.copy()
+        left = np.maximum(out.index.left.to_numpy(), np.datetime64(start, 'ns'))
+        right = np.minimum(out.index.right.to_numpy(), np.datetime64(end, 'ns'))
+        out = out[right > left].copy()
+        out['horas'] = (right[right > left] - left[right > left]).astype('int64') / 3.6e12
+        return out
+
+    def day(self, day):
+        """Um registro por evento com as horas que caíram no dia (formato do df_impacts_today)."""
+        start = pd.Timestamp(day).normalize()
+        pieces = self.window(start, start + pd.Timedelta(days=1))
+        if pieces.empty:
+            return pd.DataFrame(columns=self.events.columns.tolist() + ['horas', 'date'])
+        hours = pieces.groupby('event', sort=True)['horas'].sum()
+        out = self.events.loc[hours.index].copy()
+        out['horas'] = hours.to_numpy()
+        out['date'] = start.date()
+        return out.reset_index(drop=True)
+
+    def prefix_index(self):
+        """Índice de somas acumuladas (tag x categoria por dia), montado uma vez por índice."""
+        if self._prefix is None:
+            self._prefix = ImpactPrefixIndex(self.daily_hours())
+        return self._prefix
+
+    def tags_by_type(self):
+        """{Tipo: [tags]} para filtrar o índice de somas por tipo de manutenção."""
+        if self.events.empty:
+            return {}
+        pairs = self.events[['Tipo', 'equipment_tag']].astype(object).fillna('N/A').astype(str).drop_duplicates()
+        return {tipo: sorted(grp['equipment_tag']) for tipo, grp in pairs.groupby('Tipo')}
+
+    def daily_hours(self, by=('equipment_tag', 'Tipo', 'Categoria')):
+        """Horas por dia, turno e as dimensões de `by` (formato longo)."""
+        keys = ['date', 'turno'] + list(by)
+        return self.pieces.groupby(keys, observed=True, dropna=False)['horas'].sum().reset_index()
+
+
+class ImpactPrefixIndex:
+    """
+    Horas acumuladas por dia em um cubo (dia x tag x categoria):
+        cum[k] = soma das horas dos dias anteriores ao dia k
+    O total de qualquer janela [ini, fim] é cum[fim + 1] - cum[ini], uma
+    subtração por célula, para qualquer subconjunto de tags e categorias.
+    """
+
+    def __init__(self, daily):
+        daily = daily.copy()
+        for col in ['equipment_tag', 'Categoria', 'Tipo']:
+            daily[col] = daily[col].astype(object).fillna('N/A').astype(str)
+        daily = daily.groupby(['date', 'equipment_tag', 'Categoria'])['horas'].sum().reset_index()
+
+        self.tags = sorted(daily['equipment_tag'].unique())
+        self.categories = sorted(daily['Categoria'].unique())
+        self._tag_pos = {t: i for i, t in enumerate(self.tags)}
+        self._cat_pos = {c: i for i, c in enumerate(self.categories)}
+
+        if daily.empty:
+            self.first_day = pd.Timestamp.today().normalize()
+            self.cum = np.zeros((1, 0, 0))
+            return
+
+        self.first_day = daily['date'].min()
+        n_days = (daily['date'].max() - self.first_day).days + 1
+        cube = np.zeros((n_days + 1, len(self.tags), len(self.categories)))
+        d = (daily['date'] - self.first_day).dt.days.to_numpy() + 1
+        t = daily['equipment_tag'].map(self._tag_pos).to_numpy()
+        c = daily['Categoria'].map(self._cat_pos).to_numpy()
+        cube[d, t, c] = daily['horas'].to_numpy()
+        self.cum = np.cumsum(cube, axis=0)
+
+    def _row(self, day):
+        """Linha do cubo acumulado para o início de `day` (fora do histórico é recortado)."""
+        offset = (pd.Timestamp(day).normalize() - self.first_day).days
+        return min(max(offset, 0), self.cum.shape[0] - 1)
+
+    def window_matrix(self, start, end, tags=None, categories=None):
+        """Horas de start a end (inclusive) em um DataFrame tags x categorias."""
+        tags = self.tags if tags is None else [t for t in tags if t in self._tag_pos]
+        categories = self.categories if categories is None else [c for c in categories if c in self._cat_pos]
+        ti = [self._tag_pos[t] for t in tags]
+        ci = [self._cat_pos[c] for c in categories]
+        lo, hi = self._row(start), self._row(pd.Timestamp(end) + pd.Timedelta(days=1))
+        values = self.cum[hi][np.ix_(ti, ci)] - self.cum[lo][np.ix_(ti, ci)]
+        return pd.DataFrame(values, index=pd.Index(tags, name='equipment_tag'),
+                            columns=pd.Index(categories, name='Categoria'))
+
+    def history_matrix(self, tags=None, categories=None):
+        """Horas de todo o histórico (tags x categorias)."""
+        end = self.first_day + pd.Timedelta(days=self.cum.shape[0] - 1)
+        return self.window_matrix(self.first_day, end, tags, categories)
+
+    def pareto(self, start, end, by='Categoria', tags=None, categories=None):
+        """Ranking (Pareto) por categoria ou tag na janela: horas, % e % acumulado, em ordem decrescente."""
+        matrix = self.window_matrix(start, end, tags, categories)
+        totals = matrix.sum(axis=0 if by == 'Categoria' else 1)
+        totals = totals[totals > 0].sort_values(ascending=False)
+        out = totals.rename('horas').reset_index()
+        total = out['horas'].sum()
+        out['perc'] = out['horas'] / total * 100 if total else 0.0
+        out['perc_acum'] = out['perc'].cumsum()
+        return out
+
+
+_memo_lock = threading.Lock()
+_memo = (None, None)   # (frame de impactos usado, índice)
+
+
+def get_impact_index(df_imp):
+    """Índice do frame de impactos (remontado só quando o frame em cache muda)."""
+    global _memo
+    with _memo_lock:
+        frame, index = _memo
+        if frame is df_imp:
+            return index
+    index = ImpactIndex(df_imp)
+    with _memo_lock:
+        _memo = (df_imp, index)
+    return index
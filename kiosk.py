@@ -0,0 +1,285 @@
+"""
+Modo TV (kiosk) da Gestão à Vista.
+
+Um único renderizador por processo grava o painel da aba 1 como páginas HTML
+estáticas em static/kiosk/ (uma por área e o index.html com todas), servidas
+pelo próprio Streamlit em /app/static/kiosk/ (enableStaticServing em
+.streamlit/config.toml) ou por qualquer servidor web. As telas só baixam o
+arquivo: nenhuma sessão do Streamlit, nenhum rerun e nenhuma figura refeita
+por tela. O custo do servidor não depende do número de telas.
+
+As páginas só são regravadas quando os dados mudam (versão = hash dos frames
+do ciclo e das metas + data de referência). Cada tela consulta version.txt e
+recarrega quando a versão muda.
+
+Ligado no dashboard pela seção [kiosk] do secrets.toml:
+    enabled = true
+    interval = 30        # segundos entre as verificações de dados
+
+Uso avulso (cron ou serviço próprio):
+    python kiosk.py --once
+    python kiosk.py --interval 30
+"""
+import os
+import re
+import time
+import logging
+import argparse
+import threading
+import unicodedata
+from datetime import date, datetime, timedelta
+from html import escape
+
+import streamlit as st
+import plotly
+import plotly.io as pio
+import plotly.graph_objects as go
+
+from utils import get_fiscal_period
+from cache import make_key
+from ciclo import get_calendar
+from custom_cards import CARDS_CSS, cards_grid_html
+from charts import grouped_bar_figure, daily_line_figure
+from panel_model import build_panel_model
+from filters import get_filter_index
+from data import load_dashboard_bundle
+
+logger = logging.getLogger(__name__)
+
+KIOSK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "kiosk")
+KIOSK_URL = "/app/static/kiosk/"
+VERSION_FILE = "version.txt"
+
+# Renderizador: intervalo entre as verificações de dados. Telas: intervalo entre as consultas a version.txt
+POLL_SECONDS = 30
+SCREEN_CHECK_SECONDS = 30
+
+# Sem barra de ferramentas nem hover: a TV só exibe
+PLOT_CONFIG = {"staticPlot": True, "responsive": True, "displayModeBar": False}
+
+PAGE_CSS = """
+<style>
+    body { background-color: #0e1117; color: #fafafa; font-family: "Source Sans Pro", sans-serif; margin: 0; padding: 1.5rem 2rem; }
+    h1 { font-size: 1.8rem; margin: 0; }
+    h2 { font-size: 1.5rem; margin: 1.5rem 0 0.25rem 0; border-bottom: 1px solid #333; padding-bottom: 0.5rem; }
+    .kiosk-header { display: flex; justify-content: space-between; align-items: baseline; }
+    .kiosk-stamp, .kiosk-caption { color: #a0a0a0; font-size: 0.9rem; }
+    .kiosk-charts { display: grid; grid-template-columns: repeat(2, minmax(0, 1fr)); gap: 1rem; }
+    .kiosk-chart-title { font-size: 1.1rem; font-weight: 600; margin: 0.5rem 0; }
+</style>
+"""
+
+# Recarrega a página só quando o renderizador publica uma versão nova
+RELOAD_SCRIPT = """
+<script>
+setInterval(function () {{
+    fetch("{version_file}", {{cache: "no-store"}})
+        .then(function (r) {{ return r.ok ? r.text() : "{version}"; }})
+        .then(function (v) {{ if (v.trim() !== "{version}") {{ location.reload(); }} }})
+        .catch(function () {{}});
+}}, {interval_ms});
+</script>
+"""
+
+
+def slugify(name):
+    text = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-") or "area"
+
+
+def area_page_name(area):
+    return f"area-{slugify(area)}.html"
+
+
+def reference_date():
+    """Mesma data padrão do dashboard: o dia anterior."""
+    return date.today() - timedelta(days=1)
+
+
+def write_atomic(path, text):
+    """Grava em um temporário e troca de uma vez: a tela nunca lê um arquivo pela metade."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(text)
+    os.replace(tmp, path)
+
+
+def read_version():
+    try:
+        with open(os.path.join(KIOSK_DIR, VERSION_FILE), encoding="utf-8") as fh:
+            return fh.read().strip()
+    except OSError:
+        return None
+
+
+def ensure_plotlyjs():
+    """plotly.min.js gravado uma vez por versão do Plotly; as telas guardam no cache do navegador."""
+    name = f"plotly-{plotly.__version__}.min.js"
+    path = os.path.join(KIOSK_DIR, name)
+    if not os.path.exists(path):
+        from plotly.offline import get_plotlyjs
+        write_atomic(path, get_plotlyjs())
+    return name
+
+
+# ------------------------------------------------------------------------------
+# HTML
+# ------------------------------------------------------------------------------
+def figure_html(fig, div_id):
+    # Cópia: as figuras vêm do cache de charts.py e são compartilhadas com o dashboard.
+    # Fora do Streamlit não há tema aplicado no front-end, então o escuro vai na figura.
+    fig = go.Figure(fig)
+    fig.update_layout(template="plotly_dark", paper_bgcolor="#0e1117", plot_bgcolor="#0e1117")
+    return pio.to_html(fig, full_html=False, include_plotlyjs=False, div_id=div_id, config=PLOT_CONFIG)
+
+
+def panel_html(panel, ref_date, page_slug):
+    m_type = panel.name
+    fig_id = f"{page_slug}-{slugify(m_type)}"
+    parts = [f"<h2>🛠️ {escape(str(m_type))}</h2>"]
+    if panel.released:
+        released, cycle_total, business_days = panel.released
+        parts.append(
+            f'<div class="kiosk-caption">Liberado previsto (contrato) até {ref_date.strftime("%d/%m")}: '
+            f"<b>{released:,.0f}</b> de {cycle_total:,.0f} no ciclo · {business_days} dias úteis</div>"
+        )
+    parts.append(cards_grid_html(panel.sections))
+    parts.append('<div class="kiosk-charts">')
+    parts.append('<div><div class="kiosk-chart-title">Produção por Turno</div>'
+                 + figure_html(grouped_bar_figure(panel.by_shift, 'shift_name'), f"{fig_id}-turno") + "</div>")
+    parts.append('<div><div class="kiosk-chart-title">Produção por Equipamento</div>'
+                 + figure_html(grouped_bar_figure(panel.by_equipment, 'equipment_tag'), f"{fig_id}-equip") + "</div>")
+    parts.append("</div>")
+    if not panel.daily.empty:
+        parts.append(figure_html(daily_line_figure(panel.daily, f'Curva de Produção Diária - {m_type}'), f"{fig_id}-diario"))
+    return "\n".join(parts)
+
+
+def page_html(title, panels, ref_date, version, plotlyjs, page_slug):
+    c_start, c_end, label = get_fiscal_period(ref_date)
+    if panels:
+        body = "\n".join(panel_html(p, ref_date, page_slug) for p in panels)
+    else:
+        body = '<div class="kiosk-caption">Nenhuma meta contratual encontrada.</div>'
+    return f"""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<title>{escape(title)} · Gestão à Vista</title>
+<script src="{plotlyjs}"></script>
+{PAGE_CSS}
+{CARDS_CSS}
+</head>
+<body>
+<div class="kiosk-header">
+<h1>🚀 {escape(title)}</h1>
+<div class="kiosk-stamp">{escape(label)} ({c_start.strftime('%d/%m')} até {c_end.strftime('%d/%m')}) · referência {ref_date.strftime('%d/%m/%Y')} · atualizado às {datetime.now().strftime('%H:%M')}</div>
+</div>
+{body}
+{RELOAD_SCRIPT.format(version_file=VERSION_FILE, version=version, interval_ms=SCREEN_CHECK_SECONDS * 1000)}
+</body>
+</html>
+"""
+
+
+# ------------------------------------------------------------------------------
+# Renderização
+# ------------------------------------------------------------------------------
+def render_kiosk(ref_date=None, holidays=(), force=False):
+    """
+    Grava index.html (todas as áreas) e uma página por área quando os dados
+    mudaram desde a última versão publicada. Retorna os arquivos gravados
+    ([] quando nada mudou).
+    """
+    ref_date = ref_date or reference_date()
+    c_start, c_end, _ = get_fiscal_period(ref_date)
+    bundle = load_dashboard_bundle(c_start, c_end)
+    df_cycle, df_metrics = bundle.cycle, bundle.metrics
+
+    version = make_key("kiosk", (df_cycle, df_metrics, ref_date, tuple(holidays)), {})
+    if not force and version == read_version():
+        return []
+
+    os.makedirs(KIOSK_DIR, exist_ok=True)
+    plotlyjs = ensure_plotlyjs()
+    calendar = get_calendar(ref_date, holidays=list(holidays))
+
+    pages = {"index.html": ("Painel de Acompanhamento Contratual", df_metrics, {})}
+    if not df_metrics.empty:
+        for area in sorted(df_metrics['area'].dropna().unique()):
+            pages[area_page_name(area)] = (f"Área: {area}", df_metrics[df_metrics['area'] == area], {"equipment_area": [area]})
+
+    cycle_filter = get_filter_index(df_cycle) if not df_cycle.empty else None
+    for name, (title, metrics, selection) in pages.items():
+        panels = []
+        if cycle_filter is not None and not metrics.empty:
+            ops = cycle_filter.view(**selection)
+            if not ops.empty:
+                panels = build_panel_model(metrics, ops, calendar, ref_date,
+                                           cycle_filter.split('maintenance_type', **selection))
+        write_atomic(os.path.join(KIOSK_DIR, name), page_html(title, panels, ref_date, version, plotlyjs, name[:-5]))
+
+    # Áreas que saíram das metas não ficam com uma página congelada
+    for name in os.listdir(KIOSK_DIR):
+        if name.startswith("area-") and name.endswith(".html") and name not in pages:
+            os.remove(os.path.join(KIOSK_DIR, name))
+
+    # Por último: as telas só recarregam quando todas as páginas já estão gravadas
+    write_atomic(os.path.join(KIOSK_DIR, VERSION_FILE), version)
+    return list(pages)
+
+
+def run_renderer(stop, interval=POLL_SECONDS, holidays=()):
+    """Laço do renderizador: verifica os dados a cada `interval` s até `stop` ser sinalizado."""
+    while not stop.is_set():
+        try:
+            render_kiosk(holidays=holidays)
+        except Exception:
+            # Falha de rede/banco: version.txt não muda e as telas continuam com a última versão publicada
+            logger.exception("Modo TV: falha ao renderizar; mantida a versão %s", read_version())
+        stop.wait(interval)
+
+
+@st.cache_resource
+def start_kiosk_renderer():
+    """Liga o renderizador configurado em [kiosk] (uma thread por processo). Retorna o Event de parada."""
+    try:
+        config = dict(st.secrets.get("kiosk", {}))
+        holidays = tuple(st.secrets.get("ciclo", {}).get("feriados", []))
+    except Exception:
+        return None
+    if not config.get("enabled"):
+        return None
+    stop = threading.Event()
+    interval = float(config.get("interval", POLL_SECONDS))
+    threading.Thread(target=run_renderer, args=(stop, interval, holidays), name="kiosk-renderer", daemon=True).start()
+    return stop
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Modo TV: páginas estáticas da Gestão à Vista")
+    parser.add_argument("--once", action="store_true", help="Renderiza uma vez e sai")
+    parser.add_argument("--force", action="store_true", help="Regrava mesmo sem mudança nos dados")
+    parser.add_argument("--interval", type=float, default=POLL_SECONDS, help="Segundos entre as verificações")
+    parser.add_argument("--date", type=date.fromisoformat, help="Data de referência (padrão: ontem)")
+    args = parser.parse_args(argv)
+
+    try:
+        holidays = tuple(st.secrets.get("ciclo", {}).get("feriados", []))
+    except Exception:
+        holidays = ()
+
+    force = args.force
+    while True:
+        started = time.time()
+        written = render_kiosk(args.date, holidays, force=force)
+        force = False
+        if written:
+            print(f"{len(written)} página(s) gravada(s) em {KIOSK_DIR} ({time.time() - started:.1f}s)")
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import threading
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from utils import get_fiscal_period, iter_fiscal_cycles, to_date_column, compact_numeric
+from cache import cached
+from data import init_connection, load_cycle_partition, cycle_partitions, data_ttl
+
+# ==============================================================================
+# Livro de avanço acumulado por manutenção
+# ------------------------------------------------------------------------------
+# "Acumulado Realizado" e "Pendentes" precisam do histórico inteiro da
+# manutenção, que pode atravessar vários ciclos (ex.: uma retubagem iniciada
+# no ciclo anterior). Em vez de varrer todos os apontamentos, o livro junta:
+#   - base: realizado acumulado por manutenção (equipment_tag + maint_start_date)
+#     até o fim do último ciclo fechado, desde o primeiro apontamento (sem
+#     limite de ciclos). Uma entrada por ciclo de referência no cache
+#     compartilhado, somada a partir do realizado de cada ciclo fechado (também
+#     em cache) e invalidada pelo change feed quando qualquer um deles muda;
+#   - delta: realizado diário do ciclo da data de referência, agregado da
+#     partição que o dashboard já tem.
+# Quando só o ciclo corrente muda, o índice é remontado só com as linhas dele
+# sobre a base; a consulta é uma busca binária nas datas da manutenção.
+# ==============================================================================
+
+# Ciclos fechados quase não mudam; o change feed cobre as correções tardias
+LEDGER_TTL = 7 * 24 * 3600
+
+KEY_COLUMNS = ['equipment_tag', 'maint_start_date']
+LEDGER_COLUMNS = KEY_COLUMNS + ['date', 'quantity', 'total_tubos']
+BASE_COLUMNS = KEY_COLUMNS + ['quantity', 'total_tubos']
+PROGRESS_COLUMNS = ['equipment_tag', 'maint_start_date', 'total_tubos', 'acumulado', 'pendentes', 'perc']
+
+
+def maintenance_totals(rows):
+    """Realizado somado e total de tubos por manutenção (linhas do livro ou bases)."""
+    if rows.empty:
+        return pd.DataFrame(columns=BASE_COLUMNS)
+    return rows.groupby(KEY_COLUMNS, dropna=False, observed=True).agg(
+        quantity=('quantity', 'sum'), total_tubos=('total_tubos', 'max')
+    ).reset_index()
+
+
+def daily_ledger_rows(df):
+    """Realizado diário por manutenção a partir das linhas de produção."""
+    if df.empty:
+        return pd.DataFrame(columns=LEDGER_COLUMNS)
+    df = df.copy()
+    if 'total_tubos' not in df.columns:
+        df['total_tubos'] = 0
+    df['equipment_tag'] = df['equipment_tag'].astype(str)
+    return df.groupby(KEY_COLUMNS + ['date'], dropna=False, observed=True).agg(
+        quantity=('quantity', 'sum'), total_tubos=('total_tubos', 'max')
+    ).reset_index()
+
+
+# v2: entradas antigas no disco não têm total_tubos
+@cached("ledger_cycle_v2", ttl=LEDGER_TTL, partitions=cycle_partitions)
+def closed_cycle_ledger(cycle_start, cycle_end):
+    """Realizado diário por manutenção de um ciclo fechado (consulta só das colunas do livro)."""
+    response = init_connection().run(lambda c: c.table("view_dashboard")\
+        .select(",".join(LEDGER_COLUMNS))\
+        .gte("date", cycle_start.isoformat())\
+        .lte("date", cycle_end.isoformat()))
+
+    df = pd.DataFrame(response.data)
+    if df.empty:
+        return pd.DataFrame(columns=LEDGER_COLUMNS)
+    df['equipment_tag'] = df['equipment_tag'].fillna('N/A')
+    df['date'] = to_date_column(df['date'])
+    df['maint_start_date'] = to_date_column(df['maint_start_date'])
+    df['quantity'] = compact_numeric(df['quantity'])
+    df['total_tubos'] = compact_numeric(df['total_tubos'])
+    return daily_ledger_rows(df)
+
+
+class ProgressLedger:
+    """
+    Índice imutável: base acumulada dos ciclos fechados e, por manutenção, as
+    datas ordenadas do ciclo de referência com o realizado acumulado (base + ciclo).
+    Válido para os dias do ciclo de referência.
+    """
+
+    def __init__(self, rows, base=None):
+        rows = rows.sort_values(KEY_COLUMNS + ['date'], na_position='first').reset_index(drop=True)
+        rows['quantity'] = pd.to_numeric(rows['quantity'])  # Ciclo sem apontamentos: colunas object
+        self.dates = rows['date'].to_numpy(dtype='datetime64[ns]')
+        cumulative = rows.groupby(KEY_COLUMNS, dropna=False, sort=False)['quantity'].cumsum().to_numpy(dtype='int64')
+
+        # Linhas já ordenadas pela chave: cada manutenção do ciclo é uma fatia contígua [lo, hi)
+        bounds = rows.groupby(KEY_COLUMNS, dropna=False, sort=False).agg(
+            n=('date', 'size'), total_tubos=('total_tubos', 'max')
+        ).reset_index()
+        bounds['hi'] = bounds['n'].cumsum()
+        bounds['lo'] = bounds['hi'] - bounds['n']
+        bounds['offset'] = 0
+        bounds['order'] = np.arange(len(bounds))
+
+        if base is not None and not base.empty:
+            # Manutenções da base sem linhas no ciclo ficam com a fatia vazia e só o acumulado
+            carried = base[BASE_COLUMNS].rename(columns={'quantity': 'offset'})
+            carried = carried.assign(n=0, lo=np.nan, hi=np.nan, order=np.nan)
+            bounds = pd.concat([bounds, carried], ignore_index=True).groupby(KEY_COLUMNS, dropna=False).agg(
+                n=('n', 'sum'), total_tubos=('total_tubos', 'max'), offset=('offset', 'sum'),
+                lo=('lo', 'max'), hi=('hi', 'max'), order=('order', 'max'),
+            ).reset_index()
+            bounds[['lo', 'hi']] = bounds[['lo', 'hi']].fillna(0)
+
+            # Acumulado de cada linha do ciclo parte do realizado até o ciclo anterior
+            in_cycle = bounds[bounds['n'] > 0].sort_values('order')
+            cumulative = cumulative + np.repeat(in_cycle['offset'].to_numpy(dtype='int64'),
+                                                in_cycle['n'].to_numpy(dtype='int64'))
+            bounds = bounds.sort_values(KEY_COLUMNS, na_position='first')
+        self.cumulative = cumulative
+
+        # tag -> [(maint_start, início, fim, total_tubos, realizado até o ciclo anterior)] em ordem de início
+        self.maintenances = {}
+        for r in bounds.itertuples(index=False):
+            self.maintenances.setdefault(str(r.equipment_tag), []).append(
+                (r.maint_start_date, int(r.lo), int(r.hi), int(r.total_tubos), int(r.offset))
+            )
+
+    def _find(self, tag, day, maint_start=None):
+        entries = self.maintenances.get(str(tag), [])
+        if maint_start is not None and pd.notna(maint_start):
+            for entry in entries:
+                if pd.notna(entry[0]) and entry[0] == pd.Timestamp(maint_start):
+                    return entry
+        # Sem início informado: a manutenção mais recente iniciada até o dia
+        day = pd.Timestamp(day)
+        candidates = [e for e in entries if pd.isna(e[0]) or e[0] <= day]
+        return candidates[-1] if candidates else None
+
+    def executed_to_date(self, tag, day, maint_start=None):
+        entry = self._find(tag, day, maint_start)
+        if entry is None:
+            return 0
+        _, lo, hi, _, offset = entry
+        pos = np.searchsorted(self.dates[lo:hi], np.datetime64(pd.Timestamp(day), 'ns'), side='right')
+        return int(self.cumulative[lo + pos - 1]) if pos > 0 else offset
+
+    def progress(self, tag, day, maint_start=None):
+        """(total_tubos, acumulado realizado até o dia, pendentes, % concluído)."""
+        entry = self._find(tag, day, maint_start)
+        total = entry[3] if entry is not None else 0
+        executed = self.executed_to_date(tag, day, maint_start)
+        perc = (executed / total * 100) if total > 0 else 0
+        return total, executed, total - executed, perc
+
+    def progress_frame(self, tags, day, maint_starts=None):
+        """
+        Avanço de várias tags em um DataFrame (entra em chaves de cache, ex.: relatórios).
+        maint_starts: {tag: início da manutenção} do dia (ver maint_starts), como na aba 2.
+        """
+        maint_starts = maint_starts or {}
+        rows = [(tag, maint_starts.get(tag)) + self.progress(tag, day, maint_starts.get(tag)) for tag in tags]
+        return pd.DataFrame(rows, columns=PROGRESS_COLUMNS)
+
+
+def maint_starts(df_day):
+    """{tag: maint_start_date} do frame do dia (prepare_shift_dataframe): a manutenção que a aba 2 mostra."""
+    if df_day.empty or 'maint_start_date' not in df_day.columns:
+        return {}
+    return df_day.groupby('Tag', sort=False, observed=True)['maint_start_date'].first().to_dict()
+
+
+_memo_lock = threading.Lock()
+_memo = (None, None, None)   # (base, partição corrente usadas, livro)
+
+
+@cached("ledger_origin", ttl=data_ttl, partitions=lambda: {("dataset", "production")})
+def ledger_origin():
+    """Início do ciclo do apontamento mais antigo: até onde o livro volta."""
+    response = init_connection().run(lambda c: c.table("view_dashboard")\
+        .select("date")\
+        .order("date")\
+        .limit(1))
+    if not response.data:
+        return None
+    c_start, _, _ = get_fiscal_period(pd.Timestamp(response.data[0]["date"]).date())
+    return c_start
+
+
+def _closed_cycles(origin, cycle_start):
+    """Ciclos fechados (início, fim) de origin até o ciclo anterior a cycle_start."""
+    if origin is None or origin >= cycle_start:
+        return []
+    return [(c_start, c_end) for c_start, c_end, _ in iter_fiscal_cycles(origin, cycle_start - timedelta(days=1))]
+
+
+def _base_partitions(cycle_start, origin):
+    """A base soma todos os ciclos fechados: uma correção em qualquer um deles a invalida."""
+    parts = {("dataset", "production")}
+    for c_start, c_end in _closed_cycles(origin, cycle_start):
+        parts |= cycle_partitions(c_start, c_end)
+    return parts
+
+
+@cached("ledger_base_v1", ttl=LEDGER_TTL, partitions=_base_partitions)
+def closed_base(cycle_start, origin):
+    """Realizado acumulado por manutenção até o fim do ciclo anterior a cycle_start (BASE_COLUMNS)."""
+    frames = [maintenance_totals(closed_cycle_ledger(*c)) for c in _closed_cycles(origin, cycle_start)]
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=BASE_COLUMNS)
+    return maintenance_totals(pd.concat(frames, ignore_index=True))
+
+
+def get_ledger(reference_date):
+    """Livro de avanço válido para o ciclo de reference_date (base + delta do ciclo corrente)."""
+    global _memo
+    c_start, c_end, _ = get_fiscal_period(reference_date)
+    current = load_cycle_partition(c_start, c_end)
+    origin = ledger_origin()
+    base = closed_base(c_start, origin)
+
+    with _memo_lock:
+        memo_base, memo_current, ledger = _memo
+        if memo_base is base and memo_current is current:
+            return ledger
+
+    # Base lida pronta do cache compartilhado não consultou os ciclos: registra as
+    # partições deles para que uma correção chegue também às entradas de cada ciclo
+    for c in _closed_cycles(origin, c_start):
+        closed_cycle_ledger.track_partitions(*c)
+
+    ledger = ProgressLedger(daily_ledger_rows(current)[LEDGER_COLUMNS], base)
+    with _memo_lock:
+        _memo = (base, current, ledger)
+    return ledger
@@ -0,0 +1,64 @@
+from collections import namedtuple
+
+from custom_cards import area_kpis
+
+# ==============================================================================
+# Modelo do painel de Gestão à Vista
+# ------------------------------------------------------------------------------
+# O que a aba 1 mostra, por tipo de manutenção: previsto do contrato, cards
+# por área e as três agregações dos gráficos. A aba 1 do dashboard e o modo
+# TV (kiosk.py) desenham o mesmo modelo.
+# ==============================================================================
+
+PanelType = namedtuple("PanelType", [
+    "name",
+    "released",       # (liberado previsto até a data, total do ciclo, dias úteis) ou None sem meta contratual
+    "sections",       # [(área, cards de area_kpis)] para cards_grid_html
+    "by_shift",       # shift_name, quantity, meta_turno
+    "by_equipment",   # equipment_tag, quantity, meta_turno
+    "daily",          # date, quantity, meta_turno
+])
+
+
+def build_panel_model(df_metrics, df_ops, calendar, ref_date, ops_by_type=None):
+    """
+    Um PanelType por tipo de manutenção (ordem alfabética).
+    df_metrics: metas consolidadas (get_kpi_totals) já filtradas;
+    df_ops: apontamentos do ciclo já filtrados;
+    ops_by_type: {tipo: apontamentos} já recortado (filters.FilterIndex.split), se houver.
+    """
+    panel = []
+    for m_type in sorted(df_metrics['maintenance_type'].unique()):
+        released = None
+        if calendar.goal_per_shift(m_type):
+            released = (
+                calendar.released_to_date(ref_date, m_type),
+                calendar.cycle_total(ref_date, m_type),
+                calendar.business_days_to_date(ref_date),
+            )
+
+        df_metrics_type = df_metrics[df_metrics['maintenance_type'] == m_type]
+        if ops_by_type is not None:
+            df_op_type = ops_by_type.get(m_type, df_ops.iloc[0:0])
+        else:
+            df_op_type = df_ops[df_ops['maintenance_type'] == m_type]
+
+        # Meta Operacional do período filtrado (uma agregação para todas as áreas)
+        meta_por_area = df_op_type.groupby('equipment_area', observed=True)['meta_turno'].sum()
+        sections = []
+        for row in df_metrics_type.itertuples(index=False):
+            sections.append((row.area, area_kpis(
+                row.goal,                          # Garantia Mínima
+                row.released,                      # Liberado (Eng.)
+                row.done,                          # Executado (Campo)
+                meta_por_area.get(row.area, 0)     # Meta Operacional do período
+            )))
+
+        values = ['quantity', 'meta_turno']
+        panel.append(PanelType(
+            m_type, released, sections,
+            df_op_type.groupby('shift_name', observed=True)[values].sum().reset_index(),
+            df_op_type.groupby('equipment_tag', observed=True)[values].sum().reset_index(),
+            df_op_type.groupby('date')[values].sum().reset_index(),
+        ))
+    return panel
@@ -1,839 +1,709 @@
 from fpdf import FPDF
-import pandas as pd
 import os
 import matplotlib.pyplot as plt
-import tempfile
+from PIL import Image
 import re
-import math
-
-def create_pdf_report(df_day, df_history, date_str, df_impacts_history, df_impacts_today):
-    
-    # --- CORES ---
-    COLOR_PRIMARY = (37, 66, 230)
-    COLOR_SUCCESS = (46, 204, 113)
-    COLOR_DANGER = (231, 76, 60)
-    COLOR_BG_LIGHT = (245, 247, 250)
-    COLOR_CYAN = '#00bcd4'
-
-    class PDF(FPDF):
-        def header(self):
-            if os.path.exists("logo.png"):
-                self.image("logo.png", 10, 8, 30)
-            self.set_font('helvetica', 'B', 16)
-            self.set_text_color(*COLOR_PRIMARY)
-            self.cell(40) 
-            self.cell(0, 10, 'Relatório Diário de Produção', 0, 1, 'L')
-            self.ln(10)
 
-        def footer(self):
-            self.set_y(-15)
-            self.set_font('helvetica', 'I', 8)
-            self.set_text_color(150, 150, 150)
-            self.cell(0, 10, f'Pagina {self.page_no()}', 0, 0, 'C')
-
-    def md_to_html(text):
-        if not text or str(text) == "-": return "-"
-        text = str(text)
-        text = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', text)
-        text = re.sub(r'\*(.*?)\*', r'<i>\1</i>', text)
-        text = text.replace('\n-', '<br/> - ').replace('\n*', '<br/> - ')
-        return text
-
-    def generate_bar_chart(x_data, y_data, title):
-        fig, ax = plt.subplots(figsize=(7, 3.8))
-        bars = ax.bar(x_data, y_data, color=COLOR_CYAN)
-        
-        # Título e Estilização
-        ax.set_title(title, fontsize=11, fontweight='bold', pad=15)
-        plt.xticks(rotation=20, ha='right', fontsize=9)
-        
-        # --- AJUSTES SOLICITADOS ---
-        # 1. Adiciona rótulos de dados (labels) no topo das barras
-        ax.bar_label(bars, fmt='%.1fh', padding=3, fontsize=9, fontweight='bold', color='#444444')
-        
-        # 2. Remove valores e marcações do eixo Y
-        ax.get_yaxis().set_visible(False) 
-        
-        # Remove as bordas (spines) para um visual clean
+from utils import format_date
+from report_model import get_report_model
+
+# ==============================================================================
+# Relatórios em PDF
+# ------------------------------------------------------------------------------
+# Cada formato é um layout declarativo (página, cabeçalho, rodapé, cores e uma
+# lista de blocos). Os blocos desenham a partir do modelo de relatório
+# (report_model.py), que é agregado uma vez por dia/filtros/dados e
+# compartilhado por todos os formatos.
+# ==============================================================================
+
+COLOR_PRIMARY = (37, 66, 230)
+COLOR_CYAN = '#00bcd4'
+IMPACT_COLORS = ['#FF5733', '#33FF57', '#3357FF', '#F333FF', '#CCAC00', '#33FFF3',
+                 '#8C564B', '#E377C2', '#7F7F7F', '#17BECF', '#BCBD22', '#1F77B4']
+
+# Saída compacta: gráficos em imagem indexada (paleta) e reduzidos ao tamanho em
+# que são desenhados. O FPDF identifica imagens em memória pelo hash do conteúdo
+# (e arquivos pelo caminho), então um gráfico idêntico ou o logo do cabeçalho
+# são embutidos uma única vez no arquivo.
+CHART_PALETTE_COLORS = 64
+OVERSIZED_IMAGES_RATIO = 2   # pixels por ponto mantidos ao reduzir imagens grandes
+
+# Layout do A3 (mm): área útil da grade de cartões e altura mínima de um cartão
+A3_GRID_TOP = 56
+A3_GRID_BOTTOM = 285
+A3_CARD_MIN_HEIGHT = 36
+A3_SHIFT_ROW_HEIGHT = 6
+A3_LEGEND_PER_ROW = 6
+A3_LEGEND_MAX_ROWS = 3
+
+
+# ------------------------------------------------------------------------------
+# Utilitários de texto e gráficos
+# ------------------------------------------------------------------------------
+def clean_unicode(text):
+    if not text: return ""
+    return str(text).replace('•', '-').replace('·', '-').replace('•', '-')
+
+
+def md_to_html(text, bullet=' - '):
+    """Markdown simples das observações (negrito, itálico, listas) para o HTML do FPDF."""
+    if not text or str(text) == "-": return "-"
+    text = clean_unicode(str(text))
+    text = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', text)
+    text = re.sub(r'\*(.*?)\*', r'<i>\1</i>', text)
+    text = text.replace('\n-', '<br/> - ').replace('\n*', f'<br/>{bullet}')
+    return text
+
+
+def hex_to_rgb(color):
+    h = color.lstrip('#')
+    return tuple(int(h[j:j+2], 16) for j in (0, 2, 4))
+
+
+def palette_image(fig):
+    """Figura do matplotlib rasterizada direto do canvas em imagem indexada (sem pontilhado)."""
+    fig.canvas.draw()
+    img = Image.frombuffer('RGBA', fig.canvas.get_width_height(), fig.canvas.buffer_rgba()).convert('RGB')
+    return img.quantize(colors=CHART_PALETTE_COLORS, method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+
+
+def bar_chart_image(x_data, y_data, title, color=COLOR_CYAN, figsize=(7, 3.8), dpi=150,
+                  title_size=11, title_pad=15, rotation=20, labels=None, clean=True, alpha=1.0):
+    """Gráfico de barras do matplotlib como imagem indexada (ver palette_image)."""
+    c_plt = tuple(c / 255 for c in color) if isinstance(color, tuple) else color
+    fig, ax = plt.subplots(figsize=figsize, dpi=dpi, facecolor='white')
+    bars = ax.bar([str(x) for x in x_data], list(y_data), color=c_plt, alpha=alpha)
+    ax.set_title(title, fontsize=title_size, fontweight='bold', pad=title_pad)
+    plt.xticks(rotation=rotation, ha='right', fontsize=9)
+
+    if labels is not None:
+        # Rótulos de dados no topo das barras
+        ax.bar_label(bars, labels=labels, padding=3, fontsize=9, fontweight='bold', color='#444444')
+    if clean:
+        # Sem eixo Y e sem bordas: visual limpo
+        ax.get_yaxis().set_visible(False)
         for spine in ['top', 'right', 'left']:
             ax.spines[spine].set_visible(False)
-            
-        plt.tight_layout()
-        
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
-        plt.savefig(temp_file.name, format='png', dpi=150)
-        plt.close(fig)
-        return temp_file.name
-
-    pdf = PDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-
-    unique_types = sorted(df_day['Tipo'].unique())
-
-    for m_type in unique_types:
-        # Página de Título do Tipo
-        pdf.add_page()
-        pdf.set_y(100)
-        pdf.set_font("helvetica", "B", 24)
-        pdf.set_text_color(40, 40, 40)
-        pdf.cell(0, 20, m_type.upper(), 0, 1, 'C')
-        
-        df_type_subset = df_day[df_day['Tipo'] == m_type]
-
-        for tag in sorted(df_type_subset['Tag'].unique()):
-            pdf.add_page()
-            
-            pdf.set_font("helvetica", "B", 14)
-            pdf.set_text_color(*COLOR_PRIMARY)
-            pdf.cell(0, 10, f"Equipamento: {tag}", "B", 1)
-            pdf.ln(5)
 
-            df_tag_day = df_type_subset[df_type_subset['Tag'] == tag]
-            
-            for _, row in df_tag_day.iterrows():
-                # --- LÓGICA DE CARD DINÂMICO ---
-                gap = row['Desvio']
-                status_color = COLOR_SUCCESS if gap >= 0 else COLOR_DANGER
-                status_text = "META BATIDA" if gap >= 0 else "ABAIXO DA META"
-                obs_html = md_to_html(row['Observações'])
-
-                # 1. Verificar quebra de página
-                if pdf.get_y() > 220:
-                    pdf.add_page()
-
-                # Guardamos a posição inicial
-                start_y = pdf.get_y()
-
-                # PASSO A: Simular a altura (usando uma margem invisível ou calculando linhas)
-                # No FPDF2, multi_cell pode retornar a altura, mas write_html não.
-                # Vamos estimar a altura baseada no conteúdo:
-                # Turno(8) + Stats(6) + Obs(estimado) + padding(5)
-                # Uma forma precisa é usar 'split_only=True' se disponível, 
-                # mas vamos desenhar o fundo primeiro com uma estimativa segura ou usar multi_cell
-                
-                # Vamos usar um bloco de texto invisível para medir a altura se necessário,
-                # ou simplesmente desenhar o fundo após calcular o fim.
-                
-                # --- NOVA ESTRATÉGIA: Escrever conteúdo e capturar Y, depois desenhar atrás ---
-                # Para o Streamlit/FPDF2, a forma mais segura de "desenhar atrás" é:
-                # 1. Salvar start_y
-                # 2. Escrever o texto real
-                # 3. Pegar end_y
-                # 4. Usar pdf.rect(...) ANTES de pular para o próximo card (ele ficará por cima se não tomarmos cuidado)
-                
-                # CORREÇÃO DEFINITIVA: 
-                # Vamos desenhar o retângulo primeiro com uma altura estimada 
-                # OU usar o método de renderização em buffer.
-                
-                # Vamos estimar: Cada 100 caracteres de Obs ~ 5mm de altura + Turno/Stats (15mm)
-                est_height = 15 + (len(obs_html) / 90 * 5) + 10
-                
-                # Desenha o fundo PRIMEIRO
-                pdf.set_fill_color(*COLOR_BG_LIGHT)
-                # Não sabemos a altura exata ainda, então vamos escrever o texto 
-                # e usar o truque de desenhar o retângulo na posição anterior.
-                
-                # --- Execução real ---
-                # Escrevemos o texto e guardamos a posição final
-                pdf.set_text_color(0, 0, 0)
-                pdf.set_font("helvetica", "B", 10)
-                pdf.set_x(15)
-                pdf.cell(50, 8, str(row['Turno']), 0, 0)
-                
-                pdf.set_font("helvetica", "B", 8)
-                pdf.set_text_color(*status_color)
-                pdf.cell(0, 8, status_text, 0, 1, 'R')
-                
-                pdf.set_x(15)
-                pdf.set_font("helvetica", "", 9)
-                pdf.set_text_color(80, 80, 80)
-                pdf.cell(0, 6, f"Realizado: {row['Realizado']} / Meta: {row['Meta']} / Desvio: {gap:+}", 0, 1)
-                
-                pdf.set_x(15)
-                pdf.set_text_color(50, 50, 50)
-                pdf.write_html(f"<b>Obs:</b></br> {obs_html}")
-                pdf.ln(5)
-                
-                end_y = pdf.get_y()
-                total_h = end_y - start_y
-
-                # AGORA desenhamos o retângulo na posição start_y, mas usando o parâmetro de estilo
-                # que não sobrescreve o texto (ou movendo o desenho para uma camada inferior)
-                # Como FPDF não tem camadas, o segredo é desenhar o RECT antes de escrever.
-                # Vamos refazer a lógica:
-                
-                pdf.set_y(start_y) # Volta para o topo do card
-                pdf.set_fill_color(*COLOR_BG_LIGHT)
-                pdf.rect(10, start_y, 190, total_h, 'F') # Desenha fundo
-                pdf.set_fill_color(*status_color)
-                pdf.rect(10, start_y, 2, total_h, 'F') # Desenha barra
-                
-                # Re-escreve o texto POR CIMA (agora ele aparece)
-                pdf.set_text_color(0, 0, 0)
-                pdf.set_font("helvetica", "B", 10)
-                pdf.set_x(15)
-                pdf.cell(50, 8, str(row['Turno']), 0, 0)
-                pdf.set_font("helvetica", "B", 8)
-                pdf.set_text_color(*status_color)
-                pdf.cell(0, 8, status_text, 0, 1, 'R')
-                pdf.set_x(15)
-                pdf.set_font("helvetica", "", 9)
-                pdf.set_text_color(80, 80, 80)
-                pdf.cell(0, 6, f"Realizado: {row['Realizado']} / Meta: {row['Meta']} / Desvio: {gap:+}", 0, 1)
-                pdf.set_x(15)
-                pdf.set_text_color(50, 50, 50)
-                pdf.write_html(f"<b>Obs:</b><br/><br/> {obs_html} <br/><br/>")
-                pdf.ln(5)
-                
-                pdf.set_y(end_y + 5) # Pula para o próximo
-
-            # Gráficos e Resumo seguem a mesma lógica...
-            if not df_impacts_history.empty:
-                df_tag_hist = df_impacts_history[df_impacts_history['equipment_tag'] == tag]
-                if not df_tag_hist.empty:
-                    if pdf.get_y() > 180: pdf.add_page()
-                    grp = df_tag_hist.groupby('Categoria')['horas'].sum()
-                    img = generate_bar_chart(grp.index, grp.values, f"Historico de Impactos: {tag}")
-                    pdf.image(img, x=25, w=160)
-                    os.remove(img)
-
-    # --- RESUMO GERAL ---
-    if not df_impacts_today.empty:
-        pdf.add_page()
-        pdf.set_font("helvetica", "B", 16)
-        pdf.set_text_color(*COLOR_PRIMARY)
-        pdf.cell(0, 15, "RESUMO GERAL DE IMPACTOS DO DIA", 0, 1, 'C')
-        grp_geral = df_impacts_today.groupby('equipment_tag')['horas'].sum().sort_values(ascending=False)
-        img_resumo = generate_bar_chart(grp_geral.index, grp_geral.values, "Horas Paradas por Equipamento")
-        pdf.image(img_resumo, x=25, w=160)
-        os.remove(img_resumo)
-        pdf.ln(10)
-        pdf.set_font("helvetica", "B", 12)
-        pdf.set_text_color(0,0,0)
-        pdf.cell(0, 10, "Detalhamento dos Eventos:", 0, 1)
-        for _, row in df_impacts_today.iterrows():
-            pdf.write_html(f"- <b>{row['equipment_tag']}</b> ({row['Categoria']}): {round(row['horas'], 2)}h")
-            pdf.ln(2)
-
-    return bytes(pdf.output())
-
-def create_one_page_type_report(df_day, df_history, date_str, df_impacts_history, df_impacts_today):
-    # --- PALETA DE CORES ---
-    COLOR_PRIMARY = (37, 66, 230)
-    COLOR_BG_ZEBRA_1 = (255, 255, 255) 
-    COLOR_BG_ZEBRA_2 = (240, 244, 255) 
-    COLOR_SUCCESS = (38, 186, 164)
-    COLOR_DANGER = (239, 68, 68)
-    
-    class PDF(FPDF):
-        def header(self):
+    plt.tight_layout()
+    img = palette_image(fig)
+    plt.close(fig)
+    return img
+
+
+def paginate_cards(heights, top=A3_GRID_TOP, bottom=A3_GRID_BOTTOM, gap=1):
+    """Distribui cartões de alturas dadas em páginas. Retorna [[índices da página], ...]."""
+    pages, current, y = [], [], top
+    for i, h in enumerate(heights):
+        if current and y + h > bottom:
+            pages.append(current)
+            current, y = [], top
+        current.append(i)
+        y += h + gap
+    if current:
+        pages.append(current)
+    return pages
+
+
+# ------------------------------------------------------------------------------
+# Documento: cabeçalho e rodapé vêm do layout
+# ------------------------------------------------------------------------------
+class ReportPDF(FPDF):
+    def __init__(self, layout, date_str):
+        super().__init__(orientation=layout['orientation'], unit='mm', format=layout['format'])
+        self.layout = layout
+        self.date_str = date_str
+        self.colors = layout['colors']
+        self.set_compression(True)
+        self.oversized_images = "DOWNSCALE"
+        self.oversized_images_ratio = OVERSIZED_IMAGES_RATIO
+        if layout.get('auto_break') is None:
+            self.set_auto_page_break(False)
+        else:
+            self.set_auto_page_break(auto=True, margin=layout['auto_break'])
+
+    def header(self):
+        spec = self.layout.get('header')
+        if not spec:
+            return
+        title = spec['title'].format(date=self.date_str)
+        if spec['style'] == 'banner':
+            # Faixa azul com o título em branco
             self.set_fill_color(*COLOR_PRIMARY)
-            self.rect(0, 0, 420, 20, 'F')
-            self.set_xy(15, 5)
-            self.set_font('helvetica', 'B', 16)
+            self.rect(0, 0, 420, spec['height'], 'F')
+            self.set_xy(15, spec['y'])
+            self.set_font('helvetica', 'B', spec['size'])
             self.set_text_color(255, 255, 255)
-            self.cell(0, 10, f"DASHBOARD EXECUTIVO A3 | TIPO DE ATIVO | REFERÊNCIA: {date_str}", 0, 1, 'L')
-
-    def clean_unicode(text):
-        if not text: return ""
-        return str(text).replace('•', '-').replace('·', '-').replace('\u2022', '-')
-
-    def md_to_html(text):
-        if not text or str(text) == "-": return "-"
-        text = clean_unicode(str(text))
-        text = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', text)
-        text = re.sub(r'\*(.*?)\*', r'<i>\1</i>', text)
-        text = text.replace('\n-', '<br/> - ').replace('\n*', '<br/> - ')
-        return text
-
-    def generate_side_chart(df, x, y, labels_list, title, color):
-        c_plt = tuple(c/255 for c in color) if isinstance(color, tuple) else color
-        fig, ax = plt.subplots(figsize=(6, 4.5))
-        bars = ax.bar(df[x], df[y], color=c_plt, alpha=0.8)
-        ax.set_title(title, fontsize=14, fontweight='bold', pad=25)
-        
-        for bar, label in zip(bars, labels_list):
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                    label, ha='center', va='bottom', fontsize=10, fontweight='bold')
+            self.cell(spec.get('width', 0), 10, title, 0, spec.get('ln', 0), 'L')
+        else:
+            if os.path.exists("logo.png"):
+                self.image("logo.png", 10, 8, spec['logo_w'])
+            self.set_font('helvetica', 'B', spec['size'])
+            self.set_text_color(*COLOR_PRIMARY)
+            self.cell(spec['logo_w'] + 10)
+            if spec.get('show_date'):
+                self.cell(0, 10, title, 0, 0, 'L')
+                self.set_font('helvetica', '', 10)
+                self.set_text_color(120, 120, 120)
+                self.cell(0, 10, f'Data: {self.date_str}  ', 0, 1, 'R')
+                self.set_draw_color(*COLOR_PRIMARY)
+                self.line(10, 22, self.w - 10, 22)
+            else:
+                self.cell(0, 10, title, 0, 1, 'L')
+            self.ln(10)
 
-        ax.get_yaxis().set_visible(False)
-        for spine in ['top', 'right', 'left']: ax.spines[spine].set_visible(False)
-        plt.xticks(rotation=15, ha='right')
-        plt.tight_layout()
-        
-        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
-        plt.savefig(tmp.name, format='png', dpi=150, transparent=True)
-        plt.close(fig)
-        return tmp.name
-
-    pdf = PDF(orientation='L', unit='mm', format='A3')
-    
-    for m_type in sorted(df_day['Tipo'].unique()):
-        pdf.add_page()
-        df_type = df_day[df_day['Tipo'] == m_type]
-        
-        # --- 1. ÁREA DE SCORECARDS (KPIs DE TOPO) ---
-        real_total = df_type['Realizado'].sum()
-        meta_total = df_type['Meta'].sum()
-        perc_total = (real_total / meta_total * 100) if meta_total > 0 else 0
-        hrs_impacto = df_impacts_today[df_impacts_today['Tipo'] == m_type]['horas'].sum()
-
-        kpi_w = 95
-        positions = [15, 115, 215, 315]
-        kpis = [
-            ("PRODUÇÃO TOTAL", f"{real_total:,.0f}"),
-            ("META GLOBAL", f"{meta_total:,.0f}"),
-            ("EFICIÊNCIA", f"{perc_total:.1f}%"),
-            ("TOTAL PARADAS", f"{hrs_impacto:.1f}h")
-        ]
-        
-        for i, (label, val) in enumerate(kpis):
-            x_pos = positions[i]
-            pdf.set_draw_color(220, 220, 220)
-            pdf.set_fill_color(255, 255, 255)
-            pdf.rect(x_pos, 30, kpi_w, 20, 'FD')
-            
-            pdf.set_xy(x_pos, 32)
-            pdf.set_font("helvetica", "B", 9)
-            pdf.set_text_color(100, 100, 100)
-            pdf.cell(kpi_w, 5, label, 0, 1, 'C')
-            
-            pdf.set_font("helvetica", "B", 14)
-            # Cor condicional: eficiência azul/verde, paradas vermelho
-            color_text = COLOR_PRIMARY if i < 2 else (COLOR_SUCCESS if i == 2 else COLOR_DANGER)
-            pdf.set_text_color(*color_text)
-            pdf.set_x(x_pos)
-            pdf.cell(kpi_w, 8, val, 0, 1, 'C')
-
-        # --- 2. LADO ESQUERDO: GRÁFICOS ---
-        df_p = df_type.groupby('Tag')['Realizado'].sum().reset_index()
-        custom_labels = []
-        for tag in df_p['Tag']:
-            hist = df_history[df_history['equipment_tag'] == tag]
-            total = hist['total_tubos'].max() if 'total_tubos' in hist.columns else 1
-            acum = hist['quantity'].sum()
-            p = (acum / total * 100) if total > 0 else 0
-            val_r = df_p[df_p['Tag'] == tag]['Realizado'].values[0]
-            custom_labels.append(f"{val_r:,.0f}\n({p:.1f}%)")
-
-        img_prod = generate_side_chart(df_p, 'Tag', 'Realizado', custom_labels, "Produção vs Avanço Acumulado", COLOR_PRIMARY)
-        pdf.image(img_prod, x=10, y=60, w=130)
-        
-        df_i = df_impacts_today[df_impacts_today['Tipo'] == m_type].groupby('equipment_tag')['horas'].sum().reset_index()
-        if not df_i.empty:
-            labels_i = [f"{h:.1f}h" for h in df_i['horas']]
-            img_imp = generate_side_chart(df_i, 'equipment_tag', 'horas', labels_i, "Impactos do Dia (Horas)", COLOR_DANGER)
-            pdf.image(img_imp, x=10, y=155, w=130)
-        
-        # --- 3. LADO DIREITO: TABELA E RECOMENDAÇÕES ---
-        pdf.set_xy(145, 60)
-        pdf.set_font("helvetica", "B", 12)
-        pdf.set_text_color(*COLOR_PRIMARY)
-        pdf.cell(0, 10, f"DETALHAMENTO OPERACIONAL - {m_type.upper()}", 0, 1, 'L')
-        
-        headers = [("TAG", 40), ("TURNO (AMPLIADO)", 65), ("REAL", 35), ("META", 35), ("DESVIO", 35)]
-        pdf.set_x(145)
-        pdf.set_fill_color(*COLOR_PRIMARY)
-        pdf.set_text_color(255, 255, 255)
-        for h, w in headers: pdf.cell(w, 10, h, 1, 0, 'C', fill=True)
-        pdf.ln()
+    def footer(self):
+        spec = self.layout.get('footer')
+        if not spec:
+            return
+        self.set_y(spec['y'])
+        self.set_font('helvetica', 'I', 8)
+        self.set_text_color(150, 150, 150)
+        self.cell(0, spec['height'], spec['text'].format(page=self.page_no()), 0, 0, 'C')
+
+
+# ------------------------------------------------------------------------------
+# Blocos
+# ------------------------------------------------------------------------------
+# Cada bloco recebe (pdf, model, ctx, **opções do layout). Blocos compostos
+# (per_type, per_tag) repetem os blocos filhos para cada tipo/equipamento,
+# passando a seção atual em ctx.
+
+def block_per_type(pdf, model, ctx, blocks):
+    for section in model.types:
+        render_blocks(pdf, model, dict(ctx, section=section), blocks)
+
+
+def block_per_tag(pdf, model, ctx, blocks):
+    for tag in ctx['section'].tags:
+        render_blocks(pdf, model, dict(ctx, tag=tag), blocks)
+
+
+def block_type_cover(pdf, model, ctx, y, size, height, line=None):
+    """Página de título do tipo de manutenção."""
+    pdf.add_page()
+    pdf.set_y(y)
+    pdf.set_font("helvetica", "B", size)
+    pdf.set_text_color(40, 40, 40)
+    pdf.cell(0, height, clean_unicode(str(ctx['section'].name).upper()), 0, 1, 'C')
+    if line:
+        pdf.set_draw_color(*COLOR_PRIMARY)
+        pdf.line(*line)
 
-        pdf.set_font("helvetica", "", 10)
-        unique_tags = df_type['Tag'].unique()
-        tag_colors = {tag: (COLOR_BG_ZEBRA_1 if i % 2 == 0 else COLOR_BG_ZEBRA_2) for i, tag in enumerate(unique_tags)}
 
-        for _, row in df_type.iterrows():
-            pdf.set_x(145)
-            pdf.set_fill_color(*tag_colors[row['Tag']])
-            pdf.set_text_color(0, 0, 0)
-            
-            pdf.cell(40, 9, str(row['Tag']), 1, 0, 'C', fill=True)
-            pdf.cell(65, 9, str(row['Turno']), 1, 0, 'C', fill=True)
-            pdf.cell(35, 9, f"{row['Realizado']:,.0f}", 1, 0, 'C', fill=True)
-            pdf.cell(35, 9, f"{row['Meta']:,.0f}", 1, 0, 'C', fill=True)
-            
-            d = row['Desvio']
-            pdf.set_text_color(*(COLOR_DANGER if d < 0 else COLOR_SUCCESS))
-            pdf.cell(35, 9, f"{d:+.0f}", 1, 1, 'C', fill=True)
-
-        # --- 4. ANÁLISE E RECOMENDAÇÕES (INTEGRADO NO GRID) ---
-        pdf.set_y(pdf.get_y() + 8)
-        pdf.set_x(145)
-        pdf.set_font("helvetica", "B", 11)
-        pdf.set_text_color(*COLOR_PRIMARY)
-        pdf.cell(0, 8, "ANÁLISE DE OCORRÊNCIAS E RECOMENDAÇÕES", 0, 1, 'L')
-        
-        pdf.set_x(145)
-        pdf.set_font("helvetica", "I", 10)
-        pdf.set_text_color(50, 50, 50)
-        
-        obs_list = df_type[df_type['Observações'] != '-']['Observações'].unique()
-        txt_obs = "<br/>".join([f"- {clean_unicode(o)}" for o in obs_list]) if len(obs_list) > 0 else "Nenhuma intercorrência crítica registrada."
-        
-        # O A3 permite uma multi_cell larga sem estourar
-        pdf.write_html(f"<div style='margin-left: 145mm;'>{txt_obs}</div>")
-
-        os.remove(img_prod)
-        if not df_i.empty: os.remove(img_imp)
-
-    return bytes(pdf.output())
-    
-    for m_type in sorted(df_day['Tipo'].unique()):
-        pdf.add_page()
-        df_type = df_day[df_day['Tipo'] == m_type]
-        
-        # --- LADO ESQUERDO: GRÁFICOS ---
-        df_p = df_type.groupby('Tag')['Realizado'].sum().reset_index()
-        custom_labels = []
-        for tag in df_p['Tag']:
-            hist = df_history[df_history['equipment_tag'] == tag]
-            total = hist['total_tubos'].max() if 'total_tubos' in hist.columns else 1
-            acum = hist['quantity'].sum()
-            perc = (acum / total * 100) if total > 0 else 0
-            val_real = df_p[df_p['Tag'] == tag]['Realizado'].values[0]
-            custom_labels.append(f"{val_real:,.0f}\n({perc:.1f}%)")
-
-        img_prod = generate_side_chart(df_p, 'Tag', 'Realizado', custom_labels, f"Produção e Avanço - {m_type}", COLOR_PRIMARY)
-        pdf.image(img_prod, x=10, y=30, w=130)
-        
-        df_i = df_impacts_today[df_impacts_today['Tipo'] == m_type].groupby('equipment_tag')['horas'].sum().reset_index()
-        if not df_i.empty:
-            labels_i = [f"{h:.1f}h" for h in df_i['horas']]
-            img_imp = generate_side_chart(df_i, 'equipment_tag', 'horas', labels_i, "Impactos por TAG (Horas)", COLOR_DANGER)
-            pdf.image(img_imp, x=10, y=140, w=130)
-        
-        # --- LADO DIREITO: TABELA ---
-        pdf.set_xy(145, 30)
-        pdf.set_font("helvetica", "B", 12)
-        pdf.set_text_color(*COLOR_PRIMARY)
-        pdf.cell(0, 10, "DETALHAMENTO OPERACIONAL", 0, 1, 'L')
-        
-        headers = [("TAG", 40), ("TURNO", 65), ("REAL", 35), ("META", 35), ("DESVIO", 35)]
-        pdf.set_x(145)
-        pdf.set_fill_color(*COLOR_PRIMARY)
-        pdf.set_text_color(255, 255, 255)
-        for h, w in headers:
-            pdf.cell(w, 10, h, 1, 0, 'C', fill=True)
-        pdf.ln()
+def block_tag_title(pdf, model, ctx, size, height, border=0, gap=5):
+    pdf.add_page()
+    pdf.set_font("helvetica", "B", size)
+    pdf.set_text_color(*COLOR_PRIMARY)
+    pdf.cell(0, height, f"Equipamento: {ctx['tag'].tag}", border, 1, 'L')
+    pdf.ln(gap)
 
-        pdf.set_font("helvetica", "", 10)
-        unique_tags_page = df_type['Tag'].unique()
-        tag_colors = {tag: (COLOR_BG_ZEBRA_1 if i % 2 == 0 else COLOR_BG_ZEBRA_2) for i, tag in enumerate(unique_tags_page)}
 
-        for _, row in df_type.iterrows():
-            pdf.set_x(145)
-            pdf.set_fill_color(*tag_colors[row['Tag']])
-            pdf.set_text_color(0, 0, 0)
-            
-            pdf.cell(40, 9, str(row['Tag']), 1, 0, 'C', fill=True)
-            pdf.cell(65, 9, str(row['Turno']), 1, 0, 'C', fill=True)
-            pdf.cell(35, 9, f"{row['Realizado']:,.0f}", 1, 0, 'C', fill=True)
-            pdf.cell(35, 9, f"{row['Meta']:,.0f}", 1, 0, 'C', fill=True)
-            
-            d = row['Desvio']
-            pdf.set_text_color(*(COLOR_DANGER if d < 0 else COLOR_SUCCESS))
-            pdf.cell(35, 9, f"{d:+.0f}", 1, 1, 'C', fill=True)
-
-        # --- ANÁLISE E RECOMENDAÇÕES (Corrigido para evitar caracteres Unicode) ---
-        pdf.set_y(pdf.get_y() + 10)
-        pdf.set_x(145)
+def _shift_card_text(pdf, row, status_color, status_text, style, obs_html):
+    """Conteúdo de um cartão de turno (desenhado duas vezes: medir e por cima do fundo)."""
+    if style == 'slides':
+        pdf.set_x(18)
         pdf.set_font("helvetica", "B", 11)
-        pdf.set_text_color(*COLOR_PRIMARY)
-        pdf.cell(0, 8, "ANÁLISE DE OCORRÊNCIAS E RECOMENDAÇÕES", 0, 1, 'L')
-        
-        pdf.set_x(145)
-        pdf.set_font("helvetica", "I", 10)
+        pdf.set_text_color(0, 0, 0)
+        pdf.cell(0, 8, f"Turno: {row.turno}", 0, 1)
+        pdf.set_font("helvetica", "", 10)
+        pdf.set_text_color(60, 60, 60)
+        pdf.write_html(f"Realizado: {row.realizado} | Meta: {row.meta} | Desvio: {row.desvio:+}<br/>")
+        pdf.set_text_color(40, 40, 40)
+        pdf.write_html(f"<b>Obs:</b> {obs_html}")
+    else:
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_font("helvetica", "B", 10)
+        pdf.set_x(15)
+        pdf.cell(50, 8, str(row.turno), 0, 0)
+        pdf.set_font("helvetica", "B", 8)
+        pdf.set_text_color(*status_color)
+        pdf.cell(0, 8, status_text, 0, 1, 'R')
+        pdf.set_x(15)
+        pdf.set_font("helvetica", "", 9)
+        pdf.set_text_color(80, 80, 80)
+        pdf.cell(0, 6, f"Realizado: {row.realizado} / Meta: {row.meta} / Desvio: {row.desvio:+}", 0, 1)
+        pdf.set_x(15)
         pdf.set_text_color(50, 50, 50)
-        
-        obs_list = df_type[df_type['Observações'] != '-']['Observações'].unique()
-        if len(obs_list) > 0:
-            # Substituímos explicitamente o caractere problemático por um hífen aqui
-            txt_obs = "<br/>".join([f"- {clean_unicode(o)}" for o in obs_list])
-        else:
-            txt_obs = "Nenhuma intercorrência crítica registrada no período."
-            
-        pdf.write_html(txt_obs)
-
-        os.remove(img_prod)
-        if not df_i.empty: os.remove(img_imp)
-
-    return bytes(pdf.output())
-
-def create_landscape_presentation(df_day, df_history, date_str, df_impacts_history, df_impacts_today):
-    
-    # --- CORES ---
-    COLOR_PRIMARY = (37, 66, 230)
-    COLOR_SUCCESS = (46, 204, 113)
-    COLOR_DANGER = (231, 76, 60)
-    COLOR_BG_LIGHT = (242, 244, 247)
-    COLOR_CYAN = '#00bcd4'
-
-    # Inicializa em modo Paisagem ('L'), unidade 'mm', formato 'A4'
-    class PDF(FPDF):
-        def header(self):
-            if os.path.exists("logo.png"):
-                self.image("logo.png", 10, 8, 25)
-            self.set_font('helvetica', 'B', 14)
-            self.set_text_color(*COLOR_PRIMARY)
-            self.cell(30) 
-            self.cell(0, 10, 'Apresentacao de Producao Diaria', 0, 0, 'L')
-            self.set_font('helvetica', '', 10)
-            self.set_text_color(120, 120, 120)
-            self.cell(0, 10, f'Data: {date_str}  ', 0, 1, 'R')
-            self.set_draw_color(*COLOR_PRIMARY)
-            self.line(10, 22, 287, 22) # Linha horizontal mais longa (Paisagem)
-            self.ln(10)
+        pdf.write_html(f"<b>Obs:</b><br/><br/> {obs_html} <br/><br/>")
 
-        def footer(self):
-            self.set_y(-15)
-            self.set_font('helvetica', 'I', 8)
-            self.set_text_color(150, 150, 150)
-            self.cell(0, 10, f'Slide {self.page_no()}', 0, 0, 'C')
-
-    def md_to_html(text):
-        if not text or str(text) == "-": return "-"
-        text = str(text)
-        text = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', text)
-        text = re.sub(r'\*(.*?)\*', r'<i>\1</i>', text)
-        text = text.replace('\n-', '<br/> - ')  # Hífen simples
-        text = text.replace('\n*', '<br/> > ')  # Marcador de seta
-        return text
-
-    def generate_bar_chart(x_data, y_data, title, width=9, height=4.5):
-        fig, ax = plt.subplots(figsize=(width, height))
-        ax.bar(x_data, y_data, color=COLOR_CYAN)
-        ax.set_title(title, fontsize=12, fontweight='bold', pad=15)
-        plt.xticks(rotation=20, ha='right', fontsize=9)
-        plt.tight_layout()
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
-        plt.savefig(temp_file.name, format='png', dpi=180) # DPI maior para telas
-        plt.close(fig)
-        return temp_file.name
-
-    pdf = PDF(orientation='L', unit='mm', format='A4')
-    pdf.set_auto_page_break(auto=True, margin=15)
-
-    unique_types = sorted(df_day['Tipo'].unique())
-
-    for m_type in unique_types:
-        # Slide de Transição de Categoria
-        pdf.add_page()
-        pdf.set_y(80)
-        pdf.set_font("helvetica", "B", 32)
-        pdf.set_text_color(40, 40, 40)
-        pdf.cell(0, 30, m_type.upper(), 0, 1, 'C')
-        pdf.set_draw_color(*COLOR_PRIMARY)
-        pdf.line(100, 115, 197, 115)
-        
-        df_type_subset = df_day[df_day['Tipo'] == m_type]
 
-        for tag in sorted(df_type_subset['Tag'].unique()):
+def block_shift_cards(pdf, model, ctx, style, width, bar_w, break_y, gap):
+    """Um cartão por turno do equipamento, com fundo e barra de status do tamanho do texto."""
+    colors = pdf.colors
+    for row in ctx['tag'].shifts:
+        status_color = colors['success'] if row.desvio >= 0 else colors['danger']
+        status_text = "META BATIDA" if row.desvio >= 0 else "ABAIXO DA META"
+        obs_html = md_to_html(row.observacoes, bullet=' > ' if style == 'slides' else ' - ')
+
+        if pdf.get_y() > break_y:
             pdf.add_page()
-            
-            # Título do Equipamento
-            pdf.set_font("helvetica", "B", 18)
-            pdf.set_text_color(*COLOR_PRIMARY)
-            pdf.cell(0, 12, f"Equipamento: {tag}", 0, 1, 'L')
-            pdf.ln(2)
 
-            df_tag_day = df_type_subset[df_type_subset['Tag'] == tag]
-            
-            for _, row in df_tag_day.iterrows():
-                gap = row['Desvio']
-                status_color = COLOR_SUCCESS if gap >= 0 else COLOR_DANGER
-                obs_html = md_to_html(row['Observações'])
-
-                if pdf.get_y() > 170: pdf.add_page()
-
-                start_y = pdf.get_y()
-                
-                # --- PASSO 1: Medir altura ---
-                pdf.set_x(18)
-                pdf.set_font("helvetica", "B", 11)
-                pdf.cell(0, 8, f"Turno: {row['Turno']}", 0, 1)
-                pdf.set_font("helvetica", "", 10)
-                pdf.write_html(f"<b>Realizado:</b> {row['Realizado']} | <b>Meta:</b> {row['Meta']} | <b>Desvio:</b> {gap:+}<br/>")
-                pdf.write_html(f"<b>Obs:</b> {obs_html}")
-                pdf.ln(4)
-                
-                end_y = pdf.get_y()
-                total_h = end_y - start_y
-
-                # --- PASSO 2: Desenhar Fundo e Re-escrever ---
-                pdf.set_y(start_y)
-                pdf.set_fill_color(*COLOR_BG_LIGHT)
-                pdf.rect(10, start_y, 277, total_h, 'F') # Largura total paisagem
-                pdf.set_fill_color(*status_color)
-                pdf.rect(10, start_y, 3, total_h, 'F') # Barra lateral mais grossa
-                
-                # Texto por cima
-                pdf.set_x(18)
-                pdf.set_font("helvetica", "B", 11)
-                pdf.set_text_color(0, 0, 0)
-                pdf.cell(0, 8, f"Turno: {row['Turno']}", 0, 1)
-                pdf.set_font("helvetica", "", 10)
-                pdf.set_text_color(60, 60, 60)
-                pdf.write_html(f"Realizado: {row['Realizado']} | Meta: {row['Meta']} | Desvio: {gap:+}<br/>")
-                pdf.set_text_color(40, 40, 40)
-                pdf.write_html(f"<b>Obs:</b> {obs_html}")
-                
-                pdf.set_y(end_y + 6)
-
-            # Gráfico de Histórico (Aumentado para modo Paisagem)
-            if not df_impacts_history.empty:
-                df_tag_hist = df_impacts_history[df_impacts_history['equipment_tag'] == tag]
-                if not df_tag_hist.empty:
-                    pdf.add_page() # Gráfico em slide separado para maior impacto
-                    grp = df_tag_hist.groupby('Categoria')['horas'].sum()
-                    img = generate_bar_chart(grp.index, grp.values, f"Historico Acumulado de Paradas - {tag}", width=11)
-                    pdf.image(img, x=20, y=40, w=250)
-                    os.remove(img)
-
-    # --- SLIDE DE RESUMO GERAL ---
-    if not df_impacts_today.empty:
+        # FPDF não tem camadas: escreve para medir a altura, desenha o fundo e reescreve por cima
+        start_y = pdf.get_y()
+        _shift_card_text(pdf, row, status_color, status_text, style, obs_html)
+        pdf.ln(4)
+        end_y = pdf.get_y()
+
+        pdf.set_y(start_y)
+        pdf.set_fill_color(*colors['bg_light'])
+        pdf.rect(10, start_y, width, end_y - start_y, 'F')
+        pdf.set_fill_color(*status_color)
+        pdf.rect(10, start_y, bar_w, end_y - start_y, 'F')
+        _shift_card_text(pdf, row, status_color, status_text, style, obs_html)
+
+        pdf.set_y(end_y + gap)
+
+
+def block_impact_history(pdf, model, ctx, title, chart, image, new_page=False, break_y=None):
+    """Histórico de impactos do equipamento por categoria."""
+    grp = ctx['tag'].impact_history
+    if grp.empty:
+        return
+    if new_page or (break_y is not None and pdf.get_y() > break_y):
         pdf.add_page()
+    labels = [f"{v:.1f}h" for v in grp.values] if chart.get('value_labels') else None
+    opts = {k: v for k, v in chart.items() if k != 'value_labels'}
+    img = bar_chart_image(grp.index, grp.values, title.format(tag=ctx['tag'].tag), labels=labels, **opts)
+    pdf.image(img, **image)
+
+
+def block_impact_summary(pdf, model, ctx, style):
+    """Resumo dos impactos do dia: horas por equipamento e a lista de eventos."""
+    if model.impacts_today.empty:
+        return
+    grp = model.impacts_by_tag
+    pdf.add_page()
+    if style == 'slides':
         pdf.set_font("helvetica", "B", 20)
         pdf.set_text_color(*COLOR_PRIMARY)
         pdf.cell(0, 20, "RESUMO GERAL DE IMPACTOS - HOJE", 0, 1, 'C')
-        
-        grp_geral = df_impacts_today.groupby('equipment_tag')['horas'].sum().sort_values(ascending=False)
-        img_resumo = generate_bar_chart(grp_geral.index, grp_geral.values, "Horas Perdidas por Equipamento (Geral)", width=11)
-        pdf.image(img_resumo, x=20, y=45, w=250)
-        os.remove(img_resumo)
+        img = bar_chart_image(grp.index, grp.values, "Horas Perdidas por Equipamento (Geral)",
+                             figsize=(11, 4.5), dpi=180, title_size=12, clean=False)
+        pdf.image(img, x=20, y=45, w=250)
 
-        # Slide de Detalhes Finais
         pdf.add_page()
         pdf.set_font("helvetica", "B", 16)
         pdf.cell(0, 15, "Detalhamento de Eventos", "B", 1)
         pdf.ln(5)
         pdf.set_font("helvetica", "", 11)
-        for _, row in df_impacts_today.iterrows():
-            pdf.write_html(f"• <b>{row['equipment_tag']}</b> - {row['Categoria']}: {row['horas']}h | {row.get('description', '-')}")
+        for row in model.impacts_today.itertuples(index=False):
+            desc = clean_unicode(getattr(row, 'description', '-'))
+            pdf.write_html(f"- <b>{row.equipment_tag}</b> - {row.Categoria}: {row.horas:.2f}h | {desc}")
             pdf.ln(5)
+    else:
+        pdf.set_font("helvetica", "B", 16)
+        pdf.set_text_color(*COLOR_PRIMARY)
+        pdf.cell(0, 15, "RESUMO GERAL DE IMPACTOS DO DIA", 0, 1, 'C')
+        img = bar_chart_image(grp.index, grp.values, "Horas Paradas por Equipamento",
+                             labels=[f"{v:.1f}h" for v in grp.values])
+        pdf.image(img, x=25, w=160)
+        pdf.ln(10)
+        pdf.set_font("helvetica", "B", 12)
+        pdf.set_text_color(0, 0, 0)
+        pdf.cell(0, 10, "Detalhamento dos Eventos:", 0, 1)
+        for row in model.impacts_today.itertuples(index=False):
+            pdf.write_html(f"- <b>{row.equipment_tag}</b> ({row.Categoria}): {round(row.horas, 2)}h")
+            pdf.ln(2)
 
-    return bytes(pdf.output())
-
-
-def create_one_page_a3_report(df_day, df_history, date_str, df_impacts_history, df_impacts_today):
-    # --- 1. CONFIGURAÇÕES E METAS ---
-    FIXED_GOALS = {
-        "DESOBSTRUÇÃO": 26,
-        "DESOBSTRUÇÃO - PRECIPITAÇÃO": 54,
-        "DESOBSTRUÇÃO - AQUECEDOR DE POLPA": 8
-    }
-    
-    RGB_PRIMARY = (37, 66, 230)
-    RGB_SUCCESS = (38, 186, 164)
-    RGB_DANGER = (239, 68, 68)
-    RGB_BG_ZEBRA_1 = (255, 255, 255)
-    RGB_BG_ZEBRA_2 = (242, 245, 252)
-    IMPACT_COLORS = ['#FF5733', '#33FF57', '#3357FF', '#F333FF', '#CCAC00', '#33FFF3']
-
-    # --- 2. TRATAMENTO DE DADOS ---
-    df_day = df_day.copy()
-    cols_data = ['maint_start_date', 'maint_due_date', 'maint_real_due_date']
-    for col in cols_data:
-        if col in df_day.columns:
-            temp_dates = pd.to_datetime(df_day[col], errors='coerce', dayfirst=True)
-            df_day[col] = temp_dates.apply(lambda x: x.strftime('%d/%m/%Y') if pd.notnull(x) else "-")
-
-    class PDF(FPDF):
-        def header(self):
-            # Banner Azul
-            self.set_fill_color(*RGB_PRIMARY)
-            self.rect(0, 0, 420, 22, 'F')
-            
-            # Título Esquerdo
-            self.set_xy(15, 6)
-            self.set_font('helvetica', 'B', 18)
-            self.set_text_color(255, 255, 255)
-            self.cell(200, 10, f"DASHBOARD OPERACIONAL A3 | {date_str}", 0, 0, 'L')
-
-        def footer(self):
-            self.set_y(-10)
-            self.set_font('helvetica', 'I', 8)
-            self.set_text_color(150, 150, 150)
-            self.cell(0, 5, f"Pagina {self.page_no()}", 0, 0, 'C')
-
-    def clean_unicode(text):
-        if not text: return ""
-        return str(text).replace('•', '-').replace('·', '-').replace('\u2022', '-')
-
-    def generate_mini_bar(tag, df_imp, categories):
-        fig, ax = plt.subplots(figsize=(4.2, 1.2))
-        data = df_imp[df_imp['equipment_tag'] == tag]
-        if not data.empty:
-            grp = data.groupby('Categoria')['horas'].sum().reindex(categories, fill_value=0)
-            bars = ax.bar(categories, grp.values, color=IMPACT_COLORS[:len(categories)])
-            ax.bar_label(bars, fmt='%.1fh', padding=2, fontsize=9, fontweight='bold')
-        
-        ax.get_xaxis().set_visible(False)
-        ax.get_yaxis().set_visible(False)
-        for s in ax.spines.values(): s.set_visible(False)
-        plt.tight_layout()
-        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
-        plt.savefig(tmp.name, transparent=True, dpi=100)
-        plt.close(fig)
-        return tmp.name
-
-    pdf = PDF(orientation='L', unit='mm', format='A3')
-    all_categories = sorted(df_impacts_today['Categoria'].unique())[:6]
-
-    try:
-        dt_ref = pd.to_datetime(date_str, format="%d/%m/%Y").date()
-    except:
-        dt_ref = pd.to_datetime(date_str).date()
-
-    for m_type in sorted(df_day['Tipo'].unique()):
+
+def block_executive_page(pdf, model, ctx):
+    """Página única do tipo: KPIs, gráficos laterais, tabela por turno e observações."""
+    colors = pdf.colors
+    section = ctx['section']
+    pdf.add_page()
+
+    # --- 1. ÁREA DE SCORECARDS (KPIs DE TOPO) ---
+    kpi_w = 95
+    positions = [15, 115, 215, 315]
+    kpis = [
+        ("PRODUÇÃO TOTAL", f"{section.realizado:,.0f}"),
+        ("META GLOBAL", f"{section.meta:,.0f}"),
+        ("EFICIÊNCIA", f"{section.eficiencia:.1f}%"),
+        ("TOTAL PARADAS", f"{section.impact_hours:.1f}h")
+    ]
+    for i, (label, val) in enumerate(kpis):
+        x_pos = positions[i]
+        pdf.set_draw_color(220, 220, 220)
+        pdf.set_fill_color(255, 255, 255)
+        pdf.rect(x_pos, 30, kpi_w, 20, 'FD')
+
+        pdf.set_xy(x_pos, 32)
+        pdf.set_font("helvetica", "B", 9)
+        pdf.set_text_color(100, 100, 100)
+        pdf.cell(kpi_w, 5, label, 0, 1, 'C')
+
+        pdf.set_font("helvetica", "B", 14)
+        # Cor condicional: eficiência azul/verde, paradas vermelho
+        color_text = COLOR_PRIMARY if i < 2 else (colors['success'] if i == 2 else colors['danger'])
+        pdf.set_text_color(*color_text)
+        pdf.set_x(x_pos)
+        pdf.cell(kpi_w, 8, val, 0, 1, 'C')
+
+    # --- 2. LADO ESQUERDO: GRÁFICOS ---
+    tags = section.tags
+    labels = [f"{t.realizado:,.0f}\n({t.perc:.1f}%)" for t in tags]
+    img = bar_chart_image([t.tag for t in tags], [t.realizado for t in tags], "Produção vs Avanço Acumulado",
+                         color=COLOR_PRIMARY, figsize=(6, 4.5), title_size=14, title_pad=25, rotation=15,
+                         labels=labels, alpha=0.8)
+    pdf.image(img, x=10, y=60, w=130)
+
+    imp_tags = [t for t in tags if not t.impacts_today.empty]
+    if imp_tags:
+        hours = [t.impacts_today.sum() for t in imp_tags]
+        img = bar_chart_image([t.tag for t in imp_tags], hours, "Impactos do Dia (Horas)",
+                             color=colors['danger'], figsize=(6, 4.5), title_size=14, title_pad=25, rotation=15,
+                             labels=[f"{h:.1f}h" for h in hours], alpha=0.8)
+        pdf.image(img, x=10, y=155, w=130)
+
+    # --- 3. LADO DIREITO: TABELA E RECOMENDAÇÕES ---
+    pdf.set_xy(145, 60)
+    pdf.set_font("helvetica", "B", 12)
+    pdf.set_text_color(*COLOR_PRIMARY)
+    pdf.cell(0, 10, clean_unicode(f"DETALHAMENTO OPERACIONAL - {str(section.name).upper()}"), 0, 1, 'L')
+
+    headers = [("TAG", 40), ("TURNO (AMPLIADO)", 65), ("REAL", 35), ("META", 35), ("DESVIO", 35)]
+    pdf.set_x(145)
+    pdf.set_fill_color(*COLOR_PRIMARY)
+    pdf.set_text_color(255, 255, 255)
+    for h, w in headers: pdf.cell(w, 10, h, 1, 0, 'C', fill=True)
+    pdf.ln()
+
+    pdf.set_font("helvetica", "", 10)
+    for i, tag in enumerate(tags):
+        for row in tag.shifts:
+            pdf.set_x(145)
+            pdf.set_fill_color(*(colors['zebra_1'] if i % 2 == 0 else colors['zebra_2']))
+            pdf.set_text_color(0, 0, 0)
+
+            pdf.cell(40, 9, str(tag.tag), 1, 0, 'C', fill=True)
+            pdf.cell(65, 9, str(row.turno), 1, 0, 'C', fill=True)
+            pdf.cell(35, 9, f"{row.realizado:,.0f}", 1, 0, 'C', fill=True)
+            pdf.cell(35, 9, f"{row.meta:,.0f}", 1, 0, 'C', fill=True)
+
+            pdf.set_text_color(*(colors['danger'] if row.desvio < 0 else colors['success']))
+            pdf.cell(35, 9, f"{row.desvio:+.0f}", 1, 1, 'C', fill=True)
+
+    # --- 4. ANÁLISE E RECOMENDAÇÕES (INTEGRADO NO GRID) ---
+    pdf.set_y(pdf.get_y() + 8)
+    pdf.set_x(145)
+    pdf.set_font("helvetica", "B", 11)
+    pdf.set_text_color(*COLOR_PRIMARY)
+    pdf.cell(0, 8, "ANÁLISE DE OCORRÊNCIAS E RECOMENDAÇÕES", 0, 1, 'L')
+
+    pdf.set_x(145)
+    pdf.set_font("helvetica", "I", 10)
+    pdf.set_text_color(50, 50, 50)
+
+    obs_list = section.observations
+    txt_obs = "<br/>".join([f"- {clean_unicode(o)}" for o in obs_list]) if obs_list else "Nenhuma intercorrência crítica registrada."
+
+    # O A3 permite uma multi_cell larga sem estourar
+    pdf.write_html(f"<div style='margin-left: 145mm;'>{txt_obs}</div>")
+
+
+def _a3_categories(model):
+    """Categorias da legenda do A3: todas; acima do que cabe, o restante é somado em "OUTRAS"."""
+    categories = list(model.impact_categories)
+    max_categories = A3_LEGEND_PER_ROW * A3_LEGEND_MAX_ROWS
+    if len(categories) <= max_categories:
+        return categories, model.impact_matrix
+    keep = categories[:max_categories - 1]
+    matrix = model.impact_matrix[keep].copy()
+    matrix['OUTRAS'] = model.impact_matrix[categories[max_categories - 1:]].sum(axis=1)
+    return keep + ['OUTRAS'], matrix
+
+
+def block_a3_cards(pdf, model, ctx):
+    """
+    Páginas A3 do tipo: KPIs do dia e um cartão por equipamento. Tipos com
+    muitos equipamentos continuam em quantas páginas forem necessárias.
+    """
+    colors = pdf.colors
+    section = ctx['section']
+    if 'a3_categories' not in ctx:
+        ctx['a3_categories'], ctx['a3_matrix'] = _a3_categories(model)
+        ctx['a3_rgb'] = [hex_to_rgb(IMPACT_COLORS[i % len(IMPACT_COLORS)]) for i in range(len(ctx['a3_categories']))]
+    all_categories, matrix, impact_rgb = ctx['a3_categories'], ctx['a3_matrix'], ctx['a3_rgb']
+
+    def draw_mini_bars(values, x, y, w, h):
+        """Barras de impacto por categoria desenhadas em vetor (sem imagem), escala própria do equipamento."""
+        peak = max(values) if len(values) else 0
+        if peak <= 0:
+            return
+        slot = w / len(values)
+        bar_w = slot * 0.7
+        label_h = 4
+        pdf.set_font("helvetica", "B", 8)
+        for i, v in enumerate(values):
+            if v <= 0:
+                continue
+            bar_h = (h - label_h) * v / peak
+            bx = x + i * slot + (slot - bar_w) / 2
+            pdf.set_fill_color(*impact_rgb[i])
+            pdf.rect(bx, y + h - bar_h, bar_w, bar_h, 'F')
+            pdf.set_text_color(40, 40, 40)
+            pdf.set_xy(bx - 2, y + h - bar_h - label_h)
+            pdf.cell(bar_w + 4, label_h, f"{v:.1f}h", 0, 0, 'C')
+
+    kpi_vals = [
+        ("META DIA", f"{section.meta:,.0f}"),
+        ("REALIZADO TOTAL", f"{section.realizado:,.0f}"),
+        ("DESVIO DO DIA", f"{section.desvio:+,.0f}"),
+        ("TOTAL HORAS PARADAS", f"{section.impact_hours:.1f}h")
+    ]
+
+    def draw_page_header(page_idx, n_pages):
         pdf.add_page()
-        df_type = df_day[df_day['Tipo'] == m_type]
-        base_goal = FIXED_GOALS.get(m_type, 0)
-        
-        # --- 3. LEGENDA NO CABEÇALHO (LADO DIREITO) ---
-        pdf.set_xy(220, 5)
+
+        # --- LEGENDA NO CABEÇALHO (LADO DIREITO) ---
         pdf.set_font("helvetica", "B", 7)
         pdf.set_text_color(255, 255, 255)
+        pdf.set_xy(220, 2)
         pdf.cell(30, 5, "LEGENDA IMPACTOS:", 0, 0, 'L')
-        
         for i, cat in enumerate(all_categories):
-            h = IMPACT_COLORS[i].lstrip('#')
-            r, g, b = tuple(int(h[j:j+2], 16) for j in (0, 2, 4))
-            pdf.set_fill_color(r, g, b)
-            pdf.rect(pdf.get_x(), 6.5, 3, 3, 'F')
-            pdf.set_x(pdf.get_x() + 4)
-            pdf.cell(28, 5, cat[:15], 0, 0, 'L')
-
-        # --- 4. SCORECARDS (KPIs) ---
-        total_real_dia = df_type['Realizado'].sum()
-        total_impacto_dia = df_impacts_today[df_impacts_today['Tipo'] == m_type]['horas'].sum()
-        total_meta_dia = df_type['Meta'].sum()
-
-        kpi_vals = [
-            ("META DIA", f"{total_meta_dia:,.0f}"),
-            ("REALIZADO TOTAL", f"{total_real_dia:,.0f}"),
-            ("DESVIO DO DIA", f"{(total_real_dia - total_meta_dia):+,.0f}"),
-            ("TOTAL HORAS PARADAS", f"{total_impacto_dia:.1f}h")
-        ]
-        
+            row, col = divmod(i, A3_LEGEND_PER_ROW)
+            x_leg = 250 + col * 28
+            y_leg = 2 + row * 5.5
+            pdf.set_fill_color(*impact_rgb[i])
+            pdf.rect(x_leg, y_leg + 1.5, 3, 3, 'F')
+            pdf.set_xy(x_leg + 4, y_leg)
+            pdf.cell(24, 5, clean_unicode(cat)[:14], 0, 0, 'L')
+
+        # --- SCORECARDS (KPIs) ---
         for i, (lab, val) in enumerate(kpi_vals):
             x_kpi = 15 + (i * 100)
             pdf.set_xy(x_kpi, 28)
             pdf.set_draw_color(200, 200, 200)
             pdf.set_fill_color(255, 255, 255)
             pdf.rect(x_kpi, 28, 90, 18, 'DF')
-            
+
             pdf.set_font("helvetica", "B", 10)
             pdf.set_text_color(100, 100, 100)
             pdf.cell(90, 8, lab, 0, 1, 'C')
-            
+
             pdf.set_font("helvetica", "B", 15)
-            color_val = RGB_PRIMARY if i < 3 else RGB_DANGER
-            if i == 2 and (total_real_dia - total_meta_dia) >= 0: color_val = RGB_SUCCESS
+            color_val = COLOR_PRIMARY if i < 3 else colors['danger']
+            if i == 2 and section.desvio >= 0: color_val = colors['success']
             pdf.set_text_color(*color_val)
             pdf.set_x(x_kpi)
             pdf.cell(90, 6, val, 0, 1, 'C')
-        
-        # --- 5. CABEÇALHOS DAS COLUNAS (ÚNICO POR PÁGINA) ---
-        pdf.set_y(50)
+
+        # --- CABEÇALHOS DAS COLUNAS (ÚNICO POR PÁGINA) ---
         pdf.set_font("helvetica", "B", 10)
-        pdf.set_text_color(*RGB_PRIMARY)
-        
+        pdf.set_text_color(*COLOR_PRIMARY)
+
         pdf.set_xy(15, 50)
         pdf.cell(85, 5, "INFORMAÇÕES GERAIS", 0, 0, 'L')
-        
+
         pdf.set_xy(105, 50)
         pdf.cell(85, 5, "PRODUÇÃO", 0, 0, 'L')
-        
+
         pdf.set_xy(200, 50)
         pdf.cell(110, 5, "DISTRIBUIÇÃO DE IMPACTOS", 0, 0, 'L')
-        
+
         pdf.set_xy(320, 50)
-        pdf.cell(85, 5, "OBSERVAÇÕES", 0, 0, 'L')
-        
-        # --- 6. GRADE DE ATIVOS ---
-        pdf.set_y(56)
-        tags = sorted(df_type['Tag'].unique())[:6]
-        
-        for idx, tag in enumerate(tags):
-            df_tag = df_type[df_type['Tag'] == tag]
-            
-            df_tag_hist = df_history[(df_history['equipment_tag'] == tag) & (df_history['date'] <= dt_ref)]
-            total_tubos = df_tag_hist['total_tubos'].max() if 'total_tubos' in df_tag_hist.columns else 0
-            acumulado_total = df_tag_hist['quantity'].sum() if not df_tag_hist.empty else 0
-            pendentes = total_tubos - acumulado_total
-            
-            start_y = pdf.get_y()
-            # Altura do cartão reduzida pois os títulos saíram
-            card_height = 36 
-            
-            pdf.set_fill_color(*(RGB_BG_ZEBRA_1 if idx % 2 == 0 else RGB_BG_ZEBRA_2))
-            pdf.rect(10, start_y, 400, card_height, 'F')
-            
-            # --- BLOCO 1: INFORMAÇÕES GERAIS (X=15) ---
-            pdf.set_xy(15, start_y + 3)
-            pdf.set_font("helvetica", "B", 11)
-            pdf.set_text_color(*RGB_PRIMARY)
-            pdf.cell(85, 5, f"{tag}", 0, 1)
-            
-            pdf.set_font("helvetica", "", 8)
-            pdf.set_text_color(80, 80, 80)
-            
-            y_info = start_y + 8
-            linha_h = 4.5
-            
-            pdf.set_xy(15, y_info)
-            pdf.cell(85, linha_h, f"Inicio LB: {df_tag['maint_start_date'].iloc[0]}", 0, 1)
-            
-            pdf.set_x(15)
-            pdf.cell(85, linha_h, f"Término LB: {df_tag['maint_due_date'].iloc[0]}", 0, 1)
-            
-            pdf.set_x(15)
-            pdf.cell(85, linha_h, f"Término Real: {df_tag['maint_real_due_date'].iloc[0]}", 0, 1)
-            
-            pdf.set_x(15)
-            pdf.cell(85, linha_h, f"Qtd. Total de Tubos: {total_tubos:.0f}", 0, 1)
-            
-            pdf.set_x(15)
-            pdf.cell(85, linha_h, f"Realizado Acumulado: {acumulado_total:.0f}", 0, 1)
-
-            pdf.set_x(15)
-            pdf.cell(85, linha_h, f"Pendentes: {pendentes:.0f}", 0, 1)
-
-            # --- BLOCO 2: PRODUÇÃO (X=105) ---
-            pdf.set_xy(105, start_y + 3)
-            pdf.set_font("helvetica", "B", 8)
-            pdf.set_fill_color(*RGB_PRIMARY)
-            pdf.set_text_color(255, 255, 255)
-            pdf.cell(45, 5, "TURNO", 1, 0, 'C', fill=True)
-            pdf.cell(20, 5, "REAL", 1, 0, 'C', fill=True)
-            pdf.cell(20, 5, "DESVIO", 1, 1, 'C', fill=True)
-            
+        pdf.cell(60, 5, "OBSERVAÇÕES", 0, 0, 'L')
+
+        # Tipo e página (quando o tipo ocupa mais de uma)
+        pdf.set_font("helvetica", "B", 8)
+        pdf.set_text_color(120, 120, 120)
+        pdf.set_xy(350, 50)
+        label = f"{section.name} ({page_idx + 1}/{n_pages})" if n_pages > 1 else str(section.name)
+        pdf.cell(60, 5, clean_unicode(label)[:40], 0, 0, 'R')
+
+    def draw_card(tag, start_y, card_height, idx):
+        pdf.set_fill_color(*(colors['zebra_1'] if idx % 2 == 0 else colors['zebra_2']))
+        pdf.rect(10, start_y, 400, card_height, 'F')
+
+        # --- BLOCO 1: INFORMAÇÕES GERAIS (X=15) ---
+        pdf.set_xy(15, start_y + 3)
+        pdf.set_font("helvetica", "B", 11)
+        pdf.set_text_color(*COLOR_PRIMARY)
+        pdf.cell(85, 5, f"{tag.tag}", 0, 1)
+
+        pdf.set_font("helvetica", "", 8)
+        pdf.set_text_color(80, 80, 80)
+        linha_h = 4.5
+
+        pdf.set_xy(15, start_y + 8)
+        pdf.cell(85, linha_h, f"Inicio LB: {format_date(tag.maint_start)}", 0, 1)
+        pdf.set_x(15)
+        pdf.cell(85, linha_h, f"Término LB: {format_date(tag.maint_due)}", 0, 1)
+        pdf.set_x(15)
+        pdf.cell(85, linha_h, f"Término Real: {format_date(tag.maint_real_due)}", 0, 1)
+        pdf.set_x(15)
+        pdf.cell(85, linha_h, f"Qtd. Total de Tubos: {tag.total_tubos:.0f}", 0, 1)
+        pdf.set_x(15)
+        pdf.cell(85, linha_h, f"Realizado Acumulado: {tag.acumulado:.0f}", 0, 1)
+        pdf.set_x(15)
+        pdf.cell(85, linha_h, f"Pendentes: {tag.pendentes:.0f}", 0, 1)
+
+        # --- BLOCO 2: PRODUÇÃO (X=105) ---
+        pdf.set_xy(105, start_y + 3)
+        pdf.set_font("helvetica", "B", 8)
+        pdf.set_fill_color(*COLOR_PRIMARY)
+        pdf.set_text_color(255, 255, 255)
+        pdf.cell(45, 5, "TURNO", 1, 0, 'C', fill=True)
+        pdf.cell(20, 5, "REAL", 1, 0, 'C', fill=True)
+        pdf.cell(20, 5, "DESVIO", 1, 1, 'C', fill=True)
+
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_font("helvetica", "", 8)
+        for row in tag.shifts:
+            pdf.set_x(105)
+            pdf.cell(45, A3_SHIFT_ROW_HEIGHT, str(row.turno), 1, 0, 'C')
+            pdf.cell(20, A3_SHIFT_ROW_HEIGHT, f"{row.realizado:.0f}", 1, 0, 'C')
+            d = row.realizado - section.goal_per_shift
+            pdf.set_text_color(*(colors['danger'] if d < 0 else colors['success']))
+            pdf.cell(20, A3_SHIFT_ROW_HEIGHT, f"{d:+.0f}", 1, 1, 'C')
             pdf.set_text_color(0, 0, 0)
-            pdf.set_font("helvetica", "", 8)
-            
-            for _, row in df_tag.head(4).iterrows():
-                pdf.set_x(105)
-                pdf.cell(45, 6, str(row['Turno']), 1, 0, 'C')
-                pdf.cell(20, 6, f"{row['Realizado']:.0f}", 1, 0, 'C')
-                d = row['Realizado'] - base_goal
-                pdf.set_text_color(*(RGB_DANGER if d < 0 else RGB_SUCCESS))
-                pdf.cell(20, 6, f"{d:+.0f}", 1, 1, 'C')
-                pdf.set_text_color(0, 0, 0)
-
-            # --- BLOCO 3: GRÁFICO DE IMPACTOS (X=200) ---
-            img_bar = generate_mini_bar(tag, df_impacts_today, all_categories)
-            pdf.image(img_bar, x=198, y=start_y + 3, w=110)
-            os.remove(img_bar)
-
-            # --- BLOCO 4: OBSERVAÇÕES (X=320) ---
-            pdf.set_xy(320, start_y + 3)
-            pdf.set_font("helvetica", "I", 8)
-            pdf.set_text_color(60, 60, 60)
-            obs = clean_unicode(str(df_tag['Observações'].iloc[0]))[:250]
-            
-            pdf.multi_cell(85, 4.5, obs if obs != "-" else "Sem intercorrências registradas.")
-            
-            pdf.set_y(start_y + card_height + 1)
-
-    return bytes(pdf.output())
\ No newline at end of file
+
+        # --- BLOCO 3: GRÁFICO DE IMPACTOS (X=200) ---
+        if tag.tag in matrix.index:
+            draw_mini_bars(matrix.loc[tag.tag].to_numpy(), x=200, y=start_y + 4, w=106, h=min(card_height - 8, 28))
+
+        # --- BLOCO 4: OBSERVAÇÕES (X=320) ---
+        pdf.set_xy(320, start_y + 3)
+        pdf.set_font("helvetica", "I", 8)
+        pdf.set_text_color(60, 60, 60)
+        obs = clean_unicode(str(tag.notes))[:250]
+        pdf.multi_cell(85, 4.5, obs if obs != "-" else "Sem intercorrências registradas.")
+
+    # Cartões: altura cresce com o número de turnos do equipamento
+    heights = [max(A3_CARD_MIN_HEIGHT, 10 + A3_SHIFT_ROW_HEIGHT * len(t.shifts)) for t in section.tags]
+    pages = paginate_cards(heights)
+    for page_idx, page in enumerate(pages):
+        draw_page_header(page_idx, len(pages))
+        y = A3_GRID_TOP
+        for idx, card_i in enumerate(page):
+            draw_card(section.tags[card_i], y, heights[card_i], idx)
+            y += heights[card_i] + 1
+
+
+BLOCKS = {
+    "per_type": block_per_type,
+    "per_tag": block_per_tag,
+    "type_cover": block_type_cover,
+    "tag_title": block_tag_title,
+    "shift_cards": block_shift_cards,
+    "impact_history": block_impact_history,
+    "impact_summary": block_impact_summary,
+    "executive_page": block_executive_page,
+    "a3_cards": block_a3_cards,
+}
+
+
+def render_blocks(pdf, model, ctx, blocks):
+    for name, opts in blocks:
+        BLOCKS[name](pdf, model, ctx, **opts)
+
+
+# ------------------------------------------------------------------------------
+# Layouts
+# ------------------------------------------------------------------------------
+LAYOUTS = {
+    # Relatório diário (A4 retrato): capa por tipo, uma página por equipamento, resumo de impactos
+    "diario": {
+        "orientation": "P", "format": "A4", "auto_break": 15,
+        "header": {"style": "logo", "logo_w": 30, "size": 16, "title": "Relatório Diário de Produção"},
+        "footer": {"y": -15, "height": 10, "text": "Pagina {page}"},
+        "colors": {"success": (46, 204, 113), "danger": (231, 76, 60), "bg_light": (245, 247, 250)},
+        "blocks": [
+            ("per_type", {"blocks": [
+                ("type_cover", {"y": 100, "size": 24, "height": 20}),
+                ("per_tag", {"blocks": [
+                    ("tag_title", {"size": 14, "height": 10, "border": "B"}),
+                    ("shift_cards", {"style": "daily", "width": 190, "bar_w": 2, "break_y": 220, "gap": 5}),
+                    ("impact_history", {"title": "Historico de Impactos: {tag}", "break_y": 180,
+                                        "chart": {"value_labels": True}, "image": {"x": 25, "w": 160}}),
+                ]}),
+            ]}),
+            ("impact_summary", {"style": "daily"}),
+        ],
+    },
+    # Apresentação (A4 paisagem): mesma estrutura em slides, histórico em slide próprio
+    "apresentacao": {
+        "orientation": "L", "format": "A4", "auto_break": 15,
+        "header": {"style": "logo", "logo_w": 25, "size": 14, "show_date": True,
+                   "title": "Apresentacao de Producao Diaria"},
+        "footer": {"y": -15, "height": 10, "text": "Slide {page}"},
+        "colors": {"success": (46, 204, 113), "danger": (231, 76, 60), "bg_light": (242, 244, 247)},
+        "blocks": [
+            ("per_type", {"blocks": [
+                ("type_cover", {"y": 80, "size": 32, "height": 30, "line": (100, 115, 197, 115)}),
+                ("per_tag", {"blocks": [
+                    ("tag_title", {"size": 18, "height": 12, "gap": 2}),
+                    ("shift_cards", {"style": "slides", "width": 277, "bar_w": 3, "break_y": 170, "gap": 6}),
+                    ("impact_history", {"title": "Historico Acumulado de Paradas - {tag}", "new_page": True,
+                                        "chart": {"figsize": (11, 4.5), "dpi": 180, "title_size": 12, "clean": False},
+                                        "image": {"x": 20, "y": 40, "w": 250}}),
+                ]}),
+            ]}),
+            ("impact_summary", {"style": "slides"}),
+        ],
+    },
+    # Executivo (A3 paisagem): uma página por tipo com gráficos, tabela e observações
+    "executivo": {
+        "orientation": "L", "format": "A3", "auto_break": 20,
+        "header": {"style": "banner", "height": 20, "y": 5, "size": 16, "ln": 1,
+                   "title": "DASHBOARD EXECUTIVO A3 | TIPO DE ATIVO | REFERÊNCIA: {date}"},
+        "colors": {"success": (38, 186, 164), "danger": (239, 68, 68),
+                   "zebra_1": (255, 255, 255), "zebra_2": (240, 244, 255)},
+        "blocks": [
+            ("per_type", {"blocks": [("executive_page", {})]}),
+        ],
+    },
+    # Operacional (A3 paisagem): cartões por equipamento, paginados
+    "a3": {
+        "orientation": "L", "format": "A3", "auto_break": None,
+        "header": {"style": "banner", "height": 22, "y": 6, "size": 18, "width": 200,
+                   "title": "DASHBOARD OPERACIONAL A3 | {date}"},
+        "footer": {"y": -10, "height": 5, "text": "Pagina {page}"},
+        "colors": {"success": (38, 186, 164), "danger": (239, 68, 68),
+                   "zebra_1": (255, 255, 255), "zebra_2": (242, 245, 252)},
+        "blocks": [
+            ("per_type", {"blocks": [("a3_cards", {})]}),
+        ],
+    },
+}
+
+
+def render_report(model, layout_name, sink=None):
+    """
+    Desenha o modelo no layout pedido. Sem sink, devolve os bytes do PDF; com
+    sink (arquivo binário, SpooledTemporaryFile, resposta em streaming...),
+    escreve o documento nele e devolve o próprio sink, sem a cópia em bytes.
+    O FPDF monta o documento inteiro em memória antes de escrever no sink.
+    """
+    layout = LAYOUTS[layout_name]
+    pdf = ReportPDF(layout, model.date_str)
+    render_blocks(pdf, model, {}, layout['blocks'])
+    if sink is None:
+        return bytes(pdf.output())
+    pdf.output(sink)
+    return sink
+
+
+# ------------------------------------------------------------------------------
+# Entradas por formato (mesma assinatura de antes; o modelo é compartilhado).
+# Com sink=arquivo, o PDF é escrito nele em vez de devolvido em bytes.
+# ------------------------------------------------------------------------------
+def create_pdf_report(df_day, df_history, date_str, df_impacts_history, df_impacts_today, df_progress=None, holidays=(), sink=None):
+    model = get_report_model(df_day, df_history, date_str, df_impacts_history, df_impacts_today, df_progress, holidays)
+    return render_report(model, "diario", sink)
+
+
+def create_one_page_type_report(df_day, df_history, date_str, df_impacts_history, df_impacts_today, df_progress=None, holidays=(), sink=None):
+    model = get_report_model(df_day, df_history, date_str, df_impacts_history, df_impacts_today, df_progress, holidays)
+    return render_report(model, "executivo", sink)
+
+
+def create_landscape_presentation(df_day, df_history, date_str, df_impacts_history, df_impacts_today, df_progress=None, holidays=(), sink=None):
+    model = get_report_model(df_day, df_history, date_str, df_impacts_history, df_impacts_today, df_progress, holidays)
+    return render_report(model, "apresentacao", sink)
+
+
+def create_one_page_a3_report(df_day, df_history, date_str, df_impacts_history, df_impacts_today, df_progress=None, holidays=(), sink=None):
+    model = get_report_model(df_day, df_history, date_str, df_impacts_history, df_impacts_today, df_progress, holidays)
+    return render_report(model, "a3", sink)
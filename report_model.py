@@ -0,0 +1,145 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+import pandas as pd
+
+from cache import make_key
+from ciclo import get_calendar
+from intervals import get_impact_index
+
+# ==============================================================================
+# Modelo de relatório
+# ------------------------------------------------------------------------------
+# Tudo o que os relatórios em PDF mostram, agregado em uma única passada sobre
+# os dados do dia: totais por tipo, cartões por equipamento (turnos, datas,
+# avanço acumulado, observações) e impactos (do dia e histórico). Os layouts
+# de pdf.py só leem o modelo; gerar os quatro formatos para o mesmo dia custa
+# uma agregação e o desenho de cada um.
+# ==============================================================================
+
+ShiftRow = namedtuple("ShiftRow", ["turno", "realizado", "meta", "desvio", "observacoes"])
+
+TagSection = namedtuple("TagSection", [
+    "tag", "shifts", "realizado", "maint_start", "maint_due", "maint_real_due", "notes",
+    "total_tubos", "acumulado", "pendentes", "perc",
+    "impacts_today",      # Series categoria -> horas do dia (só > 0)
+    "impact_history",     # Series categoria -> horas de todo o histórico (só > 0)
+])
+
+TypeSection = namedtuple("TypeSection", [
+    "name", "goal_per_shift", "realizado", "meta", "desvio", "eficiencia", "impact_hours",
+    "tags", "observations",
+])
+
+ReportModel = namedtuple("ReportModel", [
+    "date_str", "dt_ref", "types",
+    "impact_categories",  # categorias do dia, em ordem alfabética
+    "impact_matrix",      # DataFrame tag x categoria com as horas do dia
+    "impacts_today",      # eventos do dia (uma linha por evento)
+    "impacts_by_tag",     # Series tag -> horas do dia, decrescente
+])
+
+
+def _parse_date(date_str):
+    try:
+        return pd.to_datetime(date_str, format="%d/%m/%Y")
+    except (ValueError, TypeError):
+        return pd.to_datetime(date_str)
+
+
+def _progress_lookup(df_history, dt_ref, df_progress):
+    """tag -> (total_tubos, acumulado, pendentes): livro de avanço (ledger.py) ou o histórico recebido."""
+    if df_progress is not None:
+        return {r.equipment_tag: (r.total_tubos, r.acumulado, r.pendentes) for r in df_progress.itertuples(index=False)}
+    if df_history.empty:
+        return {}
+    hist = df_history[df_history['date'] <= dt_ref]
+    total_col = hist['total_tubos'] if 'total_tubos' in hist.columns else pd.Series(0, index=hist.index)
+    agg = pd.DataFrame({'equipment_tag': hist['equipment_tag'].astype(str), 'total_tubos': total_col, 'quantity': hist['quantity']})
+    agg = agg.groupby('equipment_tag').agg(total_tubos=('total_tubos', 'max'), acumulado=('quantity', 'sum'))
+    return {tag: (r.total_tubos, r.acumulado, r.total_tubos - r.acumulado) for tag, r in agg.iterrows()}
+
+
+def build_report_model(df_day, df_history, date_str, df_impacts_history, df_impacts_today, df_progress=None, holidays=()):
+    """Agrega os dados do dia para os relatórios (ver ReportModel). holidays: [ciclo].feriados do secrets.toml."""
+    dt_ref = _parse_date(date_str)
+    calendar = get_calendar(dt_ref.date(), holidays=list(holidays))
+    progress = _progress_lookup(df_history, dt_ref, df_progress)
+
+    # Impactos do dia: uma agregação tag x categoria para o relatório inteiro
+    if df_impacts_today.empty:
+        df_imp = pd.DataFrame(columns=['equipment_tag', 'Tipo', 'Categoria', 'horas', 'description'])
+    else:
+        df_imp = df_impacts_today.reset_index(drop=True)
+    categories = sorted(df_imp['Categoria'].dropna().unique())
+    matrix = df_imp.groupby(['equipment_tag', 'Categoria'])['horas'].sum().unstack(fill_value=0)
+    matrix = matrix.reindex(columns=categories, fill_value=0)
+    hours_by_type = df_imp.groupby('Tipo')['horas'].sum().to_dict()
+    impacts_by_tag = df_imp.groupby('equipment_tag')['horas'].sum().sort_values(ascending=False)
+
+    # Histórico de impactos por tag x categoria (índice de somas acumuladas)
+    history = get_impact_index(df_impacts_history).prefix_index().history_matrix()
+
+    types = []
+    for m_type, df_type in df_day.groupby('Tipo', sort=True, observed=True):
+        tags = []
+        for tag, df_tag in df_type.groupby('Tag', sort=True, observed=True):
+            first = df_tag.iloc[0]
+            total, acumulado, pendentes = progress.get(tag, (0, 0, 0))
+            today = matrix.loc[tag] if tag in matrix.index else pd.Series(dtype='float64')
+            hist = history.loc[tag] if tag in history.index else pd.Series(dtype='float64')
+            tags.append(TagSection(
+                tag=tag,
+                shifts=[ShiftRow(*r) for r in zip(df_tag['Turno'], df_tag['Realizado'], df_tag['Meta'],
+                                                   df_tag['Desvio'], df_tag['Observações'])],
+                realizado=df_tag['Realizado'].sum(),
+                maint_start=first.get('maint_start_date'),
+                maint_due=first.get('maint_due_date'),
+                maint_real_due=first.get('maint_real_due_date'),
+                notes=first['Observações'],
+                total_tubos=total, acumulado=acumulado, pendentes=pendentes,
+                perc=(acumulado / total * 100) if total > 0 else 0,
+                impacts_today=today[today > 0],
+                impact_history=hist[hist > 0],
+            ))
+
+        realizado, meta = df_type['Realizado'].sum(), df_type['Meta'].sum()
+        notes = df_type['Observações']
+        types.append(TypeSection(
+            name=m_type,
+            goal_per_shift=calendar.goal_per_shift(m_type),
+            realizado=realizado, meta=meta, desvio=realizado - meta,
+            eficiencia=(realizado / meta * 100) if meta > 0 else 0,
+            impact_hours=hours_by_type.get(m_type, 0),
+            tags=tags,
+            observations=list(notes[notes != '-'].unique()),
+        ))
+
+    return ReportModel(
+        date_str=date_str, dt_ref=dt_ref, types=types,
+        impact_categories=categories, impact_matrix=matrix,
+        impacts_today=df_imp, impacts_by_tag=impacts_by_tag,
+    )
+
+
+# Modelos recentes por conteúdo (data + DataFrames): os formatos do mesmo dia
+# compartilham a mesma agregação
+_MODEL_MEMO_SIZE = 8
+_model_memo = OrderedDict()
+_model_lock = threading.Lock()
+
+
+def get_report_model(df_day, df_history, date_str, df_impacts_history, df_impacts_today, df_progress=None, holidays=()):
+    """build_report_model memoizado pelo conteúdo dos argumentos."""
+    args = (df_day, df_history, date_str, df_impacts_history, df_impacts_today, df_progress, tuple(holidays))
+    key = make_key("report_model", args, {})
+    with _model_lock:
+        if key in _model_memo:
+            _model_memo.move_to_end(key)
+            return _model_memo[key]
+    model = build_report_model(*args)
+    with _model_lock:
+        _model_memo[key] = model
+        while len(_model_memo) > _MODEL_MEMO_SIZE:
+            _model_memo.popitem(last=False)
+    return model
@@ -0,0 +1,139 @@
+import threading
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from utils import get_fiscal_period
+from cache import cached
+from data import load_cycle_partition, load_impacts_data, cycle_partitions, data_ttl
+from intervals import get_impact_index
+from archive import archived_bundle
+
+# ==============================================================================
+# Rollups históricos (Relatórios Analíticos)
+# ------------------------------------------------------------------------------
+# As tendências de 12+ ciclos não podem depender das linhas brutas (um ano de
+# apontamentos a cada rerun). Guardamos agregados diários por ciclo:
+#   - produção: (date, maintenance_type, equipment_area, equipment_tag) -> quantity, meta_turno
+#   - impactos: (date, Tipo, equipment_tag, Categoria) -> horas (recortadas por dia, intervals.py)
+#
+# Ciclos fechados viram entradas de longa duração no cache compartilhado
+# (Parquet em disco, partição ("cycle", início)), calculadas uma única vez;
+# se um apontamento antigo for corrigido, o change feed invalida só aquele
+# ciclo. Ciclos já materializados pelo job noturno (archive.py) são agregados
+# a partir do arquivo, sem consultar o banco. O ciclo aberto é agregado na
+# hora a partir da partição já carregada pelo dashboard.
+# ==============================================================================
+
+# Ciclos fechados quase não mudam; o change feed cobre as correções tardias
+ROLLUP_TTL = 7 * 24 * 3600
+
+PRODUCTION_KEYS = ['date', 'maintenance_type', 'equipment_area', 'equipment_tag']
+IMPACT_KEYS = ['date', 'Tipo', 'equipment_tag', 'Categoria']
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="rollup-build")
+
+
+def recent_cycles(end_date, n_cycles):
+    """Os n_cycles ciclos fiscais até o que contém end_date: [(inicio, fim, label)], do mais antigo ao mais novo."""
+    cycles = []
+    current = end_date
+    for _ in range(n_cycles):
+        c_start, c_end, label = get_fiscal_period(current)
+        cycles.append((c_start, c_end, label))
+        current = c_start - timedelta(days=1)
+    return cycles[::-1]
+
+
+def daily_production_rollup(df):
+    """Agrega as linhas de produção por dia, tipo, área e equipamento."""
+    if df.empty:
+        return pd.DataFrame(columns=PRODUCTION_KEYS + ['quantity', 'meta_turno'])
+    return df.groupby(PRODUCTION_KEYS, observed=True)[['quantity', 'meta_turno']].sum().reset_index()
+
+
+def _label_cycle(df, c_start, label):
+    df['ciclo'] = pd.Timestamp(c_start)
+    df['ciclo_label'] = label
+    return df
+
+
+@cached("rollup_production", ttl=ROLLUP_TTL, partitions=cycle_partitions)
+def closed_cycle_rollup(cycle_start, cycle_end):
+    """Rollup de um ciclo fechado, direto do banco (não disputa a partição bruta do cache)."""
+    return daily_production_rollup(load_cycle_partition.__wrapped__(cycle_start, cycle_end))
+
+
+_archived_lock = threading.Lock()
+_archived_rollups = {}   # início do ciclo -> (frame arquivado, rollup)
+
+
+def archived_cycle_rollup(cycle_start):
+    """Rollup de um ciclo do arquivo noturno (refeito só quando a versão arquivada muda), ou None."""
+    archived = archived_bundle(cycle_start)
+    if archived is None:
+        return None
+    with _archived_lock:
+        frame, rollup = _archived_rollups.get(cycle_start, (None, None))
+        if frame is archived.cycle:
+            return rollup
+    rollup = daily_production_rollup(archived.cycle)
+    with _archived_lock:
+        _archived_rollups[cycle_start] = (archived.cycle, rollup)
+    return rollup
+
+
+def cycle_rollup(cycle_start, cycle_end, label):
+    if cycle_end < date.today():
+        df = archived_cycle_rollup(cycle_start)
+        if df is None:
+            df = closed_cycle_rollup(cycle_start, cycle_end)
+    else:
+        df = daily_production_rollup(load_cycle_partition(cycle_start, cycle_end))
+    return _label_cycle(df.copy(), cycle_start, label)
+
+
+@cached("rollup_impacts", ttl=data_ttl, stale_while_revalidate=True,
+        partitions=lambda: {("dataset", "impacts")})
+def impact_rollup():
+    """Horas de impacto por dia, tipo, equipamento e categoria (todo o histórico)."""
+    df_imp = load_impacts_data()
+    if df_imp.empty:
+        return pd.DataFrame(columns=IMPACT_KEYS + ['horas'])
+    # Horas já recortadas por dia (um evento que vira a noite conta nos dois dias)
+    df = get_impact_index(df_imp).daily_hours(by=IMPACT_KEYS[1:])
+    for col in ['Tipo', 'equipment_tag', 'Categoria']:
+        df[col] = df[col].fillna('N/A').astype('category')
+    return df.groupby(IMPACT_KEYS, observed=True)['horas'].sum().reset_index()
+
+
+def load_history(end_date, n_cycles=12):
+    """
+    Rollups diários de produção e de impactos dos últimos n_cycles ciclos até end_date.
+    Ambos ganham as colunas 'ciclo' (início, datetime) e 'ciclo_label'.
+    """
+    cycles = recent_cycles(end_date, n_cycles)
+    frames = list(_executor.map(lambda c: cycle_rollup(*c), cycles))
+    frames = [f for f in frames if not f.empty]
+    df_prod = pd.concat(frames, ignore_index=True) if frames else daily_production_rollup(pd.DataFrame())
+    for col in ['maintenance_type', 'equipment_area', 'equipment_tag']:
+        df_prod[col] = df_prod[col].astype('category')
+
+    df_imp = impact_rollup()
+    starts = pd.to_datetime([c[0] for c in cycles])
+    first, last = starts[0], pd.Timestamp(cycles[-1][1])
+    df_imp = df_imp[(df_imp['date'] >= first) & (df_imp['date'] <= last)].copy()
+    # Ciclo de cada dia: início mais recente <= data
+    pos = starts.searchsorted(df_imp['date'], side='right') - 1
+    df_imp['ciclo'] = starts[pos]
+    df_imp['ciclo_label'] = [cycles[i][2] for i in pos]
+
+    return df_prod, df_imp
+
+
+def cycle_summary(df_daily, by=None, value_cols=('quantity', 'meta_turno')):
+    """Totais por ciclo (e opcionalmente por outra dimensão), ordenados do ciclo mais antigo ao mais novo."""
+    keys = ['ciclo', 'ciclo_label'] + ([by] if by else [])
+    out = df_daily.groupby(keys, observed=True)[list(value_cols)].sum().reset_index()
+    return out.sort_values(keys).reset_index(drop=True)
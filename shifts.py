@@ -1,16 +1,32 @@
 import pandas as pd
 
-def prepare_shift_dataframe(df_source, selected_date):
-    df_day = df_source[df_source['date'] == selected_date].copy()
+def join_notes(values):
+    return " | ".join([str(v) for v in values if v and str(v).strip() != ''])
+
+
+def prepare_shift_dataframe(df_source, selected_date, notes=None):
+    """
+    Consolida o dia por TAG e turno. `notes` (equipment_tag, shift_name, notes)
+    traz as anotações buscadas à parte (data.load_day_notes), quando o frame
+    de origem não tem a coluna de texto.
+    """
+    df_day = df_source[df_source['date'] == pd.Timestamp(selected_date)].copy()
     
     if df_day.empty:
         return pd.DataFrame()
 
-    if 'notes' not in df_day.columns:
+    if notes is not None:
+        df_day = df_day.drop(columns=['notes'], errors='ignore')
+        by_key = notes.groupby(['equipment_tag', 'shift_name'])['notes'].agg(join_notes)
+        keys = zip(df_day['equipment_tag'].astype(str), df_day['shift_name'].astype(str))
+        # Uma vez por TAG/turno (a agregação abaixo junta as linhas do mesmo turno)
+        df_day['notes'] = [by_key.get(k, "") for k in keys]
+        df_day.loc[df_day.duplicated(['equipment_tag', 'shift_name']), 'notes'] = ""
+    elif 'notes' not in df_day.columns:
         df_day['notes'] = ""
 
     # Agrupa por TAG e Turno
-    df_result = df_day.groupby(['equipment_tag', 'shift_name']).agg({
+    df_result = df_day.groupby(['equipment_tag', 'shift_name'], observed=True).agg({
         'quantity': 'sum',
         'meta_turno': 'first',
         'maintenance_type': 'first',
@@ -22,7 +38,7 @@ def prepare_shift_dataframe(df_source, selected_date):
         'maint_status': 'first',
         # --------------------------------------------------------------------------------------------
         
-        'notes': lambda x: " | ".join([str(v) for v in x if v and str(v).strip() != ''])
+        'notes': join_notes
     }).reset_index()
 
     df_result['quantity'] = pd.to_numeric(df_result['quantity']).fillna(0)
@@ -45,4 +61,23 @@ def prepare_shift_dataframe(df_source, selected_date):
         axis=1
     )
 
-    return df_result
\ No newline at end of file
+    return df_result
+
+
+def fill_missing_goals(df_shifts, calendar):
+    """
+    Turnos sem meta cadastrada no apontamento (Meta 0) passam a usar a meta
+    contratual do tipo (calendar.goal_per_shift), e Desvio/Status são
+    recalculados: o cartão, a tabela e os relatórios usam a mesma meta.
+    """
+    if df_shifts.empty:
+        return df_shifts
+    missing = df_shifts['Meta'] == 0
+    if not missing.any():
+        return df_shifts
+    df_shifts = df_shifts.copy()
+    goals = df_shifts.loc[missing, 'Tipo'].map(lambda t: calendar.goal_per_shift(t))
+    df_shifts.loc[missing, 'Meta'] = goals.astype(df_shifts['Meta'].dtype)
+    df_shifts['Desvio'] = df_shifts['Realizado'] - df_shifts['Meta']
+    df_shifts['Status'] = ['🟢 OK' if d >= 0 else '🔴 Abaixo' for d in df_shifts['Desvio']]
+    return df_shifts
\ No newline at end of file
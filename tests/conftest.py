@@ -0,0 +1,38 @@
+import os
+import sys
+import time
+
+import pytest
+
+# Cache só em memória nos testes: nada de .cache/ no diretório do projeto
+os.environ.setdefault("DASHBOARD_CACHE_BACKEND", "memory")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def fresh_cache():
+    """Cache vazio (backend em memória, cache local e índice de partições) para cada teste."""
+    import cache
+
+    cache.set_backend(cache.MemoryBackend())
+    cache.local_cache.clear()
+    with cache._partition_lock:
+        cache._partition_index.clear()
+        cache._key_loaders.clear()
+    yield cache
+    wait_refreshes()
+    cache.local_cache.clear()
+
+
+def wait_refreshes(timeout=5.0):
+    """Espera as atualizações em segundo plano do cache terminarem."""
+    import cache
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with cache._refreshing_lock:
+            if not cache._refreshing:
+                return
+        time.sleep(0.01)
+    raise AssertionError("atualizações do cache não terminaram")
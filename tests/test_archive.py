@@ -0,0 +1,103 @@
+import os
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+import archive
+from changefeed import LocalEmitter
+
+
+@pytest.fixture
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", str(tmp_path))
+    archive._read_manifest.cache_clear()
+    archive._read_frame.cache_clear()
+    yield tmp_path
+    archive._read_manifest.cache_clear()
+    archive._read_frame.cache_clear()
+
+
+def publish_day(day):
+    def write(path):
+        empty = pd.DataFrame({"x": []})
+        for name in ("shifts", "impacts", "progress", "kpis"):
+            empty.to_parquet(os.path.join(path, f"{name}.parquet"))
+        archive._write_manifest(path, date=day.isoformat(), version="v1", reports=[])
+
+    entry_dir = archive._day_dir(day)
+    os.makedirs(entry_dir, exist_ok=True)
+    archive._publish(entry_dir, "v1", write)
+
+
+def publish_cycle(cycle_start):
+    def write(path):
+        empty = pd.DataFrame({"x": []})
+        for name in ("cycle", "metrics", "impacts"):
+            empty.to_parquet(os.path.join(path, f"{name}.parquet"))
+        archive._write_manifest(path, cycle_start=cycle_start.isoformat(), version="v1")
+
+    entry_dir = archive._cycle_dir(cycle_start)
+    os.makedirs(entry_dir, exist_ok=True)
+    archive._publish(entry_dir, "v1", write)
+
+
+def correction(day):
+    return {"table": "apontamentos", "type": "UPDATE", "record": {"date": day.isoformat(), "equipment_tag": "TC-001"}}
+
+
+def test_correction_after_archiving_falls_back_to_live_load(archive_dir):
+    cycle_start = date(2025, 8, 16)
+    for day in (date(2025, 8, 20), date(2025, 8, 25), date(2025, 9, 1)):
+        publish_day(day)
+    publish_cycle(cycle_start)
+    assert archive.archived_bundle(cycle_start) is not None
+
+    time.sleep(0.01)
+    emitter = LocalEmitter()
+    emitter.subscribe(archive.mark_touched)
+    emitter.emit(correction(date(2025, 8, 25)))
+
+    assert archive.archived_bundle(cycle_start) is None
+    assert archive.archived_day(date(2025, 8, 20)) is not None    # antes da correção
+    assert archive.archived_day(date(2025, 8, 25)) is None
+    assert archive.archived_day(date(2025, 9, 1)) is None         # ciclo acumulado até o dia mudou
+    # Outro ciclo não é afetado
+    publish_cycle(date(2025, 9, 16))
+    assert archive.archived_bundle(date(2025, 9, 16)) is not None
+
+
+def test_open_days_are_not_marked(archive_dir):
+    archive.mark_touched(correction(date.today()))
+    assert archive.touched_days() == {}
+
+
+def test_run_archive_redoes_touched_days_and_clears_marks(archive_dir, monkeypatch):
+    days, cycles = [], []
+    monkeypatch.setattr(archive, "archive_day", lambda day, formats, holidays: days.append(day) or "v2")
+    monkeypatch.setattr(archive, "archive_cycle", lambda c_start: cycles.append(c_start))
+
+    archive.mark_touched(correction(date(2025, 9, 12)))
+    yesterday = date.today() - timedelta(days=1)
+    archive.run_archive(yesterday, yesterday)
+
+    # Do dia corrigido até o fim do seu ciclo, além da janela
+    assert days[:4] == [date(2025, 9, 12), date(2025, 9, 13), date(2025, 9, 14), date(2025, 9, 15)]
+    assert days[-1] == yesterday
+    assert date(2025, 8, 16) in cycles
+    assert archive.touched_days() == {}
+
+
+def test_marks_rewritten_during_the_run_are_kept(archive_dir, monkeypatch):
+    def archive_day(day, formats, holidays):
+        # Outra correção chega enquanto o job roda
+        time.sleep(0.01)
+        archive.mark_touched(correction(date(2025, 9, 12)))
+
+    monkeypatch.setattr(archive, "archive_day", archive_day)
+    monkeypatch.setattr(archive, "archive_cycle", lambda c_start: None)
+
+    archive.mark_touched(correction(date(2025, 9, 12)))
+    archive.run_archive(date(2025, 9, 15), date(2025, 9, 15))
+    assert list(archive.touched_days()) == [date(2025, 9, 12)]
@@ -0,0 +1,107 @@
+import time
+
+import pandas as pd
+
+import cache
+from conftest import wait_refreshes
+
+
+def test_stale_while_revalidate_serves_old_value_then_refreshes(fresh_cache):
+    version = {"n": 1}
+
+    @fresh_cache.cached("t_swr", ttl=0.05, stale_while_revalidate=True)
+    def load():
+        return version["n"]
+
+    assert load() == 1
+    version["n"] = 2
+    time.sleep(0.1)
+    assert load() == 1          # vencido: devolvido na hora, recarga em segundo plano
+    wait_refreshes()
+    assert load() == 2
+
+
+def test_snapshot_info_reports_fetch_time(fresh_cache):
+    @fresh_cache.cached("t_info")
+    def load(x):
+        return x
+
+    assert load.snapshot_info(1) is None
+    before = time.time()
+    load(1)
+    fetched_at, refreshing = load.snapshot_info(1)
+    assert fetched_at >= before and not refreshing
+
+
+def test_local_cache_byte_budget_evicts_least_recently_used():
+    value = "x" * 1000
+    size = cache.deep_sizeof(value)
+    local = cache.LocalCache(max_bytes=size * 2)
+    local.set("a", value)
+    local.set("b", value)
+    local.get("a")               # "b" passa a ser o menos usado
+    local.set("c", value)
+
+    assert local.get("b") is None
+    assert local.get("a") == value and local.get("c") == value
+    assert local.stats()["evictions"] == 1
+    assert local.stats()["bytes"] <= local.max_bytes
+
+
+def test_local_cache_skips_values_larger_than_budget():
+    local = cache.LocalCache(max_bytes=100)
+    local.set("big", pd.DataFrame({"a": range(1000)}))
+    assert local.get("big") is None
+    assert local.stats()["bytes"] == 0
+
+
+def test_memory_backend_lock_is_per_key():
+    backend = cache.MemoryBackend()
+    lock_a = backend.lock("a")
+    assert backend.lock("a") is lock_a
+    assert backend.lock("b") is not lock_a
+
+
+def test_shared_cache_serves_stale_snapshot_when_loader_fails(fresh_cache):
+    state = {"fail": False}
+
+    @fresh_cache.shared_cache("t_stale", ttl=0.05)
+    def load():
+        if state["fail"]:
+            raise ConnectionError("fora do ar")
+        return "snapshot"
+
+    assert load() == "snapshot"
+    time.sleep(0.1)
+    state["fail"] = True
+    assert load() == "snapshot"
+
+
+def test_disk_backend_enforces_size_lru(tmp_path):
+    backend = cache.DiskBackend(str(tmp_path), max_bytes=2500)
+    backend.set("a", b"a" * 1000)
+    time.sleep(0.01)
+    backend.set("b", b"b" * 1000)
+    time.sleep(0.01)
+    backend.get("a")             # acesso renova "a"
+    time.sleep(0.01)
+    backend.set("c", b"c" * 1000)
+
+    assert backend.get("b") is None
+    assert backend.get("a") == b"a" * 1000
+    assert backend.get("c") == b"c" * 1000
+
+
+def test_shared_file_cache_handle_survives_eviction(tmp_path):
+    cache.set_backend(cache.DiskBackend(str(tmp_path), max_bytes=10))
+    try:
+        @cache.shared_file_cache("t_pdf")
+        def build(sink):
+            sink.write(b"%PDF" + b"0" * 100)
+
+        with build() as fh:
+            assert fh.read().startswith(b"%PDF")
+        # Maior que o limite: saiu do disco, mas o handle já tinha sido aberto
+        assert not any(name.endswith(".data") for name in (p.name for p in tmp_path.iterdir()))
+    finally:
+        cache.set_backend(cache.MemoryBackend())
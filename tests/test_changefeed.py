@@ -0,0 +1,262 @@
+import sys
+import types
+import asyncio
+import threading
+from collections import Counter
+from datetime import date
+
+import pytest
+
+import changefeed
+from changefeed import LocalEmitter, handle_change, partitions_for_event
+from conftest import wait_refreshes
+
+
+def production_event(day, tag, table="apontamentos", type_="UPDATE"):
+    return {"table": table, "type": type_, "record": {"date": day, "equipment_tag": tag}, "old_record": {}}
+
+
+def test_partitions_for_production_row():
+    parts = partitions_for_event(production_event("2026-09-10", "TC-001"))
+    assert ("cycle", "2026-08-16") in parts
+    assert ("date", "2026-09-10") in parts
+    assert ("tag", "TC-001") in parts
+    assert ("dataset", "production") not in parts
+
+
+def test_catalog_tables_invalidate_whole_production():
+    event = {"table": "maintenances", "type": "UPDATE", "record": {"id": 7, "created_at": "2025-01-02"}}
+    parts = partitions_for_event(event)
+    assert ("dataset", "production") in parts
+    assert not any(kind == "cycle" for kind, _ in parts)
+
+
+@pytest.fixture
+def loaders(fresh_cache):
+    """Loaders com partições como os de data.py; calls conta as cargas por (loader, argumento)."""
+    calls = Counter()
+
+    @fresh_cache.cached("t_cycle", partitions=lambda c: {("dataset", "production"), ("cycle", c)})
+    def by_cycle(c):
+        calls["cycle", c] += 1
+        return c
+
+    @fresh_cache.cached("t_date", partitions=lambda d: {("date", d)})
+    def by_date(d):
+        calls["date", d] += 1
+        return d
+
+    @fresh_cache.cached("t_tag", partitions=lambda t: {("tag", t)})
+    def by_tag(t):
+        calls["tag", t] += 1
+        return t
+
+    @fresh_cache.cached("t_impacts", partitions=lambda: {("dataset", "impacts")})
+    def impacts():
+        calls["impacts"] += 1
+        return "impacts"
+
+    def load_all():
+        for c in ("2026-08-16", "2026-09-16"):
+            by_cycle(c)
+        for d in ("2026-09-10", "2026-09-11"):
+            by_date(d)
+        for t in ("TC-001", "TC-002"):
+            by_tag(t)
+        impacts()
+
+    load_all()
+    assert set(calls.values()) == {1}
+    return calls, load_all
+
+
+def test_local_emitter_drops_only_affected_partitions(loaders):
+    calls, load_all = loaders
+    emitter = LocalEmitter()
+    emitter.subscribe(handle_change)
+
+    emitter.emit(production_event("2026-09-10", "TC-001"))
+    wait_refreshes()
+    load_all()
+
+    # Recarregadas: o ciclo, a data e a tag do evento
+    assert calls["cycle", "2026-08-16"] == 2
+    assert calls["date", "2026-09-10"] == 2
+    assert calls["tag", "TC-001"] == 2
+    # Intocadas
+    assert calls["cycle", "2026-09-16"] == 1
+    assert calls["date", "2026-09-11"] == 1
+    assert calls["tag", "TC-002"] == 1
+    assert calls["impacts"] == 1
+
+
+def test_impact_event_drops_only_impacts(loaders):
+    calls, load_all = loaders
+    emitter = LocalEmitter()
+    emitter.subscribe(handle_change)
+
+    emitter.emit({"table": "maintenance_impacts", "type": "INSERT", "record": {"start_time": "2026-09-10T10:00:00Z"}})
+    wait_refreshes()
+    load_all()
+
+    assert calls["impacts"] == 2
+    assert sum(n for key, n in calls.items() if key != "impacts") == 6
+
+
+def test_reconnect_and_drop_invalidate_feed_datasets(loaders):
+    calls, load_all = loaders
+    listener = types.SimpleNamespace(connected=False)
+
+    changefeed.set_connected(listener, True)      # primeira conexão: nada a invalidar
+    wait_refreshes()
+    load_all()
+    assert calls["cycle", "2026-08-16"] == 1
+
+    changefeed.set_connected(listener, False)     # caiu: eventos deixam de chegar
+    wait_refreshes()
+    load_all()
+    assert calls["cycle", "2026-08-16"] == 2
+    assert calls["impacts"] == 2
+    assert calls["date", "2026-09-10"] == 1       # entradas sem dataset não dependem do feed
+
+    changefeed.set_connected(listener, True)      # voltou: eventos do intervalo se perderam
+    wait_refreshes()
+    load_all()
+    assert calls["cycle", "2026-09-16"] == 3
+
+
+# ------------------------------------------------------------------------------
+# Reconexão dos listeners
+# ------------------------------------------------------------------------------
+@pytest.fixture
+def fast_reconnect(monkeypatch, fresh_cache):
+    monkeypatch.setattr(changefeed, "RECONNECT_MIN", 0.01)
+    monkeypatch.setattr(changefeed, "RECONNECT_MAX", 0.05)
+
+
+def wait_for(condition, timeout=5.0):
+    done = threading.Event()
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        done.wait(0.01)
+    raise AssertionError("condição não atingida")
+
+
+class FakeChannel:
+    def __init__(self, client):
+        self.client = client
+
+    def on_postgres_changes(self, event, schema, table, callback):
+        self.client.tables.append(table)
+
+    async def subscribe(self, callback):
+        callback("SUBSCRIBED")
+        if self.client.attempt == 1:
+            # A primeira assinatura cai logo depois de conectar
+            asyncio.get_running_loop().call_later(0.02, callback, "CHANNEL_ERROR")
+        return self
+
+
+class FakeAsyncClient:
+    attempts = 0
+
+    def __init__(self):
+        FakeAsyncClient.attempts += 1
+        self.attempt = FakeAsyncClient.attempts
+        self.tables = []
+        self.removed = False
+
+    def channel(self, name):
+        return FakeChannel(self)
+
+    async def remove_all_channels(self):
+        self.removed = True
+
+
+def test_realtime_listener_resubscribes_after_channel_error(monkeypatch, fast_reconnect):
+    FakeAsyncClient.attempts = 0
+
+    async def acreate_client(url, key):
+        return FakeAsyncClient()
+
+    monkeypatch.setitem(sys.modules, "supabase", types.SimpleNamespace(acreate_client=acreate_client))
+    listener = changefeed.SupabaseRealtimeListener("http://x", "k", ["apontamentos"]).start()
+    try:
+        wait_for(lambda: FakeAsyncClient.attempts >= 2 and listener.connected)
+    finally:
+        listener.stop()
+        listener._thread.join(timeout=5)
+    assert not listener._thread.is_alive()
+
+
+class FakeConnection:
+    def __init__(self, fail):
+        self.fail = fail
+        self.closed = False
+
+    def set_isolation_level(self, level):
+        pass
+
+    def cursor(self):
+        conn = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql):
+                if conn.fail:
+                    raise OSError("conexão perdida")
+
+        return Cursor()
+
+    def close(self):
+        self.closed = True
+
+
+def test_postgres_listener_closes_connection_before_retry(monkeypatch, fast_reconnect):
+    connections = []
+
+    def connect(dsn):
+        conn = FakeConnection(fail=True)
+        connections.append(conn)
+        return conn
+
+    fake = types.SimpleNamespace(connect=connect, extensions=types.SimpleNamespace(ISOLATION_LEVEL_AUTOCOMMIT=0))
+    monkeypatch.setitem(sys.modules, "psycopg2", fake)
+    listener = changefeed.PostgresListener("postgresql://x").start()
+    try:
+        wait_for(lambda: len(connections) >= 3)
+    finally:
+        listener.stop()
+        listener._thread.join(timeout=5)
+    assert all(c.closed for c in connections)
+    assert not listener.connected
+
+
+def test_build_listener_realtime_subscribes_every_cached_table(monkeypatch):
+    captured = {}
+
+    class Listener:
+        def __init__(self, url, key, tables):
+            captured["tables"] = tables
+
+        def subscribe(self, handler):
+            pass
+
+        def start(self):
+            return self
+
+    monkeypatch.setattr(changefeed, "SupabaseRealtimeListener", Listener)
+    changefeed.build_listener({"mode": "realtime"}, "http://x", "k")
+    assert set(captured["tables"]) == {changefeed.PRODUCTION_TABLE, *changefeed.TABLE_DATASETS}
+
+
+def test_fiscal_cycle_of_event_is_the_dashboard_cycle():
+    # 16/09 já é o ciclo seguinte (16 a 15)
+    parts = partitions_for_event(production_event("2026-09-16", "TC-001"))
+    assert ("cycle", date(2026, 9, 16).isoformat()) in parts
@@ -0,0 +1,47 @@
+from datetime import date
+
+import pytest
+
+from ciclo import CycleCalendar, get_calendar
+
+# Ciclo de 16/08/2026 (domingo) a 15/09/2026: 22 dias úteis, 21 com o feriado de 07/09
+HOLIDAYS = ["2026-09-07"]
+
+
+@pytest.fixture
+def calendar():
+    return CycleCalendar(date(2026, 8, 16), date(2026, 10, 15), holidays=HOLIDAYS)
+
+
+def test_business_days_skip_weekends_and_holidays(calendar):
+    assert calendar.business_days_to_date(date(2026, 8, 16)) == 0
+    assert calendar.business_days_to_date(date(2026, 8, 21)) == 5
+    assert calendar.business_days_to_date(date(2026, 9, 15)) == 21
+    assert calendar.expected_on(date(2026, 9, 7), "RETUBAGEM") == 0
+    assert calendar.expected_on(date(2026, 9, 8), "RETUBAGEM") == 750
+
+
+def test_released_to_date_accumulates_and_resets_per_cycle(calendar):
+    assert calendar.released_to_date(date(2026, 8, 21), "EXTRAÇÃO") == 5 * 150
+    assert calendar.released_to_date(date(2026, 9, 15), "EXTRAÇÃO") == 21 * 150
+    # 16/09 (quarta) abre o ciclo seguinte
+    assert calendar.released_to_date(date(2026, 9, 16), "EXTRAÇÃO") == 150
+
+
+def test_cycle_total_and_aliases(calendar):
+    assert calendar.cycle_total(date(2026, 9, 1), "DESOBSTRUÇÃO") == 21 * 78
+    assert calendar.goal_per_shift("madrilhamento") == 250
+    assert calendar.released_to_date(date(2026, 8, 21), "desobstrucao") == 5 * 78
+    assert calendar.cycle_total(date(2026, 9, 1), "INEXISTENTE") == 0
+
+
+def test_day_outside_calendar_raises(calendar):
+    with pytest.raises(KeyError):
+        calendar.released_to_date(date(2026, 10, 16), "EXTRAÇÃO")
+
+
+def test_get_calendar_covers_whole_cycles():
+    calendar = get_calendar(date(2026, 9, 1), holidays=HOLIDAYS)
+    assert calendar.days[0] == date(2026, 8, 16)
+    assert calendar.days[-1] == date(2026, 9, 15)
+    assert get_calendar(date(2026, 9, 10), holidays=HOLIDAYS) is calendar
@@ -0,0 +1,75 @@
+import io
+import zipfile
+from datetime import date
+
+import pandas as pd
+import pytest
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+import export_data
+
+START, END = date(2026, 9, 16), date(2026, 10, 15)
+
+
+def production_pages(start_date, end_date, areas=None, tags=None, **kwargs):
+    df = pd.DataFrame({
+        'date': pd.to_datetime(['2026-09-16', '2026-09-17', '2026-09-17']),
+        'equipment_tag': ['TC-001', 'TC-002', 'TC-003'],
+        'equipment_area': ['DIGESTÃO', 'DIGESTÃO', 'CALCINAÇÃO'],
+        'quantity': [10, 20, 30],
+    })
+    if areas is not None:
+        df = df[df['equipment_area'].isin(areas)]
+    if tags is not None:
+        df = df[df['equipment_tag'].isin(tags)]
+    yield df
+
+
+def impact_pages(start_date, end_date, **kwargs):
+    yield pd.DataFrame({
+        'id': [1, 2, 3],
+        'equipment_tag': ['TC-001', 'TC-002', 'TC-003'],
+        'horas': [1.5, 2.0, 0.5],
+    })
+
+
+@pytest.fixture(autouse=True)
+def fake_pages(monkeypatch):
+    monkeypatch.setattr(export_data, "iter_production_pages", production_pages)
+    monkeypatch.setattr(export_data, "iter_impact_pages", impact_pages)
+
+
+@pytest.mark.parametrize("fmt", list(export_data.WRITERS))
+def test_export_to_file_is_accepted_by_download_button(fmt):
+    fh = export_data.export_to_file(fmt, START, END)
+    try:
+        data, _ = convert_data_to_bytes_and_infer_mime(fh, unsupported_error=TypeError("tipo não suportado"))
+    finally:
+        fh.close()
+    assert zipfile.is_zipfile(io.BytesIO(data))   # .zip (csv/parquet) e .xlsx são zips
+
+
+def test_csv_export_contents():
+    with export_data.export_to_file("csv", START, END) as fh:
+        with zipfile.ZipFile(fh) as zf:
+            prod = pd.read_csv(zf.open("producao.csv"), sep=";", decimal=",", encoding="utf-8-sig")
+            imp = pd.read_csv(zf.open("impactos.csv"), sep=";", decimal=",", encoding="utf-8-sig")
+    assert list(prod['equipment_tag']) == ['TC-001', 'TC-002', 'TC-003']
+    assert list(imp['horas']) == [1.5, 2.0, 0.5]
+
+
+def exported_tags(areas=None, tags=None):
+    datasets = dict(export_data.iter_datasets(START, END, areas=areas, tags=tags))
+    prod = pd.concat(list(datasets["producao"]))
+    imp = pd.concat(list(datasets["impactos"]))
+    return sorted(prod['equipment_tag']), sorted(imp['equipment_tag'])
+
+
+def test_area_filter_applies_to_impacts(monkeypatch):
+    def tags_in_areas(start_date, end_date, areas, **kwargs):
+        return set(next(production_pages(start_date, end_date, areas=areas))['equipment_tag'])
+    monkeypatch.setattr(export_data, "tags_in_areas", tags_in_areas)
+
+    assert exported_tags(areas=['DIGESTÃO']) == (['TC-001', 'TC-002'], ['TC-001', 'TC-002'])
+    assert exported_tags(areas=['DIGESTÃO'], tags=['TC-002', 'TC-003']) == (['TC-002'], ['TC-002'])
+    assert exported_tags(tags=['TC-003']) == (['TC-003'], ['TC-003'])
@@ -0,0 +1,71 @@
+import pandas as pd
+import pytest
+
+from intervals import ImpactIndex, split_intervals
+
+
+def impacts(*rows):
+    return pd.DataFrame([
+        {"id": i, "equipment_tag": tag, "Tipo": "RETUBAGEM", "Categoria": cat, "Detalhe": "", "description": "",
+         "start_time": start, "end_time": end}
+        for i, (tag, cat, start, end) in enumerate(rows)
+    ])
+
+
+def test_split_on_midnight_and_shift_boundaries():
+    event, start, end, pos = split_intervals(
+        pd.to_datetime(["2026-09-10 21:00"]).to_numpy(), pd.to_datetime(["2026-09-11 07:00"]).to_numpy()
+    )
+    assert list(event) == [0, 0, 0, 0]
+    assert [str(s)[11:16] for s in start] == ["21:00", "22:00", "00:00", "06:00"]
+    assert [str(e)[11:16] for e in end] == ["22:00", "00:00", "06:00", "07:00"]
+
+
+def test_overnight_impact_splits_across_days_and_shifts():
+    index = ImpactIndex(impacts(("TC-001", "Mecânica", "2026-09-10 22:00", "2026-09-11 06:00")))
+    pieces = index.pieces
+    assert pieces["horas"].sum() == pytest.approx(8)
+    by_day = pieces.groupby("date")["horas"].sum()
+    assert by_day[pd.Timestamp("2026-09-10")] == pytest.approx(2)
+    assert by_day[pd.Timestamp("2026-09-11")] == pytest.approx(6)
+    # 22h às 06h é todo do Turno 3, dos dois lados da meia-noite
+    assert set(pieces["turno"]) == {"Turno 3"}
+
+
+def test_utc_times_are_converted_to_plant_time():
+    # 01:00Z = 22:00 em São Paulo (UTC-3)
+    index = ImpactIndex(impacts(("TC-001", "Mecânica", "2026-09-11T01:00:00Z", "2026-09-11T03:00:00Z")))
+    assert list(index.pieces["date"]) == [pd.Timestamp("2026-09-10")]
+    assert index.pieces["horas"].sum() == pytest.approx(2)
+
+
+def test_window_and_day_clip_hours():
+    index = ImpactIndex(impacts(
+        ("TC-001", "Mecânica", "2026-09-10 22:00", "2026-09-11 06:00"),
+        ("TC-002", "Elétrica", "2026-09-11 10:00", "2026-09-11 15:30"),
+        ("TC-003", "Elétrica", "2026-09-12 08:00", "2026-09-12 09:00"),
+    ))
+    day = index.day("2026-09-11").set_index("equipment_tag")
+    assert sorted(day.index) == ["TC-001", "TC-002"]
+    assert day.loc["TC-001", "horas"] == pytest.approx(6)
+    assert day.loc["TC-002", "horas"] == pytest.approx(5.5)
+
+    window = index.window("2026-09-11 03:00", "2026-09-11 12:00")
+    assert window.groupby("equipment_tag")["horas"].sum().to_dict() == pytest.approx({"TC-001": 3, "TC-002": 2})
+
+
+def test_prefix_index_matches_window_totals():
+    index = ImpactIndex(impacts(
+        ("TC-001", "Mecânica", "2026-09-10 22:00", "2026-09-11 06:00"),
+        ("TC-002", "Elétrica", "2026-09-11 10:00", "2026-09-11 15:30"),
+    ))
+    matrix = index.prefix_index().window_matrix("2026-09-11", "2026-09-11")
+    assert matrix.loc["TC-001", "Mecânica"] == pytest.approx(6)
+    assert matrix.loc["TC-002", "Elétrica"] == pytest.approx(5.5)
+    assert index.prefix_index().history_matrix().to_numpy().sum() == pytest.approx(13.5)
+
+
+def test_empty_and_inverted_intervals():
+    assert ImpactIndex(impacts()).day("2026-09-11").empty
+    index = ImpactIndex(impacts(("TC-001", "Mecânica", "2026-09-11 10:00", "2026-09-11 09:00")))
+    assert index.pieces.empty
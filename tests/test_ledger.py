@@ -0,0 +1,118 @@
+from collections import Counter
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import ledger
+from data import cycle_partitions
+from conftest import wait_refreshes
+from utils import get_fiscal_period, iter_fiscal_cycles
+
+# Retubagem da TC-001 iniciada três anos antes do ciclo de referência (além dos antigos 24 ciclos)
+OLD_START = pd.Timestamp("2023-09-20")
+NEW_START = pd.Timestamp("2026-09-01")
+REFERENCE = date(2026, 9, 10)
+
+
+def production(rows):
+    df = pd.DataFrame(rows, columns=ledger.LEDGER_COLUMNS)
+    for col in ('date', 'maint_start_date'):
+        df[col] = pd.to_datetime(df[col])
+    return df
+
+
+def history():
+    """Um apontamento de 10 tubos da manutenção antiga no dia 20 de cada ciclo fechado."""
+    rows = []
+    for c_start, c_end, _ in iter_fiscal_cycles(date(2023, 9, 16), date(2026, 8, 15)):
+        rows.append(("TC-001", OLD_START, pd.Timestamp(c_start.replace(day=20)), 10, 2000))
+    rows.append(("TC-002", pd.NaT, pd.Timestamp("2026-08-01"), 5, 40))
+    return production(rows)
+
+
+@pytest.fixture
+def sources(fresh_cache, monkeypatch):
+    """Banco falso: ciclos fechados (closed_cycle_ledger) e o ciclo corrente (load_cycle_partition)."""
+    calls = Counter()
+    state = {"history": history(), "current": production([
+        ("TC-001", OLD_START, "2026-08-18", 7, 2000),
+        ("TC-001", OLD_START, "2026-09-05", 3, 2000),
+        ("TC-003", NEW_START, "2026-09-02", 50, 100),
+    ])}
+
+    @fresh_cache.cached("t_ledger_cycle", partitions=cycle_partitions)
+    def closed_cycle_ledger(cycle_start, cycle_end):
+        calls[cycle_start] += 1
+        df = state["history"]
+        return df[(df['date'] >= pd.Timestamp(cycle_start)) & (df['date'] <= pd.Timestamp(cycle_end))]
+
+    def load_cycle_partition(cycle_start, cycle_end):
+        return state["current"]
+
+    monkeypatch.setattr(ledger, "closed_cycle_ledger", closed_cycle_ledger)
+    monkeypatch.setattr(ledger, "load_cycle_partition", load_cycle_partition)
+    monkeypatch.setattr(ledger, "ledger_origin", lambda: date(2023, 9, 16))
+    monkeypatch.setattr(ledger, "_memo", (None, None, None))
+    return calls, state
+
+
+def test_progress_covers_the_whole_history(sources):
+    book = ledger.get_ledger(REFERENCE)
+    # 35 ciclos fechados com 10 tubos + 7 + 3 no ciclo corrente
+    assert book.progress("TC-001", REFERENCE, OLD_START) == (2000, 360, 1640, 18.0)
+    assert book.executed_to_date("TC-001", date(2026, 8, 17), OLD_START) == 350
+    assert book.executed_to_date("TC-001", date(2026, 9, 4), OLD_START) == 357
+    assert book.progress("TC-003", REFERENCE) == (100, 50, 50, 50.0)
+    # Só na base (sem apontamento no ciclo) e sem início informado
+    assert book.progress("TC-002", REFERENCE) == (40, 5, 35, 12.5)
+    assert book.progress("TC-999", REFERENCE) == (0, 0, 0, 0)
+
+
+def test_progress_frame_uses_the_day_maintenances(sources):
+    frame = ledger.get_ledger(REFERENCE).progress_frame(["TC-001", "TC-003"], REFERENCE, {"TC-001": OLD_START})
+    assert list(frame.columns) == ledger.PROGRESS_COLUMNS
+    assert frame.set_index('equipment_tag')['acumulado'].to_dict() == {"TC-001": 360, "TC-003": 50}
+
+
+def test_current_cycle_change_reuses_the_persisted_base(sources):
+    calls, state = sources
+    first = ledger.get_ledger(REFERENCE)
+    assert ledger.get_ledger(REFERENCE) is first
+    loaded = sum(calls.values())
+
+    state["current"] = pd.concat([state["current"], production([("TC-001", OLD_START, "2026-09-09", 4, 2000)])])
+    second = ledger.get_ledger(REFERENCE)
+    assert second is not first
+    assert second.progress("TC-001", REFERENCE, OLD_START)[1] == 364
+    assert sum(calls.values()) == loaded          # nenhum ciclo fechado relido
+
+
+def test_correction_in_old_cycle_rebuilds_the_base(sources, fresh_cache, monkeypatch):
+    calls, state = sources
+    ledger.get_ledger(REFERENCE)
+
+    # Outra réplica: base e ciclos só no cache compartilhado, nenhuma partição registrada
+    fresh_cache.local_cache.clear()
+    with fresh_cache._partition_lock:
+        fresh_cache._partition_index.clear()
+        fresh_cache._key_loaders.clear()
+    monkeypatch.setattr(ledger, "_memo", (None, None, None))
+    loaded = sum(calls.values())
+    ledger.get_ledger(REFERENCE)
+    assert sum(calls.values()) == loaded
+
+    old_cycle, _, _ = get_fiscal_period(date(2024, 1, 10))
+    state["history"] = pd.concat([state["history"], production([("TC-001", OLD_START, "2024-01-10", 100, 2000)])])
+    fresh_cache.invalidate({("cycle", old_cycle.isoformat())})
+    wait_refreshes()
+
+    book = ledger.get_ledger(REFERENCE)
+    assert book.progress("TC-001", REFERENCE, OLD_START)[1] == 460
+
+
+def test_base_partitions_cover_every_closed_cycle():
+    parts = ledger._base_partitions(date(2026, 8, 16), date(2023, 9, 16))
+    assert ("cycle", "2023-09-16") in parts
+    assert ("cycle", "2026-07-16") in parts
+    assert ("cycle", "2026-08-16") not in parts
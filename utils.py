@@ -1,5 +1,7 @@
 from datetime import date, timedelta
 
+import pandas as pd
+
 def get_fiscal_period(selected_date):
     """
     Calcula o ciclo fiscal (16 do mês anterior até 15 do mês referência).
@@ -37,4 +39,36 @@ def get_fiscal_period(selected_date):
     year = end_date.year
     month_label = f"{month_name}/{year}"
 
-    return start_date, end_date, month_label
\ No newline at end of file
+    return start_date, end_date, month_label
+
+
+def format_date(value, fmt='%d/%m/%Y'):
+    """Formata uma data para exibição (usado só na renderização). Vazio/NaT vira '-'."""
+    if value is None or pd.isna(value):
+        return '-'
+    return pd.Timestamp(value).strftime(fmt)
+
+
+def to_date_column(series):
+    """Converte uma coluna para datetime64 (sem fuso e sem hora). Valores inválidos viram NaT."""
+    series = pd.to_datetime(series, errors='coerce')
+    if series.dt.tz is not None:
+        series = series.dt.tz_localize(None)
+    return series.dt.normalize()
+
+
+def compact_numeric(series):
+    """Numérico com nulos zerados, no menor tipo seguro: int32 se inteiro, senão float32."""
+    series = pd.to_numeric(series, errors='coerce').fillna(0)
+    if (series % 1 == 0).all():
+        return series.astype('int32')
+    return series.astype('float32')
+
+
+def iter_fiscal_cycles(start_date, end_date):
+    """Ciclos fiscais (inicio, fim, label) que cobrem o intervalo [start_date, end_date]."""
+    current = start_date
+    while current <= end_date:
+        cycle_start, cycle_end, label = get_fiscal_period(current)
+        yield cycle_start, cycle_end, label
+        current = cycle_end + timedelta(days=1)